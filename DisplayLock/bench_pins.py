@@ -0,0 +1,103 @@
+"""
+bench_pins.py
+
+Benchmark voor pin_store.py bij 1k / 50k / 500k codes:
+- laadtijd zonder cache (parse + hashing) en met cache (warme start)
+- lookuptijd voor bestaande en niet-bestaande codes
+- geheugen van de index, vergeleken met de oude set + dict uit load_pins
+
+Gebruik:
+    python bench_pins.py
+    python bench_pins.py -n 1000 50000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from pin_store import PinIndex, cache_path_for, iter_pin_entries, load_index
+
+
+def write_pins(path, n, rng):
+    lines = ["# benchmark"]
+    pins = rng.sample(range(10**7, 10**8), n)
+    for i, p in enumerate(pins):
+        if i % 10 == 0:
+            lines.append(f"{p}: Medewerker {i % 500} ; 2026-01-01 .. 2030-12-31")
+        elif i % 3 == 0:
+            lines.append(f"{p}: Badge {i}")
+        else:
+            lines.append(str(p))
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return [str(p) for p in pins]
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def traced_size(fn):
+    tracemalloc.start()
+    obj = fn()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, size
+
+
+def old_load(text):
+    pins, names = set(), {}
+    for e in iter_pin_entries(text):
+        pins.add(e.pin)
+        if e.name:
+            names[e.pin] = e.name
+    return pins, names
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", "--sizes", type=int, nargs="+", default=[1000, 50000, 500000])
+    ap.add_argument("--lookups", type=int, default=20000)
+    args = ap.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'codes':>8} {'koud ms':>9} {'cache ms':>9} {'hit µs':>8} {'mis µs':>8} "
+          f"{'index MB':>9} {'set+dict MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            path = Path(tmp) / f"pins_{n}.txt"
+            pins = write_pins(path, n, rng)
+            cache_path_for(path).unlink(missing_ok=True)
+
+            _, cold_ms = timed(load_index, path)           # parse + cache schrijven
+            idx, warm_ms = timed(load_index, path)         # uit cache
+            assert len(idx) == n, (len(idx), n)
+
+            hits = [rng.choice(pins) for _ in range(args.lookups)]
+            misses = [str(rng.randrange(10**8, 10**9)) for _ in range(args.lookups)]
+            now = time.time()
+            t0 = time.perf_counter()
+            ok = sum(1 for p in hits if idx.lookup(p, now) is not None)
+            hit_us = (time.perf_counter() - t0) * 1e6 / len(hits)
+            t0 = time.perf_counter()
+            bad = sum(1 for p in misses if idx.lookup(p, now) is not None)
+            miss_us = (time.perf_counter() - t0) * 1e6 / len(misses)
+            assert ok == len(hits) and bad == 0
+
+            data = cache_path_for(path).read_bytes()
+            _, idx_bytes = traced_size(lambda: PinIndex.from_bytes(data))
+            text = path.read_text(encoding="utf-8")
+            _, old_bytes = traced_size(lambda: old_load(text))
+
+            print(f"{n:8} {cold_ms:9.1f} {warm_ms:9.2f} {hit_us:8.2f} {miss_us:8.2f} "
+                  f"{idx_bytes/2**20:9.2f} {old_bytes/2**20:12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,13 +2,30 @@
 
 import tkinter as tk
 from tkinter import messagebox
-import ctypes
-from ctypes import wintypes
 import sys
+import time
 from pathlib import Path
 
+# gedeelde modules staan in ../LockCommon (naast deze map meekopiëren)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "LockCommon"))
+from tk_scheduler import TkScheduler
+from latency_metrics import make_metrics, ms_since
+from tk_profiler import maybe_install as maybe_install_profiler
+from pin_store import PinStore, iter_pin_entries
+from file_watcher import FileWatcher
+from lock_core import LockCore, LOCKED, UNLOCKED
+from control_socket import core_handlers, start_control
+from monitors import get_monitors, select_monitors
+from event_trace import maybe_record
+from audit_log import make_audit
+from fleet_sync import make_fleet
+from topmost_guard import TopmostGuard
+from lock_config import LockConfig
+
+# Scherm, codelengte en topmost-controle staan in ../lock_config.json (zie
+# LockCommon/lock_config.py) en worden live herladen.
+
 # ===== Instellingen UI =====
-SCREEN_INDEX = 0             # 0 = primair, 1 = tweede, 2 = derde, ...
 BG_COLOR = "#111122"
 
 KEY_BTN_FONT = ("Segoe UI", 24)
@@ -28,31 +45,32 @@ UNLOCK_BTN_H = 4
 # Lock-knop instellingen
 LOCKBTN_W, LOCKBTN_H = 150, 45
 LOCKBTN_MARGIN = 40
-KEEP_ALIVE_MS = 1000
-
-# Toetsenbord: maximale codelengte (alfanumeriek)
-MAX_CODE_LEN = 32
 
 # ===== PIN-bestand =====
 PINS_FILENAME = "overlay_lock_pins.txt"   # ligt in dezelfde map als dit script
 
-# ===== Win32 monitor info =====
-user32 = ctypes.windll.user32
-user32.SetProcessDPIAware()
-
-MONITORENUMPROC = ctypes.WINFUNCTYPE(
-    ctypes.c_int, ctypes.c_ulong, ctypes.c_ulong, ctypes.POINTER(wintypes.RECT), ctypes.c_double
-)
-_monitors = []
-def _monitor_enum(hMonitor, hdcMonitor, lprcMonitor, dwData):
-    r = lprcMonitor.contents
-    _monitors.append((r.left, r.top, r.right, r.bottom))
-    return 1
-
-def get_monitors():
-    _monitors.clear()
-    user32.EnumDisplayMonitors(0, 0, MONITORENUMPROC(_monitor_enum), 0)
-    return _monitors[:]
+# ===== Latentiemetingen (uit = geen meetkosten) =====
+METRICS_ENABLED = False
+METRICS_FILE = "overlay_lock_metrics.prom"   # naast dit script ("" = niet schrijven)
+METRICS_PORT = 0                             # > 0: http://127.0.0.1:<poort>/metrics
+
+# ===== Besturing door kassa/scripts (zie LockCommon/control_socket.py) =====
+CONTROL_ENABLED = False
+CONTROL_SOCKET = "/tmp/overlay_lock.sock"    # Unix-socket; op Windows wordt CONTROL_PORT gebruikt
+CONTROL_PORT = 47810                         # TCP op 127.0.0.1
+CONTROL_TOKEN = ""                           # niet leeg: client moet eerst 'auth <token>' sturen
+
+# ===== Auditlog (zie LockCommon/audit_log.py; opvragen met audit_query.py) =====
+AUDIT_ENABLED = True
+AUDIT_FILE = "overlay_lock_audit.log"        # naast dit script; namen, nooit codes
+AUDIT_MAX_MB = 10                            # roteren vanaf deze grootte ...
+AUDIT_MAX_DAYS = 7                           # ... of deze leeftijd
+AUDIT_KEEP = 20                              # zoveel geroteerde bestanden bewaren
+
+# ===== Fleet-sync (zie LockCommon/fleet_sync.py; uit zolang FLEET_URL leeg is) =====
+FLEET_URL = ""                               # bijv. "http://beheer:8765/bundle"
+FLEET_KEY_FILE = "fleet.key"                 # naast dit script; gedeelde sleutel voor de handtekening
+FLEET_INTERVAL = 60                          # seconden tussen twee polls (met spreiding)
 
 # ===== PIN loader =====
 def ensure_pins_file(path: Path):
@@ -61,6 +79,7 @@ def ensure_pins_file(path: Path):
     sample = (
         "# overlay_lock_pins.txt — één code per regel\n"
         "# Optioneel: PIN: Naam\n"
+        "# Optioneel geldig van/tot: PIN: Naam ; 2026-01-01 .. 2026-12-31\n"
         "1423: Medewerkers\n"
         "2580\n"
     )
@@ -71,25 +90,17 @@ def load_pins(path: Path):
     Leest codes uit bestand.
     - Lege regels en regels die met # beginnen worden genegeerd.
     - 'PIN: Naam' wordt ondersteund (naam niet verplicht).
+    - Optioneel geldigheidsvenster: 'PIN: Naam ; 2026-01-01 .. 2026-06-30'.
     Retourneert (set_pins, dict_pin_to_name).
+    De app zelf gebruikt PinStore (gehashte index); dit blijft voor scripts/controle.
     """
     pins = set()
     names = {}
     try:
-        for raw in path.read_text(encoding="utf-8").splitlines():
-            line = raw.strip()
-            if not line or line.startswith("#"):
-                continue
-            if ":" in line:
-                pin, name = line.split(":", 1)
-                pin = pin.strip()
-                name = name.strip()
-                if pin:
-                    pins.add(pin)
-                    if name:
-                        names[pin] = name
-            else:
-                pins.add(line)
+        for e in iter_pin_entries(path.read_text(encoding="utf-8")):
+            pins.add(e.pin)
+            if e.name:
+                names[e.pin] = e.name
     except FileNotFoundError:
         pass
     return pins, names
@@ -99,60 +110,171 @@ class DisplayLockApp:
     def __init__(self, root):
         self.root = root
         self.root.withdraw()
+        self.scheduler = TkScheduler(self.root)
+        # gedeelde instellingen; fout in het bestand -> standaardwaarden (zie status)
+        self.cfg = LockConfig("displaylock", post=lambda fn: self.root.after(0, fn))
+        self.cfg.load()
+        # LOCK_PROFILE=1 of --profile: callbacks meten en haperingen loggen
+        self.profiler = maybe_install_profiler(
+            self.root, str(Path(__file__).resolve().parent / "overlay_lock_profile.log"),
+            scheduler=self.scheduler,
+        )
 
         # pad naar pins-bestand
         self.base_dir = Path(__file__).resolve().parent
         self.pins_path = self.base_dir / PINS_FILENAME
+        # centrale pins/instellingen: eerst de laatst geldige bundel uit de cache, dan pollen
+        self.fleet = make_fleet(
+            FLEET_URL, self.base_dir / FLEET_KEY_FILE, self.base_dir / "overlay_lock_fleet.cache",
+            {"pins": self.pins_path}, self._on_fleet_settings, lambda fn: self.root.after(0, fn),
+            interval=FLEET_INTERVAL,
+        )
         ensure_pins_file(self.pins_path)
-        self.pins, self.pin_names = load_pins(self.pins_path)
-        self.pins_mtime = self._pins_mtime()
+        # gehashte index; laadt bij de start uit de cache naast het pins-bestand
+        self.pin_store = PinStore(self.pins_path)
+        self.pin_store.load()
+        # wijzigingen direct oppikken (inotify of goedkope poll), niet pas bij de volgende poging
+        self.watcher = FileWatcher().start()
+        self.watcher.watch(self.pins_path, self._on_pins_changed)
+        self.watcher.watch(self.cfg.path, lambda path: self.cfg.reload())
+
+        self.metrics = make_metrics(
+            METRICS_ENABLED,
+            str(self.base_dir / METRICS_FILE) if METRICS_FILE else None,
+            METRICS_PORT, self.scheduler,
+        )
+        self.last_unlock_name = ""
+        self.audit = make_audit(
+            AUDIT_ENABLED, self.base_dir / AUDIT_FILE, "displaylock",
+            max_bytes=AUDIT_MAX_MB * 1024 * 1024, max_age=AUDIT_MAX_DAYS * 86400, keep=AUDIT_KEEP,
+        )
+        self.audit.log("start")
+
+        # headless kern: toestand, invoerbuffer en verificatie; deze klasse is alleen de view
+        self.core = LockCore(
+            self.scheduler, self.pin_store.verify, max_len=self.cfg.max_code_len,
+            allowed=str.isalnum, relock_seconds=None, state=UNLOCKED,
+        )
+        self.core.on_state = self._on_lock_state
+        self.core.on_input = self._update_mask
+        self.core.on_reject = self._on_reject
+        # LOCK_TRACE=1 of --trace: invoer en toestandswissels opnemen voor replay.py
+        self.trace = maybe_record(
+            self.base_dir / "overlay_lock_trace.lktrace",
+            {"app": "displaylock", "relock_seconds": None, "max_len": self.cfg.max_code_len,
+             "allowed": "alnum"},
+            self.core, self.scheduler,
+        )
 
         screens = get_monitors()
         if not screens:
             messagebox.showerror("DisplayLock", "Geen schermen gevonden.")
             sys.exit(1)
-
-        self.screen_idx = SCREEN_INDEX if 0 <= SCREEN_INDEX < len(screens) else 0
-        self.sx, self.sy, self.sr, self.sb = screens[self.screen_idx]
-        self.swidth = self.sr - self.sx
-        self.sheight = self.sb - self.sy
+        self._select_screens(screens)
 
         self.lock_btn_win = None
         self.overlay = None
-        self.entered = ""
+        self.blockers = []
+        self.blocker_targets = []
 
+        # zichtbaar/bovenaan houden op events + goedkope controle, i.p.v. elke seconde alles opnieuw
+        self.topmost = TopmostGuard(
+            self.scheduler, self.cfg.keep_alive_ms / 1000.0, poll=self.cfg.topmost_poll,
+            metrics=self.metrics, metric="displaylock_wm_calls",
+        )
+        self.lock_btn_target = None
         self._build_overlay()
+        self._build_blockers()
         self._build_lock_button()
-        self._keep_alive()   # lock-knop bovenaan houden
+        if self.profiler:
+            self.profiler.wrap_commands(self.root)
+        self.topmost.start()
+        # alleen het subsysteem waarvan iets veranderde wordt bijgewerkt
+        self.cfg.subscribe({"max_code_len"}, self._on_cfg_code_len)
+        self.cfg.subscribe({"keep_alive_ms", "topmost_poll"}, self._on_cfg_topmost)
+        self.cfg.subscribe({"screen_index", "all_monitors"}, self._on_cfg_screens)
+        # lock/unlock/extend/status via socket; commando's lopen via root.after op de Tk-thread
+        handlers = core_handlers(
+            self.core, lock=self.lock_now,
+            extra_status=lambda: {**self.topmost.stats(), **self.cfg.status()},
+        )
+        handlers["fleet"] = lambda req: self.fleet.status()
+        self.control = start_control(
+            CONTROL_ENABLED, handlers, lambda fn: self.root.after(0, fn),
+            path=CONTROL_SOCKET, port=CONTROL_PORT, token=CONTROL_TOKEN or None,
+        )
 
     # --- helpers pins ---
-    def _pins_mtime(self):
-        try:
-            return self.pins_path.stat().st_mtime
-        except FileNotFoundError:
-            return 0
-
-    def _reload_pins_if_changed(self):
-        mtime = self._pins_mtime()
-        if mtime != self.pins_mtime:
-            self.pins, self.pin_names = load_pins(self.pins_path)
-            self.pins_mtime = mtime
+    def _on_pins_changed(self, path):
+        """Vanuit de watcher-thread: herladen op de achtergrond, daarna atomisch wisselen."""
+        self.pin_store.reload_async()
+
+    def _on_fleet_settings(self, settings, changed):
+        """Via FleetSync op de Tk-thread; het pins-bestand loopt via de FileWatcher."""
+        self.cfg.set_layer("fleet", settings)
+
+    # --- instellingen (lock_config.json / fleet) ---
+    def _on_cfg_code_len(self, changed):
+        self.core.max_len = changed["max_code_len"]
+
+    def _on_cfg_topmost(self, changed):
+        self.topmost.stop()
+        self.topmost.interval = self.cfg.keep_alive_ms / 1000.0
+        self.topmost.poll = self.cfg.topmost_poll
+        self.topmost.start()
+
+    def _on_cfg_screens(self, changed):
+        """Ander scherm of bijschermen aan/uit: vensters opnieuw opbouwen, toestand blijft."""
+        screens = get_monitors()
+        if not screens:
+            return                  # geen schermen te vinden: huidige vensters laten staan
+        for target in [self.overlay_target, self.lock_btn_target] + self.blocker_targets:
+            if target is not None:
+                self.topmost.remove(target)
+        for win in [self.overlay, self.lock_btn_win] + self.blockers:
+            if win is not None:
+                win.destroy()
+        self.overlay = self.lock_btn_win = self.lock_btn_target = None
+        self.blockers, self.blocker_targets = [], []
+
+        self._select_screens(screens)
+        self._build_overlay()
+        self._build_blockers()
+        self._build_lock_button()
+        if self.profiler:
+            self.profiler.wrap_commands(self.root)
+        self._update_mask(len(self.core.entered))
+        if self.core.state == LOCKED:
+            for target in self.blocker_targets:
+                self.topmost.enforce(target)
+            self.topmost.enforce(self.overlay_target)
+
+    def _select_screens(self, screens):
+        index = self.cfg.screen_index
+        self.screen_idx = index if 0 <= index < len(screens) else 0
+        # screens[0] = scherm met keypad en lock-knop; overige alleen afdekken
+        self.screens = select_monitors(screens, self.screen_idx, self.cfg.all_monitors)
+        self.sx, self.sy, self.sr, self.sb = self.screens[0]
+        self.swidth = self.sr - self.sx
+        self.sheight = self.sb - self.sy
 
     # -------- Lock-knop ----------
     def _build_lock_button(self):
         if self.lock_btn_win and self.lock_btn_win.winfo_exists():
-            self._place_lock_button()
-            self.lock_btn_win.deiconify()
-            self.lock_btn_win.lift()
-            self.lock_btn_win.attributes("-topmost", True)
+            self.topmost.enforce(self.lock_btn_target)
             return
 
         self.lock_btn_win = tk.Toplevel(self.root)
         self.lock_btn_win.overrideredirect(True)
         self.lock_btn_win.attributes("-topmost", True)
         self.lock_btn_win.configure(bg="#F2F2F7")
-        self.lock_btn_win.bind("<Unmap>", lambda e: self.lock_btn_win.after(50, self._show_lock_button))
-        self.lock_btn_win.bind("<Map>",   lambda e: self._place_lock_button())
+        # <Unmap>/<Visibility>/<Configure> en de periodieke controle via de TopmostGuard
+        if self.lock_btn_target:
+            self.topmost.remove(self.lock_btn_target)
+        self.lock_btn_target = self.topmost.add(
+            self.lock_btn_win, self._lock_button_geometry(), active=lambda: self.core.state != LOCKED,
+            on_lost=self._show_lock_button,
+        )
 
         btn = tk.Button(
             self.lock_btn_win, text="🔒 Lock nu", font=("Segoe UI", 11, "bold"),
@@ -162,27 +284,24 @@ class DisplayLockApp:
         btn.pack()
         self._place_lock_button()
 
-    def _place_lock_button(self):
+    def _lock_button_geometry(self):
         x = self.sx + self.swidth  - LOCKBTN_W - LOCKBTN_MARGIN
         y = self.sy + self.sheight - LOCKBTN_H - LOCKBTN_MARGIN
-        self.lock_btn_win.geometry(f"{LOCKBTN_W}x{LOCKBTN_H}+{x}+{y}")
+        return (LOCKBTN_W, LOCKBTN_H, x, y)
+
+    def _place_lock_button(self):
+        w, h, x, y = self._lock_button_geometry()
+        self.lock_btn_win.geometry(f"{w}x{h}+{x}+{y}")
 
     def _show_lock_button(self):
         try:
             if not (self.lock_btn_win and self.lock_btn_win.winfo_exists()):
                 self._build_lock_button()
             else:
-                self.lock_btn_win.deiconify()
-                self._place_lock_button()
-                self.lock_btn_win.lift()
-                self.lock_btn_win.attributes("-topmost", True)
+                self.topmost.enforce(self.lock_btn_target)
         except tk.TclError:
             self._build_lock_button()
 
-    def _keep_alive(self):
-        self._show_lock_button()
-        self.root.after(KEEP_ALIVE_MS, self._keep_alive)
-
     # -------- Overlay ----------
     def _build_overlay(self):
         self.overlay = tk.Toplevel(self.root)
@@ -191,6 +310,10 @@ class DisplayLockApp:
         self.overlay.attributes("-topmost", True)
         self.overlay.configure(bg=BG_COLOR)
         self.overlay.geometry(f"{self.swidth}x{self.sheight}+{self.sx}+{self.sy}")
+        self.overlay_target = self.topmost.add(
+            self.overlay, (self.swidth, self.sheight, self.sx, self.sy),
+            active=lambda: self.core.state == LOCKED, focus=True,
+        )
 
         title = tk.Label(self.overlay, text="TOEGANGSCODE VEREIST",
                          fg="white", bg=BG_COLOR, font=("Segoe UI", 34, "bold"))
@@ -237,66 +360,85 @@ class DisplayLockApp:
         self.overlay.bind("<Escape>", self.on_clear)         # esc = wissen
         self.overlay.bind("<Return>", lambda e: self.try_unlock())  # enter = ontgrendelen
 
-    # -------- Logica ----------
+    def _build_blockers(self):
+        """Afdekvensters voor de overige schermen (alleen met all_monitors)."""
+        for mon in self.screens[1:]:
+            win = tk.Toplevel(self.root)
+            win.withdraw()
+            win.overrideredirect(True)
+            win.attributes("-topmost", True)
+            win.configure(bg=BG_COLOR)
+            win.geometry(mon.geometry)
+            self.blocker_targets.append(self.topmost.add(
+                win, (mon.width, mon.height, mon.left, mon.top), active=lambda: self.core.state == LOCKED,
+            ))
+            tk.Label(win, text="TOEGANGSCODE VEREIST", fg="white", bg=BG_COLOR,
+                     font=("Segoe UI", 34, "bold")).place(relx=0.5, rely=0.45, anchor="center")
+            tk.Label(win, text="Ontgrendel via het hoofdscherm.", fg="#DDDDFF", bg=BG_COLOR,
+                     font=("Segoe UI", 18)).place(relx=0.5, rely=0.55, anchor="center")
+            self.blockers.append(win)
+
+    # -------- Logica (view op LockCore) ----------
     def on_key(self, label):
-        if label == "Wissen":
-            self.entered = ""
-        elif label == "⌫":
-            self.entered = self.entered[:-1]
-        else:
-            if len(self.entered) < MAX_CODE_LEN:
-                self.entered += label
-            else:
-                self.overlay.bell()
-        self._update_mask()
+        if not self.core.press(label):
+            self.overlay.bell()
 
     def on_keypress(self, event):
-        ch = event.char
-        if ch and ch.isalnum():  # alleen letters/cijfers
-            if len(self.entered) < MAX_CODE_LEN:
-                self.entered += ch
-                self._update_mask()
-            else:
-                self.overlay.bell()
+        if not self.core.type_char(event.char):  # alleen letters/cijfers
+            self.overlay.bell()
 
     def on_backspace(self, event):
-        if self.entered:
-            self.entered = self.entered[:-1]
-            self._update_mask()
+        self.core.backspace()
 
     def on_clear(self, event):
-        self.entered = ""
-        self._update_mask()
+        self.core.clear()
 
-    def _update_mask(self):
-        self.mask_var.set("•" * len(self.entered) if self.entered else "")
+    def _update_mask(self, length):
+        self.mask_var.set("•" * length if length else "")
 
     def lock_now(self):
-        self.entered = ""
-        self._update_mask()
-        self.overlay.deiconify()
-        self.overlay.lift()
-        self.overlay.attributes("-topmost", True)
-        self.overlay.focus_set()  # direct kunnen typen met toetsenbord
-
-    def try_unlock(self):
-        # Herlaad codes wanneer bestand is gewijzigd (hot-reload)
-        self._reload_pins_if_changed()
-
-        if self.entered in self.pins:
-            self.entered = ""
-            self._update_mask()
+        self.core.lock("knop")
+
+    def _on_lock_state(self, state, reason):
+        match = self.core.last_match if reason == "code" else None
+        self.audit.log_state(state, reason, match.name if match else "")
+        if state == LOCKED:
+            for target in self.blocker_targets:     # eerst de bijschermen, focus blijft op het keypad
+                self.topmost.enforce(target)
+            self.topmost.enforce(self.overlay_target)   # incl. focus: direct kunnen typen met toetsenbord
+        else:
             self.overlay.withdraw()
+            for win in self.blockers:
+                win.withdraw()
             self._show_lock_button()
-        else:
-            self.mask_var.set("Foutieve code")
-            self.overlay.after(900, lambda: self.mask_var.set(""))
-            self.entered = ""
+
+    def try_unlock(self):
+        t0 = time.monotonic() if self.metrics.enabled else 0.0
+        started = self.core.entry_started
+        # codes worden door de FileWatcher up-to-date gehouden; hier geen stat of parse
+        match = self.core.submit()
+        if match:
+            self.last_unlock_name = match.name
+            if self.metrics.enabled:
+                self.metrics.observe("displaylock_try_unlock_ms", ms_since(t0))
+                if started is not None:
+                    self.metrics.observe("displaylock_unlock_ms", ms_since(started))
+
+    def _on_reject(self):
+        self.metrics.inc("displaylock_failed_unlocks")
+        self.audit.log("reject")
+        self.mask_var.set("Foutieve code")
+        self.overlay.after(900, lambda: self.mask_var.set(""))
 
 def main():
     root = tk.Tk()
     app = DisplayLockApp(root)
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        if app.trace:
+            app.trace.close()
+        app.audit.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,288 @@
+"""
+pin_store.py
+
+Geïndexeerde, hot-swappable PIN-opslag voor overlay_lock.py.
+
+- Het pins-bestand wordt in een achtergrondthread geparsed; de nieuwe index
+  wordt in één toewijzing ingewisseld (lezers zien altijd óf de oude óf de
+  nieuwe index, nooit een halve).
+- Codes staan niet als platte tekst in het geheugen maar als gezouten
+  hash (BLAKE2b met een willekeurige sleutel per index). De index is een gesorteerde ``array('Q')`` met de eerste
+  8 bytes van elke hash (bisect-lookup) plus de volledige 16-byte hashes in
+  één bytes-blok voor de constante-tijd vergelijking.
+- Een binaire cache naast het pins-bestand (sleutel: mtime_ns + grootte van
+  het bronbestand) maakt de start snel: geen parse en geen hashing nodig.
+- Per code is een optioneel geldigheidsvenster mogelijk:
+      1423: Timo ; 2026-01-01 .. 2026-06-30
+      2580 ; 2026-03-01T08:00 ..
+"""
+
+import bisect
+import functools
+import hmac
+import hashlib
+import os
+import secrets
+import struct
+import threading
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime
+
+CACHE_SUFFIX = ".cache"
+CACHE_MAGIC = b"PINIDX1\0"
+DIGEST_LEN = 16
+_HEADER = struct.Struct("<8sqqI16s")     # magic, src_mtime_ns, src_size, n, salt
+
+PinEntry = namedtuple("PinEntry", "pin name valid_from valid_to")
+PinMatch = namedtuple("PinMatch", "name valid_from valid_to")
+
+
+# ----- parser -----
+def _parse_when(text):
+    text = text.strip()
+    if not text:
+        return 0
+    try:
+        # 2026-01-01, 2026-01-01T08:00 of 2026-01-01 08:00 (lokale tijd)
+        return int(time.mktime(datetime.fromisoformat(text).timetuple()))
+    except ValueError:
+        raise ValueError(f"ongeldige datum: {text!r}") from None
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_window(text):
+    """'van .. tot' -> (van, tot) als epoch-seconden; 0 = open kant. 'tot' geldt t/m die dag."""
+    if ".." not in text:
+        raise ValueError(f"ongeldig venster: {text!r}")
+    a, b = text.split("..", 1)
+    start = _parse_when(a)
+    end = _parse_when(b)
+    if end and len(b.strip()) == 10:      # alleen datum: hele dag meenemen
+        end += 24 * 3600 - 1
+    return start, end
+
+
+def iter_pin_entries(text):
+    """
+    Regels van het pins-bestand -> ``PinEntry``. Lege regels en # worden
+    genegeerd. Is het deel na ';' geen geldig venster, dan hoort het gewoon
+    bij de naam (zoals vroeger).
+    """
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        window = (0, 0)
+        if ";" in line:
+            head, win = line.rsplit(";", 1)
+            try:
+                window = _parse_window(win)
+                line = head.strip()
+            except ValueError:
+                pass
+        if ":" in line:
+            pin, name = line.split(":", 1)
+            pin, name = pin.strip(), name.strip()
+        else:
+            pin, name = line, ""
+        if pin:
+            yield PinEntry(pin, name, *window)
+
+
+# ----- index -----
+class PinIndex:
+    """Onveranderlijke index; wordt als geheel vervangen bij een herlaad."""
+
+    def __init__(self, salt, keys, digests, names, name_idx, valid_from, valid_to,
+                 src_mtime_ns=0, src_size=0):
+        self.salt = salt
+        self.keys = keys                # array('Q'), gesorteerd
+        self.digests = digests          # bytes, n * DIGEST_LEN, zelfde volgorde
+        self.names = names              # list[str], index 0 = ""
+        self.name_idx = name_idx        # array('I')
+        self.valid_from = valid_from    # array('q'), 0 = open
+        self.valid_to = valid_to        # array('q'), 0 = open
+        self.src_mtime_ns = src_mtime_ns
+        self.src_size = src_size
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def empty(cls):
+        return cls(b"\0" * 16, array("Q"), b"", [""], array("I"), array("q"), array("q"))
+
+    @classmethod
+    def build(cls, entries, salt=None, src_mtime_ns=0, src_size=0):
+        salt = salt or secrets.token_bytes(16)
+        names = [""]
+        name_pos = {"": 0}
+        rows = {}
+        for e in entries:
+            d = _digest(salt, e.pin)
+            ni = name_pos.get(e.name)
+            if ni is None:
+                ni = name_pos[e.name] = len(names)
+                names.append(e.name)
+            rows[d] = (ni, e.valid_from, e.valid_to)   # laatste regel wint bij dubbele codes
+        order = sorted(rows)
+        keys = array("Q", (int.from_bytes(d[:8], "big") for d in order))
+        digests = b"".join(order)
+        name_idx = array("I", (rows[d][0] for d in order))
+        vf = array("q", (rows[d][1] for d in order))
+        vt = array("q", (rows[d][2] for d in order))
+        return cls(salt, keys, digests, names, name_idx, vf, vt, src_mtime_ns, src_size)
+
+    def lookup(self, pin, now=None):
+        """``PinMatch`` als de code bestaat en nu geldig is, anders None."""
+        d = _digest(self.salt, pin)
+        k = int.from_bytes(d[:8], "big")
+        i = bisect.bisect_left(self.keys, k)
+        if i >= len(self.keys) or self.keys[i] != k:
+            return None
+        if not hmac.compare_digest(self.digests[i * DIGEST_LEN:(i + 1) * DIGEST_LEN], d):
+            return None
+        vf, vt = self.valid_from[i], self.valid_to[i]
+        if vf or vt:
+            now = time.time() if now is None else now
+            if (vf and now < vf) or (vt and now > vt):
+                return None
+        return PinMatch(self.names[self.name_idx[i]], vf, vt)
+
+    # ----- cache -----
+    def to_bytes(self):
+        names_blob = "\n".join(self.names[1:]).encode("utf-8")
+        return b"".join((
+            _HEADER.pack(CACHE_MAGIC, self.src_mtime_ns, self.src_size, len(self.keys), self.salt),
+            self.keys.tobytes(), self.digests, self.name_idx.tobytes(),
+            self.valid_from.tobytes(), self.valid_to.tobytes(),
+            struct.pack("<I", len(names_blob)), names_blob,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, mtime_ns, size, n, salt = _HEADER.unpack_from(data, 0)
+        if magic != CACHE_MAGIC:
+            raise ValueError("geen PIN-cache")
+        pos = _HEADER.size
+
+        def take(typecode, count):
+            nonlocal pos
+            a = array(typecode)
+            nbytes = a.itemsize * count
+            a.frombytes(data[pos:pos + nbytes])
+            pos += nbytes
+            return a
+
+        keys = take("Q", n)
+        digests = bytes(data[pos:pos + n * DIGEST_LEN])
+        pos += n * DIGEST_LEN
+        name_idx = take("I", n)
+        vf = take("q", n)
+        vt = take("q", n)
+        (nlen,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        blob = bytes(data[pos:pos + nlen]).decode("utf-8")
+        names = [""] + (blob.split("\n") if blob else [])
+        if pos + nlen != len(data):
+            raise ValueError("PIN-cache beschadigd")
+        return cls(salt, keys, digests, names, name_idx, vf, vt, mtime_ns, size)
+
+
+def _digest(salt, pin):
+    # BLAKE2b met sleutel is een volwaardige MAC en veel sneller dan HMAC-SHA256
+    return hashlib.blake2b(pin.encode("utf-8"), key=salt, digest_size=DIGEST_LEN).digest()
+
+
+def cache_path_for(path):
+    return path.with_name(path.name + CACHE_SUFFIX)
+
+
+def load_index(path, use_cache=True):
+    """
+    Laad de index voor ``path``. Een geldige cache (zelfde mtime_ns en grootte)
+    wordt direct gebruikt; anders wordt er geparsed en de cache vernieuwd.
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return PinIndex.empty()
+    cpath = cache_path_for(path)
+    if use_cache:
+        try:
+            idx = PinIndex.from_bytes(cpath.read_bytes())
+            if idx.src_mtime_ns == st.st_mtime_ns and idx.src_size == st.st_size:
+                return idx
+        except (OSError, ValueError, struct.error):
+            pass
+    text = path.read_text(encoding="utf-8")
+    idx = PinIndex.build(iter_pin_entries(text), src_mtime_ns=st.st_mtime_ns, src_size=st.st_size)
+    if use_cache:
+        tmp = cpath.with_name(cpath.name + ".tmp")
+        try:
+            tmp.write_bytes(idx.to_bytes())
+            os.replace(tmp, cpath)
+        except OSError:
+            pass
+    return idx
+
+
+class PinStore:
+    """
+    Houdt de actuele ``PinIndex`` vast. ``reload_async`` laadt op de achtergrond
+    en wisselt daarna in één keer; ``on_swap(index)`` wordt vanuit die thread
+    aangeroepen (marshal zelf naar Tk als dat nodig is).
+    """
+
+    def __init__(self, path, use_cache=True, on_swap=None):
+        self.path = path
+        self.use_cache = use_cache
+        self.on_swap = on_swap
+        self.index = PinIndex.empty()
+        self._loading = threading.Lock()
+        self._again = False
+        self.loads = 0
+
+    def load(self):
+        """Synchroon laden (bij de start, uit de cache meestal binnen milliseconden)."""
+        self._swap(load_index(self.path, self.use_cache))
+
+    def reload_async(self):
+        """Start een herlaad op de achtergrond; tijdens een lopende herlaad wordt er één ingepland."""
+        # eerst de vlag, dan pas proberen: een worker die net vrijgeeft ziet hem dan altijd
+        self._again = True
+        if not self._loading.acquire(blocking=False):
+            return
+        threading.Thread(target=self._worker, name="PinStore", daemon=True).start()
+
+    def _worker(self):
+        while True:
+            self._again = False
+            try:
+                self._swap(load_index(self.path, self.use_cache))
+            except (OSError, UnicodeDecodeError):
+                pass      # oude index blijft gelden
+            finally:
+                self._loading.release()
+            if not self._again or not self._loading.acquire(blocking=False):
+                return
+
+    def _swap(self, index):
+        self.index = index
+        self.loads += 1
+        if self.on_swap:
+            self.on_swap(index)
+
+    def verify(self, pin, now=None):
+        return self.index.lookup(pin, now)
+
+    def source_changed(self):
+        """Goedkope stat: wijkt het bronbestand af van de geladen index?"""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return len(self.index) > 0
+        idx = self.index
+        return (st.st_mtime_ns, st.st_size) != (idx.src_mtime_ns, idx.src_size)
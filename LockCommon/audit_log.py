@@ -0,0 +1,208 @@
+"""
+audit_log.py
+
+Append-only auditlog van de lock-apps: wie ontgrendelde wanneer (naam, nooit
+de code), foutieve pogingen, seriële triggers, relocks en lezers die weg
+vielen.
+
+``log()`` kost alleen een ``deque.append`` en blokkeert nooit; een
+schrijfthread verzamelt de records en schrijft ze in één keer weg, elke
+``flush_interval`` seconden of zodra er ``flush_records`` klaarstaan. Het
+bestand wordt geroteerd op grootte en op leeftijd; van de oude bestanden
+blijven er ``keep`` bewaard.
+
+Eén record per regel, tab-gescheiden, zodat audit_query.py miljoenen regels
+snel kan tellen:
+
+    <epoch.ms>  <app>  <event>  <naam>  <detail>
+
+De tijd heeft altijd 10 cijfers voor de punt (tot het jaar 2286), dus het uur
+is ``int(regel[:10]) // 3600``.
+
+Events: start, unlock, reject, trigger, card, card_rejected, lock, relock,
+reader_offline, reader_online.
+"""
+
+import atexit
+import glob
+import os
+import threading
+import time
+from collections import deque
+
+FLUSH_INTERVAL = 2.0
+FLUSH_RECORDS = 1000
+MAX_BYTES = 10 * 1024 * 1024
+MAX_AGE = 7 * 86400
+KEEP = 20
+MAX_PENDING = 100_000       # daarboven worden records geteld en weggegooid, nooit geblokkeerd
+_CLEAN = str.maketrans("\t\r\n", "   ")
+
+
+class AuditLog:
+    enabled = True
+
+    def __init__(self, path, app, flush_interval=FLUSH_INTERVAL, flush_records=FLUSH_RECORDS,
+                 max_bytes=MAX_BYTES, max_age=MAX_AGE, keep=KEEP, clock=time.time):
+        self.path = str(path)
+        self.app = app.translate(_CLEAN)
+        self.flush_interval = flush_interval
+        self.flush_records = flush_records
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep = keep
+        self.clock = clock
+        self._q = deque()
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = None
+        self._file = None
+        self._size = 0
+        self._opened = 0.0          # tijd van het eerste record in het huidige bestand
+
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self.batches = 0
+
+    # ----- publiek (elke thread) -----
+    def log(self, event, name="", detail=""):
+        q = self._q
+        if len(q) >= MAX_PENDING:
+            self.dropped += 1
+            return
+        q.append((self.clock(), event, name, detail))
+        if len(q) >= self.flush_records:
+            self._wake.set()
+
+    def log_state(self, state, reason, name=""):
+        """Toestandswissel van LockCore: lock/relock, of unlock met de reden als detail."""
+        if state == "locked":
+            self.log("relock" if reason == "relock" else "lock", "", reason)
+        else:
+            self.log("unlock", name, reason)
+
+    def start(self):
+        if self._thread is None:
+            self._open()
+            self._thread = threading.Thread(target=self._run, name="AuditLog", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def flush(self):
+        """Nu laten wegschrijven (wacht niet)."""
+        self._wake.set()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ----- schrijfthread -----
+    def _run(self):
+        while not self._stop:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        q = self._q
+        if not q:
+            return
+        app = self.app
+        lines = []
+        try:
+            while True:
+                t, event, name, detail = q.popleft()
+                lines.append(f"{t:.3f}\t{app}\t{event}\t{str(name).translate(_CLEAN)}"
+                             f"\t{str(detail).translate(_CLEAN)}\n")
+        except IndexError:
+            pass
+        if not self._opened:
+            self._opened = float(lines[0][:14])
+        data = "".join(lines)
+        try:
+            self._file.write(data)
+            self._file.flush()
+        except (OSError, AttributeError):
+            self.dropped += len(lines)
+            self._open()
+            return
+        self._size += len(data.encode("utf-8"))
+        self.written += len(lines)
+        self.batches += 1
+        if self._size >= self.max_bytes or (self._opened and self.clock() - self._opened >= self.max_age):
+            self._rotate()
+
+    def _open(self):
+        try:
+            self._file = open(self.path, "a", encoding="utf-8", newline="\n")
+            self._size = self._file.tell()
+        except OSError:
+            self._file = None
+            return
+        self._opened = 0.0
+        if self._size:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._opened = float(f.readline()[:14])
+            except (OSError, ValueError):
+                self._opened = self.clock()
+
+    def _rotate(self):
+        self._file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.clock()))
+        target, n = f"{self.path}.{stamp}", 1
+        while os.path.exists(target):
+            n += 1
+            target = f"{self.path}.{stamp}-{n}"
+        try:
+            os.replace(self.path, target)
+        except OSError:
+            pass
+        self.rotations += 1
+        for old in rotated_files(self.path)[:-self.keep or None]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        self._open()
+
+
+class NullAudit:
+    """Uitgeschakeld auditlog: alles is een no-op."""
+
+    enabled = False
+
+    def log(self, event, name="", detail=""):
+        pass
+
+    def log_state(self, state, reason, name=""):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def rotated_files(path):
+    """Geroteerde bestanden van ``path``, oudste eerst (de naam bevat het tijdstip)."""
+    return sorted(glob.glob(glob.escape(str(path)) + ".*"))
+
+
+def make_audit(enabled, path, app, **kwargs):
+    """Auditlog volgens de instellingen van een app; NullAudit als uit of niet te openen."""
+    if not enabled:
+        return NullAudit()
+    log = AuditLog(path, app, **kwargs).start()
+    return log if log._file is not None else NullAudit()
@@ -0,0 +1,156 @@
+"""
+audit_query.py
+
+Samenvattingen van het auditlog (audit_log.py), ook over miljoenen regels
+en geroteerde bestanden (.gz mag ook).
+
+Standaard: ontgrendelingen per uur per naam. Groeperen kan op ``hour``,
+``day``, ``name``, ``event``, ``app`` en ``detail``; tijden in lokale tijd.
+
+Gebruik:
+    python audit_query.py ../DisplayLock/overlay_lock_audit.log
+    python audit_query.py audit.log --by day name --since 2025-01-01
+    python audit_query.py audit.log --event trigger card_rejected --by hour event
+    python audit_query.py audit.log --event all --by event --csv
+
+Zonder --no-rotated worden ook de geroteerde bestanden naast elk pad meegenomen
+(oudste eerst).
+"""
+
+import argparse
+import gzip
+import operator
+import sys
+import time
+from collections import Counter
+
+from audit_log import rotated_files
+
+FIELDS = {"app": 1, "event": 2, "name": 3, "detail": 4}
+TIME_KEYS = ("hour", "day")
+
+
+def iter_lines(paths):
+    for path in paths:
+        opener = gzip.open if str(path).endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8", errors="replace", newline="\n") as f:
+                yield from f
+        except FileNotFoundError:
+            continue
+
+
+def parse_when(text):
+    """'2025-01-31' of '2025-01-31 14:00' (lokale tijd) -> epoch-seconden."""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return int(time.mktime(time.strptime(text, fmt)))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"onbekende tijd {text!r} (JJJJ-MM-DD [UU:MM])")
+
+
+def count(lines, by=("hour", "name"), events=("unlock",), since=None, until=None, name=None):
+    """
+    Tel records per groep. Retourneert (Counter, aantal gelezen regels).
+    Intern wordt per uur geteld (``int(regel[:10]) // 3600``); dag en uur
+    worden pas daarna naar lokale tijd omgezet.
+    """
+    events = None if not events or "all" in events else frozenset(events)
+    # één event: eerst goedkoop op de tekst zoeken, pas daarna splitsen
+    needle = f"\t{next(iter(events))}\t" if events is not None and len(events) == 1 else None
+    fields = [FIELDS[k] for k in by if k not in TIME_KEYS]
+    strip = FIELDS["detail"] in fields
+    timed = any(k in TIME_KEYS for k in by)
+    getter = operator.itemgetter(*fields) if fields else (lambda p: ())
+    single = len(fields) == 1
+    lo = since if since is not None else 0
+    hi = until if until is not None else 1 << 62
+    counts = Counter()
+    n = 0
+    for line in lines:
+        n += 1
+        if needle is not None and needle not in line:
+            continue
+        p = line.split("\t")
+        if len(p) != 5:
+            continue
+        if events is not None and p[2] not in events:
+            continue
+        if name is not None and p[3] != name:
+            continue
+        try:
+            sec = int(line[:10])
+        except ValueError:
+            continue            # afgebroken of beschadigde regel
+        if sec < lo or sec >= hi:
+            continue
+        if strip:
+            p[4] = p[4].rstrip("\n")
+        key = getter(p)
+        if single:
+            key = (key,)
+        counts[((sec // 3600) if timed else 0,) + key] += 1
+    return relabel(counts, by), n
+
+
+def relabel(counts, by):
+    """Uur-emmers omzetten naar lokale 'uur'/'dag'-labels en in de volgorde van ``by`` zetten."""
+    labels = {}
+    out = Counter()
+    for key, c in counts.items():
+        bucket, rest = key[0], list(key[1:])
+        row = []
+        for k in by:
+            if k in TIME_KEYS:
+                lab = labels.get((k, bucket))
+                if lab is None:
+                    fmt = "%Y-%m-%d %H:00" if k == "hour" else "%Y-%m-%d"
+                    lab = labels[(k, bucket)] = time.strftime(fmt, time.localtime(bucket * 3600))
+                row.append(lab)
+            else:
+                row.append(rest.pop(0))
+        out[tuple(row)] += c
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("paths", nargs="+", help="auditlog(s)")
+    ap.add_argument("--by", nargs="+", default=["hour", "name"],
+                    choices=list(TIME_KEYS) + list(FIELDS))
+    ap.add_argument("--event", nargs="+", default=["unlock"], help="event(s) of 'all'")
+    ap.add_argument("--name")
+    ap.add_argument("--since", type=parse_when)
+    ap.add_argument("--until", type=parse_when)
+    ap.add_argument("--top", type=int, default=0, help="alleen de N grootste groepen")
+    ap.add_argument("--csv", action="store_true")
+    ap.add_argument("--no-rotated", action="store_true")
+    args = ap.parse_args()
+
+    paths = []
+    for p in args.paths:
+        if not args.no_rotated:
+            paths += [r for r in rotated_files(p) if r not in paths]
+        paths.append(p)
+
+    t0 = time.perf_counter()
+    counts, n = count(iter_lines(paths), args.by, args.event, args.since, args.until, args.name)
+    dt = time.perf_counter() - t0
+
+    rows = counts.most_common(args.top) if args.top else sorted(counts.items())
+    if args.csv:
+        print(",".join(args.by + ["aantal"]))
+        for key, c in rows:
+            print(",".join(f'"{k}"' if "," in k else k for k in key) + f",{c}")
+    else:
+        widths = [max([len(h)] + [len(k[i]) for k, _ in rows]) for i, h in enumerate(args.by)]
+        print("  ".join(h.ljust(w) for h, w in zip(args.by, widths)) + "  aantal")
+        for key, c in rows:
+            print("  ".join(k.ljust(w) for k, w in zip(key, widths)) + f"  {c}")
+    print(f"{n} regels in {len(paths)} bestand(en), {sum(counts.values())} geteld, "
+          f"{dt:.2f} s ({n / dt / 1e6 if dt else 0:.1f} M regels/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+bench_audit.py
+
+Benchmark voor audit_log.py en audit_query.py:
+
+1. Schrijven: ``-n`` records via ``AuditLog.log`` in een strakke lus (zoals
+   een drukke Tk-thread), met rotatie op grootte. Gemeten: duur van één
+   ``log()``-aanroep (p50/p99/max), doorvoer van de schrijfthread, aantal
+   batches en rotaties, en of er records ontbreken of weggegooid zijn.
+2. Opvragen: ontgrendelingen per uur per naam over alle bestanden, met
+   controle tegen de verwachte aantallen.
+
+Gebruik:
+    python bench_audit.py
+    python bench_audit.py -n 5000000 --max-mb 64
+Exitcode 1 bij ontbrekende records, een foute telling, of log() p99 > 50 us.
+"""
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from audit_log import AuditLog, rotated_files
+from audit_query import count, iter_lines
+
+MAX_P99_US = 50.0
+NAMES = ["Jan", "Petra", "Service", "Ahmed", "Lotte", "Kees", "Sanne", "Bas"]
+EVENTS = [("unlock", 0.25), ("reject", 0.1), ("trigger", 0.4), ("relock", 0.2), ("lock", 0.05)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=2_000_000)
+    ap.add_argument("--max-mb", type=float, default=16.0, help="rotatiegrootte")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    tmp = Path(tempfile.mkdtemp())
+    path = tmp / "bench_audit.log"
+
+    # virtuele klok: n records verspreid over ~30 dagen, oplopend
+    t = [1_760_000_000.0]
+    step = 30 * 86400 / args.n
+
+    def clock():
+        return t[0]
+
+    kinds, weights = zip(*EVENTS)
+    plan = rng.choices(kinds, weights, k=args.n)
+    names = [rng.choice(NAMES) for _ in range(args.n)]
+    expect = Counter()
+
+    log = AuditLog(path, "bench", max_bytes=int(args.max_mb * 1024 * 1024), keep=1000,
+                   clock=clock).start()
+    samples = []
+    perf = time.perf_counter
+    t_start = perf()
+    for i in range(args.n):
+        t[0] += step
+        ev = plan[i]
+        if ev == "unlock":
+            name = names[i]
+            expect[(int(t[0]) // 3600, name)] += 1
+        else:
+            name = ""
+        if i % 100 == 0:
+            t0 = perf()
+            log.log(ev, name, "COM10")
+            samples.append(perf() - t0)
+        else:
+            log.log(ev, name, "COM10")
+    t_logged = perf() - t_start
+    log.close()
+    t_written = perf() - t_start
+
+    samples.sort()
+    p = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * 1e6
+    files = rotated_files(path) + [str(path)]
+    size = sum(Path(f).stat().st_size for f in files) / 1e6
+    print(f"schrijven: {args.n} records, log() p50 {p(0.5):.2f} us  p99 {p(0.99):.2f} us  "
+          f"max {samples[-1] * 1e6:.0f} us")
+    print(f"  {args.n / t_written:,.0f} records/s weggeschreven, {log.batches} batches, "
+          f"{log.rotations} rotaties, {len(files)} bestanden, {size:.0f} MB, "
+          f"lus {t_logged:.2f} s / klaar {t_written:.2f} s")
+    ok = log.written == args.n and log.dropped == 0
+    print(f"  weggeschreven {log.written}, weggegooid {log.dropped}  {'ok' if ok else 'FOUT'}")
+    ok &= p(0.99) <= MAX_P99_US
+
+    t0 = perf()
+    counts, n = count(iter_lines(files), ("hour", "name"), ("unlock",))
+    dt = perf() - t0
+    # verwachte aantallen op dezelfde manier labelen
+    got = sum(counts.values())
+    want = sum(expect.values())
+    top = counts.most_common(1)[0] if counts else None
+    good = n == args.n and got == want and len(counts) == len(expect)
+    print(f"opvragen: {n} regels in {dt:.2f} s ({n / dt / 1e6:.2f} M regels/s), "
+          f"{len(counts)} groepen uur x naam, {got} unlocks (verwacht {want})  "
+          f"{'ok' if good else 'FOUT'}")
+    if top:
+        print(f"  drukste uur: {top[0][0]} {top[0][1]} met {top[1]}")
+    ok &= good
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
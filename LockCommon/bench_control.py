@@ -0,0 +1,184 @@
+"""
+bench_control.py
+
+Latentiebenchmark voor control_socket.py.
+
+Zonder --connect start dit script zelf een ControlServer met een LockCore;
+de 'Tk-thread' is dan een werkthread die een wachtrij afhandelt (met --tk een
+echte Tk-mainloop). Daarna sturen ``--clients`` gelijktijdige clients elk
+``--requests`` verzoeken (mix van status/unlock/extend/lock, tekst of JSON)
+en wordt per client de round-trip gemeten.
+
+Gebruik:
+    python bench_control.py                        # Unix-socket (of TCP op Windows)
+    python bench_control.py --tcp --clients 64
+    python bench_control.py --connect /tmp/sacoa_lock.sock   # draaiende app
+    python bench_control.py --connect 127.0.0.1:47811
+Clients draaien in eigen processen. Een 'err' van de kern (bijv. extend
+terwijl een andere client net lockte) telt als geldig antwoord.
+Exitcode 1 bij protocolfouten of als p99 boven --max-p99 (ms) ligt.
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from control_socket import ControlServer, core_handlers
+from lock_core import LockCore, UNLOCKED
+from tk_scheduler import TkScheduler
+
+CMDS = ("status", "unlock 30", "extend 60", "status", "lock", "ping")
+
+
+def start_local(use_tcp, use_tk):
+    """Server + 'Tk-thread' in dit proces. Retourneert (adres, stopfunctie)."""
+    ready = threading.Event()
+    box = {}
+
+    def ui_thread():
+        if use_tk:
+            import tkinter as tk
+            root = tk.Tk()
+            root.withdraw()
+            post, sched = (lambda fn: root.after(0, fn)), TkScheduler(root)   # zoals in de apps
+        else:
+            work = queue.SimpleQueue()
+            post = work.put
+            from tk_scheduler import HeadlessLoop
+            loop = HeadlessLoop(clock=time.monotonic)
+            sched = TkScheduler(loop, clock=time.monotonic)
+
+        core = LockCore(sched, lambda c: None, relock_seconds=240.0, state=UNLOCKED)
+        path = None if use_tcp else os.path.join(tempfile.mkdtemp(), "bench.sock")
+        server = ControlServer(core_handlers(core, default_relock=240.0), post, path=path).start()
+        box["server"] = server
+        ready.set()
+        if use_tk:
+            box["stop"] = lambda: root.after(0, root.destroy)
+            root.mainloop()
+        else:
+            box["stop"] = lambda: work.put(None)
+            while True:
+                fn = work.get()
+                if fn is None:
+                    break
+                fn()
+                loop.run_due()
+
+    threading.Thread(target=ui_thread, daemon=True).start()
+    ready.wait()
+    server = box["server"]
+
+    def stop():
+        server.close()
+        box["stop"]()
+    return server.address, stop
+
+
+def connect(address):
+    if isinstance(address, str) and ":" not in address:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.connect(address)
+    else:
+        if isinstance(address, str):
+            host, port = address.rsplit(":", 1)
+            address = (host, int(port))
+        s = socket.create_connection(address)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return s
+
+
+def client(address, n, use_json, token, out):
+    s = connect(address)
+    f = s.makefile("rwb", buffering=0)
+    if token:
+        f.write(f"auth {token}\n".encode())
+        f.readline()
+    lat, rejected, errors = [], 0, []
+    for i in range(n):
+        cmd = CMDS[i % len(CMDS)]
+        if use_json:
+            name, *rest = cmd.split()
+            req = {"id": i, "cmd": name}
+            if rest:
+                req["seconds"] = float(rest[0])
+            line = json.dumps(req)
+        else:
+            line = cmd
+        t0 = time.perf_counter()
+        s.sendall(line.encode() + b"\n")
+        resp = f.readline()
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        try:
+            ok = json.loads(resp)["ok"] if use_json else resp.split(b" ", 1)[0].strip()
+        except (ValueError, KeyError):
+            ok = None
+        if ok in (False, b"err"):
+            rejected += 1           # bijv. 'extend' terwijl een andere client net lockte
+        elif ok not in (True, b"ok"):
+            errors.append(resp)     # geen of onleesbaar antwoord
+    s.close()
+    out.put((lat, rejected, errors))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--connect", help="pad of host:poort van een draaiende app")
+    ap.add_argument("--token", default="")
+    ap.add_argument("--tcp", action="store_true", help="lokale server via TCP i.p.v. Unix-socket")
+    ap.add_argument("--tk", action="store_true", help="lokale server met echte Tk-mainloop")
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--max-p99", type=float, default=20.0)
+    args = ap.parse_args()
+
+    stop = None
+    if args.connect:
+        address = args.connect
+    else:
+        address, stop = start_local(args.tcp or not hasattr(socket, "AF_UNIX"), args.tk)
+
+    # clients in eigen processen, zodat ze de GIL van de server niet delen
+    out = mp.Queue()
+    procs = [mp.Process(target=client, args=(address, args.requests, args.json, args.token, out))
+             for _ in range(args.clients)]
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    lat, rejected, errors = [], 0, []
+    for _ in procs:
+        l, r, e = out.get()
+        lat += l
+        rejected += r
+        errors += e
+    dt = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+    if stop:
+        stop()
+
+    lat.sort()
+    n = len(lat)
+    pct = lambda q: lat[min(n - 1, int(q * n))]
+    print(f"{args.clients} clients x {args.requests} verzoeken via {address} "
+          f"({'JSON' if args.json else 'tekst'})")
+    print(f"  {n/dt:,.0f} verzoeken/s  p50 {pct(0.5):.3f} ms  p95 {pct(0.95):.3f} ms  "
+          f"p99 {pct(0.99):.3f} ms  max {lat[-1]:.3f} ms")
+    print(f"  geweigerd door de kern {rejected}, protocolfouten {len(errors)}")
+    failed = errors or pct(0.99) > args.max_p99 or n != args.clients * args.requests
+    if errors:
+        print(f"  eerste fout: {errors[0]!r}")
+    print("FOUT" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+bench_fleet.py
+
+Test en meting voor fleet_sync.py tegen de lokale stand-in uit
+fleet_server.py (HTTP op 127.0.0.1):
+
+1. ``-k`` kiosks halen de volledige bundel op (``--pins`` codes).
+2. Niets veranderd: elke poll moet een 304 zonder body zijn; gemeten worden
+   de duur per poll (p50/p99) en de bytes.
+3. Eén code en één instelling gewijzigd: delta's, met de grootte naast die
+   van de volledige bundel. Pins-bestand en ``on_settings`` moeten kloppen;
+   een kiosk die drie versies achterloopt krijgt ook een delta.
+4. Geweigerd: foute sleutel, oudere versie, en een delta die niet past
+   (moet terugvallen op de volledige bundel).
+5. Offline start: server weg, nieuwe agent start uit de cache.
+
+Gebruik:
+    python bench_fleet.py
+    python bench_fleet.py -k 500 --pins 20000
+Exitcode 1 als een van de controles faalt.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fleet_server import FleetStore, serve
+from fleet_sync import FleetSync
+
+KEY = b"bench-fleet-sleutel"
+
+
+def pins_text(n, changed=None):
+    lines = ["# vloot-pins\n"]
+    for i in range(n):
+        pin = changed if changed and i == n // 2 else f"{100000 + i * 7919 % 900000:06d}"
+        lines.append(f"{pin}: Medewerker {i}\n")
+    return "".join(lines)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-k", "--kiosks", type=int, default=200)
+    ap.add_argument("--pins", type=int, default=5000)
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    store = FleetStore(KEY)
+    settings = {"service_pin": "1423", "auto_relock_seconds": 240, "com_port": "COM10"}
+    store.publish({"pins": pins_text(args.pins)}, settings)
+    server = serve(store)
+    url = f"http://127.0.0.1:{server.server_address[1]}/bundle"
+    ok = True
+
+    def check(label, good):
+        nonlocal ok
+        ok &= bool(good)
+        print(f"  {label:58} {'ok' if good else 'FOUT'}")
+
+    def kiosk(i, key=KEY, url=url):
+        d = tmp / f"kiosk{i}"
+        d.mkdir(exist_ok=True)
+        seen = []
+        agent = FleetSync(url, key, d / "fleet.cache", {"pins": d / "pins.txt"},
+                          on_settings=lambda s, c: seen.append(c))
+        agent.seen = seen
+        return agent
+
+    def round_(agents):
+        times, results = [], []
+        for a in agents:
+            t0 = time.perf_counter()
+            results.append(a.poll_once())
+            times.append(time.perf_counter() - t0)
+        times.sort()
+        return results, times[len(times) // 2] * 1000, times[int(len(times) * 0.99)] * 1000
+
+    kiosks = [kiosk(i) for i in range(args.kiosks)]
+    print(f"{args.kiosks} kiosks, {args.pins} pins")
+
+    res, p50, p99 = round_(kiosks)
+    full_bytes = kiosks[0].bytes_in
+    print(f"1. volledig: {full_bytes} bytes per kiosk (gzip), p50 {p50:.2f} ms p99 {p99:.2f} ms")
+    check("alle kiosks volledige bundel", res.count("full") == args.kiosks)
+    check("pins-bestand geschreven",
+          (tmp / "kiosk0" / "pins.txt").read_text(encoding="utf-8") == pins_text(args.pins))
+
+    before = store.bytes_out
+    res, p50, p99 = round_(kiosks)
+    print(f"2. ongewijzigd: p50 {p50:.2f} ms p99 {p99:.2f} ms, "
+          f"{store.bytes_out - before} bytes body voor {args.kiosks} polls")
+    check("alle polls 304 zonder body", res.count("304") == args.kiosks and store.bytes_out == before)
+
+    laggard = kiosks[-1]
+    for n in range(3):
+        store.publish({"pins": pins_text(args.pins, changed=f"99{n}999")},
+                      dict(settings, auto_relock_seconds=300 + n))
+    before = [a.bytes_in for a in kiosks]
+    res, p50, p99 = round_(kiosks[:-1])
+    delta_bytes = kiosks[0].bytes_in - before[0]
+    print(f"3. gewijzigd: delta {delta_bytes} bytes tegen {full_bytes} volledig "
+          f"({full_bytes / max(1, delta_bytes):.0f}x kleiner), p50 {p50:.2f} ms")
+    want = pins_text(args.pins, changed="992999")
+    check("alle kiosks een delta", res.count("delta") == args.kiosks - 1)
+    check("pins-bestand na delta gelijk aan de server",
+          (tmp / "kiosk1" / "pins.txt").read_text(encoding="utf-8") == want)
+    check("on_settings alleen met de gewijzigde instelling",
+          kiosks[1].seen[-1] == {"auto_relock_seconds": 302})
+    check("kiosk die 3 versies achterloopt krijgt ook een delta", laggard.poll_once() == "delta")
+
+    print("4. weigeren")
+    bad = kiosk("bad", key=b"verkeerde sleutel")
+    check("foute sleutel -> rejected, geen pins-bestand",
+          bad.poll_once() == "rejected" and not (tmp / "kioskbad" / "pins.txt").exists())
+
+    old_store = FleetStore(KEY, clock=lambda: 1.0)
+    old_store.publish({"pins": "0000: Oud\n"}, {})
+    old_server = serve(old_store)
+    victim = kiosks[2]
+    victim.url = f"http://127.0.0.1:{old_server.server_address[1]}/bundle"
+    check("oudere versie -> rejected, pins blijven staan",
+          victim.poll_once() == "rejected"
+          and (tmp / "kiosk2" / "pins.txt").read_text(encoding="utf-8") == want)
+    victim.url = url
+    old_server.shutdown()
+
+    store.publish({"pins": want}, dict(settings, auto_relock_seconds=400))
+    drifted = kiosks[3]
+    drifted.bundle = dict(drifted.bundle, settings={"lokaal": "aangepast"})
+    fulls = drifted.fulls
+    check("delta past niet -> meteen volledig opgehaald",
+          drifted.poll_once() == "full" and drifted.fulls == fulls + 1
+          and drifted.bundle["settings"]["auto_relock_seconds"] == 400)
+
+    print("5. offline start")
+    server.shutdown()
+    server.server_close()
+    (tmp / "kiosk4" / "pins.txt").unlink()
+    cold = kiosk(4)
+    check("cache geladen, pins-bestand teruggezet",
+          cold.load_cache() and (tmp / "kiosk4" / "pins.txt").read_text(encoding="utf-8") == want)
+    check("instellingen uit de cache toegepast", cold.seen and cold.seen[0]["auto_relock_seconds"] == 302)
+    check("server onbereikbaar -> error, bundel blijft", cold.poll_once() == "error" and cold.version > 0)
+    cache = tmp / "kiosk5" / "fleet.cache"
+    cache.write_text(cache.read_text(encoding="utf-8").replace("302", "999"), encoding="utf-8")
+    check("gewijzigde cache wordt geweigerd", not kiosk(5).load_cache())
+
+    print(f"server: {store.stats()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
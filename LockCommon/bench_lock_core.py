@@ -0,0 +1,149 @@
+"""
+bench_lock_core.py
+
+Fuzz- en doorvoerdriver voor lock_core.py, zonder Tk.
+
+Stuurt miljoenen willekeurige events (toetsen, keypadknoppen, submit,
+seriële triggers, handmatig locken en het verstrijken van tijd) naar een
+LockCore op een HeadlessLoop met virtuele klok. Na elk event worden de
+invarianten van de kern gecontroleerd en wordt een eenvoudig referentiemodel
+bijgehouden (verwachte toestand, aantal unlocks, relock-deadline).
+
+Gebruik:
+    python bench_lock_core.py                   # 2M events, profiel 'sacoa'
+    python bench_lock_core.py -n 5000000 --profile displaylock --seed 7
+Exitcode 1 bij een afwijking; de seed en het eventnummer worden gemeld.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from lock_core import (LockCore, LOCKED, UNLOCKED, RELOCK_PENDING,
+                       KEY_BACKSPACE, KEY_CLEAR, single_pin_verifier)
+from tk_scheduler import TkScheduler, HeadlessLoop
+
+PROFILES = {
+    # naam: (geldige codes, toegestane tekens, max_len, relock_seconds, start-toestand)
+    "sacoa":       (["1423"], str.isdigit, 32, 240.0, UNLOCKED),
+    "displaylock": (["1423", "3504", "A1b2"], str.isalnum, 32, None, UNLOCKED),
+}
+EVENTS = ("digit", "char", "press", "backspace", "clear", "submit_good", "submit",
+          "trigger", "lock", "tick", "jump")
+WEIGHTS = (30, 8, 10, 4, 2, 3, 6, 3, 2, 20, 2)
+
+
+def make_core(profile):
+    codes, allowed, max_len, relock, state = PROFILES[profile]
+    loop = HeadlessLoop()
+    sched = TkScheduler(loop, clock=loop.clock)
+    if len(codes) == 1:
+        verify = single_pin_verifier(codes[0])
+    else:
+        valid = set(codes)
+        verify = lambda c: True if c in valid else None
+    core = LockCore(sched, verify, max_len=max_len, allowed=allowed,
+                    relock_seconds=relock, state=state)
+    return core, loop, codes
+
+
+def run(n, profile, seed):
+    rng = random.Random(seed)
+    core, loop, codes = make_core(profile)
+    relock = core.relock_seconds
+    transitions = []
+    core.on_state = lambda st, why: transitions.append(st)
+
+    # referentiemodel
+    model_state = core.state
+    model_buf = ""
+    model_unlocks = 0
+    model_deadline = None
+
+    ev_list = rng.choices(EVENTS, WEIGHTS, k=n)
+    t0 = time.perf_counter()
+    for i, ev in enumerate(ev_list):
+        if ev == "digit":
+            ch = str(rng.randrange(10))
+            core.press(ch)
+            if len(model_buf) < core.max_len:
+                model_buf += ch
+        elif ev == "char":
+            ch = rng.choice("aZ9 !é\t")
+            core.type_char(ch)
+            if core.allowed(ch) and len(model_buf) < core.max_len:
+                model_buf += ch
+        elif ev == "press":
+            key = rng.choice((KEY_BACKSPACE, KEY_CLEAR))
+            core.press(key)
+            model_buf = "" if key == KEY_CLEAR else model_buf[:-1]
+        elif ev == "backspace":
+            core.backspace()
+            model_buf = model_buf[:-1]
+        elif ev == "clear":
+            core.clear()
+            model_buf = ""
+        elif ev in ("submit", "submit_good"):
+            if ev == "submit_good":
+                core.clear()
+                for ch in rng.choice(codes):
+                    core.type_char(ch)
+                model_buf = core.entered
+            ok = core.submit() is not None
+            expect = model_buf in codes
+            if ok != expect:
+                return False, i, f"submit {model_buf!r}: kern {ok}, model {expect}"
+            model_buf = ""
+            if ok:
+                model_unlocks += 1
+                model_state = UNLOCKED if relock is None else RELOCK_PENDING
+                model_deadline = None if relock is None else loop.clock() + relock
+        elif ev == "trigger":
+            core.trigger()
+            model_unlocks += 1
+            model_state = UNLOCKED if relock is None else RELOCK_PENDING
+            model_deadline = None if relock is None else loop.clock() + relock
+        elif ev == "lock":
+            core.lock()
+            model_buf = ""
+            model_state = LOCKED
+            model_deadline = None
+        elif ev in ("tick", "jump"):
+            loop.advance(rng.uniform(0, 2.0) if ev == "tick" else rng.uniform(100, 400))
+            if model_deadline is not None and loop.clock() >= model_deadline:
+                model_state = LOCKED
+                model_deadline = None
+                model_buf = ""
+
+        try:
+            core.check_invariants()
+        except AssertionError as e:
+            return False, i, f"invariant: {e}"
+        if core.state != model_state or core.entered != model_buf or core.unlocks != model_unlocks:
+            return False, i, (f"na {ev}: kern ({core.state}, {core.entered!r}, {core.unlocks}) "
+                              f"!= model ({model_state}, {model_buf!r}, {model_unlocks})")
+    dt = time.perf_counter() - t0
+    return True, n, (dt, core, len(transitions), loop.clock())
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", "--events", type=int, default=2_000_000)
+    ap.add_argument("--profile", choices=list(PROFILES), default="sacoa")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    ok, i, info = run(args.events, args.profile, args.seed)
+    if not ok:
+        print(f"FOUT bij event {i} (seed {args.seed}): {info}")
+        sys.exit(1)
+    dt, core, trans, vtime = info
+    print(f"{args.events:,} events in {dt:.2f} s = {args.events/dt:,.0f} events/s "
+          f"(profiel {args.profile}, seed {args.seed})")
+    print(f"unlocks {core.unlocks}, afgewezen {core.rejects}, relocks {core.relocks}, "
+          f"toestandswissels {trans}, virtuele tijd {vtime/3600:.1f} h -> OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+bench_scheduler.py
+
+Stresstest voor TkScheduler: tienduizenden herplanningen (zoals bij veel
+kaartscans achter elkaar) en controle dat het aantal threads en het geheugen
+vlak blijven.
+
+Draait standaard headless (HeadlessLoop, virtuele klok). Met ``--tk`` wordt
+een echte Tk-lus gebruikt (display nodig).
+
+Gebruik:
+    python bench_scheduler.py                 # 50k herplanningen, headless
+    python bench_scheduler.py -n 200000 --tk
+Exitcode 1 als threads of geheugen groeien.
+"""
+
+import argparse
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+
+from tk_scheduler import TkScheduler, HeadlessLoop
+
+RELOCK = 240.0
+KEEP_ALIVE = 1.0
+MAX_GROWTH_KB = 256     # toegestane tracemalloc-groei tussen eerste en laatste meting
+
+
+def simulate(sched, loop_step, n, samples):
+    """
+    Bootst de Sacoa-app na: elke 'scan' annuleert de relock-timer en plant een
+    nieuwe; een keep-alive tikt ondertussen door.
+    """
+    state = {"relocks": 0, "ticks": 0, "handle": None}
+
+    def relock():
+        state["relocks"] += 1
+
+    def tick():
+        state["ticks"] += 1
+
+    sched.call_every(KEEP_ALIVE, tick)
+    stats = []
+    t0 = time.perf_counter()
+    for i in range(n):
+        if state["handle"]:
+            state["handle"].cancel()
+        state["handle"] = sched.call_later(RELOCK, relock)
+        loop_step()
+        if i % max(1, n // samples) == 0:
+            gc.collect()
+            stats.append((i, threading.active_count(), tracemalloc.get_traced_memory()[0],
+                          len(sched._heap)))
+    dt = time.perf_counter() - t0
+    return dt, stats, state
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", "--reschedules", type=int, default=50000)
+    ap.add_argument("--samples", type=int, default=10)
+    ap.add_argument("--tk", action="store_true", help="echte Tk-lus i.p.v. headless")
+    args = ap.parse_args()
+
+    tracemalloc.start()
+    if args.tk:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        sched = TkScheduler(root)
+        step = root.update
+    else:
+        loop = HeadlessLoop()
+        sched = TkScheduler(loop, clock=loop.clock)
+        step = lambda: loop.advance(0.005)   # 5 ms virtuele tijd per scan
+
+    dt, stats, state = simulate(sched, step, args.reschedules, args.samples)
+
+    print(f"{args.reschedules} herplanningen in {dt*1000:.0f} ms "
+          f"({args.reschedules/dt:,.0f}/s), keep-alive ticks {state['ticks']}")
+    print(f"{'#':>8} {'threads':>8} {'traced KB':>10} {'heap':>6}")
+    for i, th, mem, heap in stats:
+        print(f"{i:8} {th:8} {mem/1024:10.1f} {heap:6}")
+
+    threads_flat = len({s[1] for s in stats}) == 1
+    # eerste meting overslaan: daar worden nog eenmalige structuren opgebouwd
+    growth = (stats[-1][2] - stats[1][2]) / 1024 if len(stats) > 2 else 0
+    mem_flat = growth < MAX_GROWTH_KB
+    print(f"threads vlak: {threads_flat}, geheugengroei {growth:.1f} KB -> "
+          f"{'OK' if threads_flat and mem_flat else 'FOUT'}")
+    sys.exit(0 if threads_flat and mem_flat else 1)
+
+
+if __name__ == "__main__":
+    main()
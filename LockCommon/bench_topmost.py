@@ -0,0 +1,257 @@
+"""
+bench_topmost.py
+
+WM-aanroepen per minuut en hersteltijd van de lock-knop, oud (elke
+KEEP_ALIVE_MS alles opnieuw) tegen nieuw (topmost_guard.py: events +
+goedkope controle). Draait headless: een nagebootst bureaublad met z-volgorde,
+andere vensters die de knop afdekken, verbergen of verschuiven, en een
+HeadlessLoop met virtuele klok.
+
+Drie varianten:
+- oud:              TopmostGuard(poll=True), alleen <Unmap> (zoals vroeger)
+- nieuw (X11):      met <Visibility>-events
+- nieuw (Windows):  zonder <Visibility>-events; afdekken wordt pas bij de
+                    periodieke controle gezien
+
+Per variant: 5 minuten rustig, daarna 5 minuten met om de ~20 s een
+verstoring (afdekken / verbergen / verschuiven). Daarnaast: focus
+terughalen op de overlay na <FocusOut>, en een gesloten lock-knop (Alt+F4)
+die bij de volgende controle opnieuw wordt opgebouwd.
+
+Gebruik:
+    python bench_topmost.py
+    python bench_topmost.py --interval 0.5
+Exitcode 1 als de nieuwe variant in rust WM-aanroepen doet of een
+verstoring niet (op tijd) herstelt.
+"""
+
+import argparse
+import random
+import sys
+from types import SimpleNamespace
+
+from tk_scheduler import HeadlessLoop, TkScheduler
+from topmost_guard import SETTLE, TopmostGuard
+
+SCREEN = (1920, 1080)
+BUTTON = (150, 45, 1920 - 150 - 40, 1080 - 45 - 40)
+STEP = 0.01
+
+
+class Desktop:
+    def __init__(self, visibility_events):
+        self.visibility_events = visibility_events
+        self.stack = []             # onder -> boven
+        self.focus = None
+
+    def top_at(self, x, y):
+        for win in reversed(self.stack):
+            if win.mapped and win.contains(x, y):
+                return win
+        return None
+
+    def raise_(self, win):
+        self.stack.remove(win)
+        self.stack.append(win)
+
+
+class FakeWin:
+    """Net genoeg van een Tk-Toplevel voor de TopmostGuard."""
+
+    def __init__(self, desktop, name, geometry, ours=True):
+        self.desktop = desktop
+        self.name = name
+        self.w, self.h, self.x, self.y = geometry
+        self.ours = ours
+        self.mapped = True
+        self.exists = True
+        self.handlers = {}
+        desktop.stack.append(self)
+
+    def __str__(self):
+        return "." + self.name
+
+    def contains(self, x, y):
+        return self.x <= x < self.x + self.w and self.y <= y < self.y + self.h
+
+    def center(self):
+        return self.x + self.w // 2, self.y + self.h // 2
+
+    # events
+    def bind(self, seq, fn, add=None):
+        self.handlers.setdefault(seq, []).append(fn)
+
+    def emit(self, kind, **kw):
+        ev = SimpleNamespace(type=kind, widget=self, state=kw.get("state"), width=self.w, height=self.h)
+        for fn in self.handlers.get(f"<{kind}>", ()):
+            fn(ev)
+
+    def destroy(self):
+        self.exists = self.mapped = False
+        self.desktop.stack.remove(self)
+
+    # winfo-vragen
+    def winfo_exists(self):
+        return self.exists
+
+    def winfo_ismapped(self):
+        return self.mapped
+
+    def winfo_width(self):
+        return self.w
+
+    def winfo_height(self):
+        return self.h
+
+    def winfo_rootx(self):
+        return self.x
+
+    def winfo_rooty(self):
+        return self.y
+
+    def winfo_containing(self, x, y):
+        hit = self.desktop.top_at(x, y)
+        return hit if hit is not None and hit.ours else None
+
+    def focus_get(self):
+        f = self.desktop.focus
+        return f if f is not None and f.ours else None
+
+    # WM-aanroepen
+    def deiconify(self):
+        self.mapped = True
+
+    def geometry(self, text):
+        size, x, y = text.split("+")
+        w, h = size.split("x")
+        self.w, self.h, self.x, self.y = int(w), int(h), int(x), int(y)
+
+    def lift(self):
+        self.desktop.raise_(self)
+
+    def attributes(self, *args):
+        pass
+
+    def focus_force(self):
+        self.desktop.focus = self
+
+
+def restored(win, geometry):
+    return (win.mapped and (win.w, win.h, win.x, win.y) == geometry
+            and win.desktop.top_at(*win.center()) is win)
+
+
+def run(label, poll, visibility_events, interval, minutes=5.0):
+    loop = HeadlessLoop()
+    sched = TkScheduler(loop, clock=loop.clock)
+    desk = Desktop(visibility_events)
+    btn = FakeWin(desk, "lockbtn", BUTTON)
+    guard = TopmostGuard(sched, interval, poll=poll, clock=loop.clock)
+    guard.add(btn, BUTTON)
+    guard.start()
+
+    loop.advance(minutes * 60)
+    quiet = guard.wm_calls / minutes
+
+    calls0 = guard.wm_calls
+    latencies, failed = [], 0
+    other = FakeWin(desk, "ander", (800, 200, 1920 - 700, 1080 - 180), ours=False)
+    kinds = ("afdekken", "verbergen", "verschuiven")
+    rng = random.Random(1)          # verstoringen niet precies op een controlemoment
+    n = int(minutes * 60 / 20)
+    for i in range(n):
+        kind = kinds[i % 3]
+        if kind == "afdekken":
+            desk.raise_(other)
+            if desk.visibility_events:
+                btn.emit("Visibility", state="VisibilityFullyObscured")
+        elif kind == "verbergen":
+            btn.mapped = False
+            btn.emit("Unmap")
+        else:
+            btn.x -= 300
+            btn.emit("Configure")
+        t = 0.0
+        while not restored(btn, BUTTON) and t < 5.0:
+            loop.advance(STEP)
+            t += STEP
+        if restored(btn, BUTTON):
+            latencies.append(t)
+        else:
+            failed += 1
+        loop.advance(20.0 - t + rng.uniform(0, interval))
+    busy = (guard.wm_calls - calls0) / minutes
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    worst = latencies[-1] * 1000 if latencies else float("nan")
+    print(f"{label:18} rust {quiet:6.1f} WM/min   verstoord {busy:6.1f} WM/min   "
+          f"herstel p50 {p50:5.0f} ms  max {worst:5.0f} ms  niet hersteld {failed}/{n}")
+    return quiet, worst, failed
+
+
+def focus_check(interval):
+    loop = HeadlessLoop()
+    sched = TkScheduler(loop, clock=loop.clock)
+    desk = Desktop(True)
+    overlay = FakeWin(desk, "overlay", (SCREEN[0], SCREEN[1], 0, 0))
+    guard = TopmostGuard(sched, interval, clock=loop.clock)
+    target = guard.add(overlay, (SCREEN[0], SCREEN[1], 0, 0), focus=True)
+    guard.enforce(target)
+    loop.advance(5.0)
+    desk.focus = FakeWin(desk, "popup", (300, 200, 800, 400), ours=False)
+    overlay.emit("FocusOut")
+    loop.advance(SETTLE + STEP)
+    return desk.focus is overlay and desk.top_at(*overlay.center()) is overlay
+
+
+def rebuild_check(interval):
+    """Lock-knop vernietigd: binnen één controle een nieuw venster op dezelfde plek."""
+    loop = HeadlessLoop()
+    sched = TkScheduler(loop, clock=loop.clock)
+    desk = Desktop(False)
+    guard = TopmostGuard(sched, interval, clock=loop.clock)
+    app = SimpleNamespace(win=None, target=None)
+
+    def build():
+        if app.target is not None:
+            guard.remove(app.target)
+        app.win = FakeWin(desk, "lockbtn", BUTTON)
+        app.target = guard.add(app.win, BUTTON, on_lost=build)
+    build()
+    guard.start()
+    loop.advance(5.0)
+    old = app.win
+    old.destroy()
+    loop.advance(interval + STEP)
+    return app.win is not old and restored(app.win, BUTTON) and len(guard._targets) == 1
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--interval", type=float, default=1.0, help="KEEP_ALIVE_MS / 1000")
+    args = ap.parse_args()
+
+    old = run("oud", True, False, args.interval)
+    x11 = run("nieuw (X11)", False, True, args.interval)
+    win = run("nieuw (Windows)", False, False, args.interval)
+    ok = True
+
+    def check(label, good):
+        nonlocal ok
+        ok &= bool(good)
+        print(f"  {label:56} {'ok' if good else 'FOUT'}")
+
+    check("nieuw: geen WM-aanroepen in rust", x11[0] == 0 and win[0] == 0)
+    check(f"oud: ~{4 * 60 / args.interval:.0f} WM/min in rust (ter vergelijking)", old[0] > 0)
+    check("nieuw: elke verstoring hersteld", x11[2] == 0 and win[2] == 0)
+    check(f"nieuw (X11): herstel binnen {SETTLE * 1000 + 20:.0f} ms", x11[1] <= SETTLE * 1000 + 20)
+    check(f"nieuw (Windows): herstel binnen één controle ({args.interval * 1000:.0f} ms)",
+          win[1] <= args.interval * 1000 + 20)
+    check("focus terug op de overlay na <FocusOut>", focus_check(args.interval))
+    check("gesloten lock-knop binnen één controle herbouwd", rebuild_check(args.interval))
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+control_socket.py
+
+Lokaal besturingskanaal voor de lock-apps (kassa, kaartsysteem, scripts).
+
+- Linux/macOS: Unix domain socket (rechten 0600, alleen de eigen gebruiker)
+- Windows of als er geen pad is opgegeven: TCP op 127.0.0.1
+
+Protocol: één verzoek per regel, één antwoord per regel. Twee vormen:
+
+    tekst:  lock | unlock [sec] | extend [sec] | status | ping   (sec 0 = standaardtijd)
+            antwoord: "ok key=waarde ..." of "err <melding>"
+    JSON:   {"id": 7, "cmd": "unlock", "seconds": 30}
+            antwoord: {"id": 7, "ok": true, ...} of {"id": 7, "ok": false, "error": "..."}
+
+Met ``token`` moet de client eerst ``auth <token>`` (of {"cmd": "auth",
+"token": ...}) sturen; daarvoor wordt alleen ``ping`` beantwoord.
+
+Eén selector-thread bedient alle clients. Commando's draaien via ``post``
+(bij Tk: ``lambda fn: root.after(0, fn)``) op de Tk-thread; het resultaat komt
+via een wachtrij terug en de selector wordt gewekt met een socketpair. Een
+trage Tk-thread blokkeert dus nooit het accepteren of lezen van andere clients.
+``ping`` wordt direct in de socket-thread beantwoord (meet alleen de IPC).
+"""
+
+import hmac
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+
+MAX_LINE = 4096
+MAX_CLIENTS = 256
+
+
+class CommandError(Exception):
+    """Fout in een commando; de tekst gaat als 'err ...' naar de client."""
+
+
+def _parse_text(line):
+    parts = line.split()
+    if not parts:
+        raise CommandError("leeg commando")
+    req = {"cmd": parts[0].lower()}
+    if len(parts) > 1:
+        if req["cmd"] == "auth":
+            req["token"] = parts[1]
+        else:
+            try:
+                req["seconds"] = float(parts[1])
+            except ValueError:
+                raise CommandError(f"ongeldig aantal seconden: {parts[1]!r}")
+    return req
+
+
+def _format_text(ok, result):
+    if not ok:
+        return f"err {result}"
+    return " ".join(["ok"] + [f"{k}={v}" for k, v in result.items()])
+
+
+class _Client:
+    __slots__ = ("sock", "inbuf", "outbuf", "authed", "closing")
+
+    def __init__(self, sock, authed):
+        self.sock = sock
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.authed = authed
+        self.closing = False
+
+
+class ControlServer:
+    def __init__(self, handlers, post, path=None, port=0, host="127.0.0.1", token=None):
+        """
+        ``handlers``: {naam: fn(verzoek-dict) -> dict}; draait op de Tk-thread via ``post``.
+        ``path``: Unix-socket (indien ondersteund), anders TCP op ``host``:``port``.
+        """
+        self.handlers = dict(handlers)
+        self.post = post
+        self.token = token
+        self.path = path if (path and hasattr(socket, "AF_UNIX")) else None
+        self.port = port
+        self.host = host
+        self.address = None
+        self.requests = 0
+        self.errors = 0
+
+        self._sel = selectors.DefaultSelector()
+        self._clients = {}
+        self._done = deque()            # (client, antwoordregel) vanuit de Tk-thread
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._listener = None
+        self._thread = None
+        self._stop = False
+
+    # ----- levenscyclus -----
+    def start(self):
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            lsock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            old = os.umask(0o177)
+            try:
+                lsock.bind(self.path)
+            finally:
+                os.umask(old)
+            self.address = self.path
+        else:
+            lsock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            lsock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            lsock.bind((self.host, self.port))
+            self.address = lsock.getsockname()
+        lsock.listen(64)
+        lsock.setblocking(False)
+        self._listener = lsock
+        self._sel.register(lsock, selectors.EVENT_READ, "accept")
+        self._sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._thread = threading.Thread(target=self._loop, name="ControlServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop = True
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for c in list(self._clients.values()):
+            self._drop(c)
+        for s in (self._listener, self._wake_r, self._wake_w):
+            if s:
+                s.close()
+        self._sel.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass        # buffer vol = er staat al een wekker klaar
+
+    # ----- socket-thread -----
+    def _loop(self):
+        while not self._stop:
+            for key, mask in self._sel.select(timeout=1.0):
+                if key.data == "accept":
+                    self._accept()
+                elif key.data == "wake":
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    c = key.data
+                    if mask & selectors.EVENT_READ:
+                        self._read(c)
+                    if mask & selectors.EVENT_WRITE and c.sock.fileno() >= 0:
+                        self._flush(c)
+            while self._done:
+                c, line = self._done.popleft()
+                self._send(c, line)
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self._listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            if len(self._clients) >= MAX_CLIENTS:
+                sock.close()
+                continue
+            sock.setblocking(False)
+            if sock.family == socket.AF_INET:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            c = _Client(sock, authed=self.token is None)
+            self._clients[sock.fileno()] = c
+            self._sel.register(sock, selectors.EVENT_READ, c)
+
+    def _read(self, c):
+        try:
+            data = c.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(c)
+            return
+        c.inbuf += data
+        while True:
+            nl = c.inbuf.find(b"\n")
+            if nl < 0:
+                if len(c.inbuf) > MAX_LINE:
+                    c.inbuf.clear()
+                    self._send(c, "err regel te lang")
+                return
+            raw = bytes(c.inbuf[:nl]).strip()
+            del c.inbuf[:nl + 1]
+            if nl > MAX_LINE:
+                self._send(c, "err regel te lang")
+            elif raw:
+                self._handle_line(c, raw.decode("utf-8", "replace"))
+
+    def _handle_line(self, c, line):
+        self.requests += 1
+        as_json = line.startswith("{")
+        rid = None
+        try:
+            if as_json:
+                try:
+                    req = json.loads(line)
+                except ValueError:
+                    raise CommandError("ongeldige JSON")
+                if not isinstance(req, dict) or not isinstance(req.get("cmd"), str):
+                    raise CommandError("'cmd' ontbreekt")
+                rid = req.get("id")
+            else:
+                req = _parse_text(line)
+            cmd = req["cmd"]
+            if cmd == "ping":
+                self._reply(c, as_json, rid, True, {"pong": round(time.time(), 6)})
+                return
+            if cmd == "auth":
+                c.authed = self.token is None or hmac.compare_digest(
+                    str(req.get("token", "")).encode(), self.token.encode())
+                if not c.authed:
+                    raise CommandError("onjuist token")
+                self._reply(c, as_json, rid, True, {})
+                return
+            if not c.authed:
+                raise CommandError("eerst auth")
+            fn = self.handlers.get(cmd)
+            if fn is None:
+                raise CommandError(f"onbekend commando: {cmd[:40]}")
+        except CommandError as e:
+            self.errors += 1
+            self._reply(c, as_json, rid, False, str(e))
+            return
+        self.post(lambda: self._run(c, fn, req, as_json, rid))
+
+    def _run(self, c, fn, req, as_json, rid):
+        """Draait op de Tk-thread."""
+        try:
+            ok, result = True, fn(req) or {}
+        except CommandError as e:
+            ok, result = False, str(e)
+        except Exception as e:
+            ok, result = False, f"{type(e).__name__}: {e}"
+        if not ok:
+            self.errors += 1
+        self._done.append((c, self._encode(as_json, rid, ok, result)))
+        self._wake()
+
+    @staticmethod
+    def _encode(as_json, rid, ok, result):
+        if not as_json:
+            return _format_text(ok, result)
+        msg = {"id": rid, "ok": ok}
+        if ok:
+            msg.update(result)
+        else:
+            msg["error"] = result
+        return json.dumps(msg, separators=(",", ":"))
+
+    def _reply(self, c, as_json, rid, ok, result):
+        self._send(c, self._encode(as_json, rid, ok, result))
+
+    def _send(self, c, line):
+        if c.closing:
+            return
+        c.outbuf += line.encode("utf-8") + b"\n"
+        self._flush(c)
+
+    def _flush(self, c):
+        try:
+            n = c.sock.send(c.outbuf)
+            del c.outbuf[:n]
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self._drop(c)
+            return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if c.outbuf else 0)
+        self._sel.modify(c.sock, events, c)
+
+    def _drop(self, c):
+        if c.closing:
+            return
+        c.closing = True
+        self._clients.pop(c.sock.fileno(), None)
+        try:
+            self._sel.unregister(c.sock)
+        except (KeyError, ValueError):
+            pass
+        c.sock.close()
+
+
+def core_handlers(core, default_relock=None, lock=None, unlock=None, extra_status=None):
+    """
+    Standaardcommando's op een LockCore.
+    ``lock``/``unlock``: optionele app-functies i.p.v. core.lock/core.unlock
+    (bijv. DisplayLockApp.lock_now).
+    ``extra_status()``: extra velden voor ``status`` (bijv. de lezer-status).
+    """
+    def _seconds(req, default):
+        s = req.get("seconds", default)
+        if s is not None and (not isinstance(s, (int, float)) or s < 0):
+            raise CommandError("seconds moet >= 0 zijn")
+        # 0 = standaardtijd, net als bij LockCore.trigger (anders meteen weer relock)
+        return s or default
+
+    def do_lock(req):
+        (lock or (lambda: core.lock("ipc")))()
+        return status(req)
+
+    def do_unlock(req):
+        secs = _seconds(req, default_relock)
+        if unlock:
+            unlock(secs)
+        else:
+            core.unlock("ipc", relock_after=secs)
+        return status(req)
+
+    def do_extend(req):
+        if core.state == "locked":
+            raise CommandError("vergrendeld; gebruik unlock")
+        core.unlock("ipc-extend", relock_after=_seconds(req, default_relock))
+        return status(req)
+
+    def status(req):
+        rem = core.relock_remaining
+        result = {
+            "state": core.state,
+            "relock_in": None if rem is None else round(rem, 3),
+            "unlocks": core.unlocks,
+            "rejects": core.rejects,
+            "relocks": core.relocks,
+        }
+        if extra_status:
+            result.update(extra_status())
+        return result
+
+    return {"lock": do_lock, "unlock": do_unlock, "extend": do_extend, "status": status}
+
+
+def start_control(enabled, handlers, post, path=None, port=0, token=None):
+    """Start de server volgens de app-instellingen; None als uit of mislukt."""
+    if not enabled:
+        return None
+    try:
+        return ControlServer(handlers, post, path=path, port=port, token=token).start()
+    except OSError:
+        return None
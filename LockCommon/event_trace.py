@@ -0,0 +1,245 @@
+"""
+event_trace.py
+
+Opnemen en afspelen van wat een lock-app binnenkrijgt, om problemen op
+locatie (dubbele ontgrendeling, gemiste relock) thuis na te spelen.
+
+Aanzetten met ``LOCK_TRACE=1`` (of ``--trace``); ``LOCK_TRACE=<pad>`` kiest
+zelf het bestand. Staat het uit, dan wordt er niets gepatcht.
+
+Trace-bestand (tekst, optioneel gzip bij ``.gz``), één event per regel:
+
+    #lktrace  1  {meta: instellingen van de app, begintoestand}
+    <ms>  P  <nr> <poort>          poortnummer voor S-regels
+    <ms>  S  <nr> <hex>            ruwe seriële bytes zoals gelezen
+    <ms>  K  <op> [args]           invoer naar de kern: press, type, backspace,
+                                   clear, submit ok|no, lock <reden>,
+                                   unlock <reden> <sec|->
+    <ms>  C  <uid> <sessie|->      beslissing van de kaartenlijst
+    <ms>  T  relock                relock-timer afgegaan
+    <ms>  X  <toestand> <reden> <unlocks>   waargenomen toestandswissel
+    <ms>  E  <toestand> <unlocks> <relocks> <rejects>   eindstand
+
+Ingetypte codes komen er niet in: cijfers en letters worden ``0``, alleen
+de uitkomst van ``submit`` wordt bewaard. Tijden zijn ms sinds de start
+(monotone klok).
+
+Afspelen en vergelijken: zie replay.py.
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+
+from lock_core import KEY_BACKSPACE, KEY_CLEAR
+
+ENV_VAR = "LOCK_TRACE"
+MAGIC = "#lktrace"
+VERSION = 1
+FLUSH_LINES = 4096          # buffer groter dan dit: direct wegschrijven
+MASK_CHAR = "0"             # vervangt ingetypte tekens (past bij isdigit en isalnum)
+
+
+def trace_requested(argv=None):
+    argv = sys.argv if argv is None else argv
+    return os.environ.get(ENV_VAR, "") not in ("", "0") or "--trace" in argv
+
+
+def trace_path(default):
+    """Pad uit ``LOCK_TRACE`` als dat geen 1 is, anders ``default`` met tijdstempel."""
+    env = os.environ.get(ENV_VAR, "")
+    if env not in ("", "0", "1"):
+        return env
+    stem, ext = os.path.splitext(str(default))
+    return f"{stem}_{time.strftime('%Y%m%d_%H%M%S')}{ext}"
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="\n")
+    return open(path, mode, encoding="utf-8", newline="\n")
+
+
+# ----- opnemen -----
+class TraceRecorder:
+    """
+    Thread-safe: de SerialHub-thread en de Tk-thread schrijven allebei.
+    Regels worden gebufferd en door ``flush`` weggeschreven (de app doet dat
+    elke seconde via de scheduler en bij afsluiten).
+    """
+
+    def __init__(self, path, meta, clock=time.monotonic):
+        self.path = path
+        self.clock = clock
+        self.t0 = clock()
+        self._lock = threading.Lock()
+        self._buf = []
+        self._ports = {}
+        self._depth = 0         # >0: binnen een opgenomen kern-aanroep (geneste niet opnemen)
+        self._core = None
+        self._file = _open(path, "w") if path else None
+        self.lines = []         # zonder pad: alles in het geheugen (benchmarks)
+        self.events = 0
+        self._emit_raw(f"{MAGIC}\t{VERSION}\t{json.dumps(meta, sort_keys=True)}")
+
+    def _emit_raw(self, line):
+        with self._lock:
+            self._buf.append(line)
+            big = len(self._buf) >= FLUSH_LINES
+        if big:
+            self.flush()
+
+    def emit(self, kind, *args):
+        ms = (self.clock() - self.t0) * 1000.0
+        self.events += 1
+        self._emit_raw("\t".join((f"{ms:.3f}", kind) + tuple(str(a) for a in args)))
+
+    def flush(self):
+        with self._lock:
+            buf, self._buf = self._buf, []
+        if not buf:
+            return
+        if self._file is None:
+            self.lines.extend(buf)
+        else:
+            self._file.write("\n".join(buf) + "\n")
+            self._file.flush()
+
+    def close(self):
+        core = self._core
+        if core is not None:
+            self.emit("E", core.state, core.unlocks, core.relocks, core.rejects)
+            self._core = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ----- bronnen -----
+    def serial_bytes(self, data, source):
+        """``SerialHub.on_bytes``: vanuit de hub-thread, vóór de parser."""
+        with self._lock:
+            nr = self._ports.get(source)
+            new = nr is None
+            if new:
+                nr = self._ports[source] = len(self._ports)
+        if new:
+            self.emit("P", nr, source)
+        self.emit("S", nr, data.hex())
+
+    def attach_cards(self, store):
+        """Leg elke beslissing van ``CardStore.check`` vast (afspelen gebruikt dezelfde)."""
+        check = store.check
+
+        def traced_check(uid):
+            secs = check(uid)
+            self.emit("C", uid.strip(), "-" if secs is None else secs)
+            return secs
+        store.check = traced_check
+
+    def attach_core(self, core):
+        """
+        Wikkel de invoermethoden van ``core`` (instantie-attributen, de klasse
+        blijft ongemoeid) en keten ``on_state``. Voor het eerste timer-gebruik
+        aanroepen, anders wordt die relock niet als T-regel gezien.
+        """
+        self._core = core
+        allowed = core.allowed
+
+        def mask(ch):
+            return ch if ch in (KEY_CLEAR, KEY_BACKSPACE) else MASK_CHAR
+
+        def wrap(name, record):
+            orig = getattr(core, name)
+
+            def traced(*args, **kwargs):
+                outer = self._depth == 0
+                self._depth += 1
+                try:
+                    result = orig(*args, **kwargs)
+                finally:
+                    self._depth -= 1
+                if outer:
+                    fields = record(result, *args, **kwargs)
+                    if fields is not None:
+                        self.emit("K", *fields)
+                return result
+            setattr(core, name, traced)
+
+        wrap("press", lambda r, label: ("press", mask(label)))
+        wrap("type_char", lambda r, ch: ("type",) if ch and allowed(ch) else None)
+        wrap("backspace", lambda r: ("backspace",))
+        wrap("clear", lambda r: ("clear",))
+        wrap("submit", lambda r: ("submit", "ok" if r else "no"))
+        wrap("lock", lambda r, reason="handmatig": ("lock", reason))
+        wrap("unlock", lambda r, reason="extern", relock_after=None:
+             ("unlock", reason, "-" if relock_after is None else relock_after))
+
+        relock_due = core._relock_due
+
+        def traced_relock():
+            self.emit("T", "relock")
+            self._depth += 1            # de lock() daarbinnen komt van de timer, niet van buiten
+            try:
+                relock_due()
+            finally:
+                self._depth -= 1
+        core._relock_due = traced_relock
+
+        on_state = core.on_state
+
+        def traced_state(state, reason):
+            self.emit("X", state, reason, core.unlocks)
+            if on_state:
+                on_state(state, reason)
+        core.on_state = traced_state
+
+
+def maybe_record(default_path, meta, core, scheduler=None, hub=None, cards=None):
+    """Start een opname als die gevraagd is; anders None."""
+    if not trace_requested():
+        return None
+    meta = dict(meta, state=core.state)
+    rec = TraceRecorder(trace_path(default_path), meta)
+    rec.attach_core(core)
+    if cards is not None:
+        rec.attach_cards(cards)
+    if hub is not None:
+        hub.on_bytes = rec.serial_bytes
+    if scheduler is not None:
+        scheduler.call_every(1.0, rec.flush)
+    return rec
+
+
+# ----- lezen -----
+def parse_trace(lines):
+    """Regels -> (meta, [(t_seconden, soort, args), ...])."""
+    it = iter(lines)
+    head = next(it, "").rstrip("\n").split("\t", 2)
+    if len(head) != 3 or head[0] != MAGIC:
+        raise ValueError("geen lktrace-bestand")
+    if int(head[1]) != VERSION:
+        raise ValueError(f"onbekende trace-versie {head[1]}")
+    meta = json.loads(head[2])
+    events = []
+    for no, line in enumerate(it, 2):
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        parts = line.split("\t")
+        try:
+            events.append((float(parts[0]) / 1000.0, parts[1], tuple(parts[2:])))
+        except (ValueError, IndexError):
+            raise ValueError(f"regel {no}: onleesbaar event") from None
+    # hub- en Tk-thread schrijven door elkaar; per thread blijft de volgorde (stabiele sort)
+    events.sort(key=lambda e: e[0])
+    return meta, events
+
+
+def read_trace(path):
+    with _open(path, "r") as f:
+        return parse_trace(f)
+
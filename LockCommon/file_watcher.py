@@ -0,0 +1,235 @@
+"""
+file_watcher.py
+
+Event-gestuurd bestanden bewaken voor beide lock-apps (pins, instellingen, ...).
+
+- Linux: inotify via ctypes. De *map* wordt bewaakt, niet het bestand zelf,
+  zodat 'atomisch opslaan' (schrijven naar tmp + rename) ook gezien wordt.
+- Elders (Windows) of als inotify niet lukt: een goedkope poll op de
+  achtergrond (één stat per bestand per ``poll_interval``).
+- Lukt alleen de watch voor één map niet (ENOSPC bij te veel watches, map
+  bestaat nog niet), dan wordt alleen dat pad gepolld; de fout staat in
+  ``watch_errors`` en wordt gemeld.
+
+Een reeks schrijfacties kort na elkaar wordt samengevoegd (``debounce``);
+de callback wordt pas aangeroepen als het bestand ``debounce`` seconden
+rustig is én de signatuur (mtime_ns, grootte, inode) echt veranderd is.
+
+Callbacks draaien in de watcher-thread, nooit op de Tk-thread. Wie de UI wil
+bijwerken moet zelf naar Tk marshallen (``root.after``). Een exception in een
+callback telt in ``errors`` en gaat naar ``on_error(pad, fout)``, of anders
+naar stderr; de watcher zelf loopt door.
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+DEBOUNCE = 0.25
+POLL_INTERVAL = 1.0
+
+# inotify-constanten (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE)
+_EVENT = struct.Struct("iIII")
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class _Inotify:
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 mislukt")
+        self._wds = {}      # wd -> map
+
+    def add_dir(self, directory):
+        if directory in self._wds.values():
+            return
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            import ctypes
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch mislukt: {directory}")
+        self._wds[wd] = directory
+
+    def read(self):
+        """Retourneert de paden waarvoor events binnenkwamen."""
+        out = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return out
+        pos = 0
+        while pos + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, pos)
+            pos += _EVENT.size
+            name = data[pos:pos + length].rstrip(b"\0")
+            pos += length
+            directory = self._wds.get(wd)
+            if directory is not None and name:
+                out.append(os.path.join(directory, os.fsdecode(name)))
+        return out
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    def __init__(self, debounce=DEBOUNCE, poll_interval=POLL_INTERVAL, force_polling=False):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._watches = {}      # pad -> [callbacks]
+        self._sigs = {}         # pad -> laatst gemelde signatuur
+        self._dirty = {}        # pad -> tijd van laatste event
+        self._polled = set()    # paden waarvan de inotify-watch mislukte
+        self._stop = threading.Event()
+        self._thread = None
+        self._ino = None
+        if not force_polling and sys.platform.startswith("linux"):
+            try:
+                self._ino = _Inotify()
+            except (OSError, AttributeError):
+                self._ino = None
+        self.fired = 0
+        self.errors = 0
+        self.watch_errors = []  # (pad, melding) per mislukte inotify-watch
+        self.on_error = None    # optioneel: on_error(pad, fout) i.p.v. stderr
+
+    @property
+    def backend(self):
+        if not self._ino:
+            return "poll"
+        return "inotify+poll" if self._polled else "inotify"
+
+    def watch(self, path, callback):
+        """``callback(pad)`` na elke (gebundelde) wijziging van ``path``."""
+        path = str(Path(path).resolve())
+        with self._lock:
+            self._watches.setdefault(path, []).append(callback)
+            self._sigs.setdefault(path, file_signature(path))
+        if self._ino:
+            try:
+                self._ino.add_dir(os.path.dirname(path))
+            except OSError as e:
+                # zonder watch zou dit pad nooit meer gezien worden: terugvallen op pollen
+                with self._lock:
+                    self._polled.add(path)
+                self.watch_errors.append((path, str(e)))
+                self._report(path, e, f"inotify-watch mislukt, {path} wordt gepolld: {e}")
+        return path
+
+    def unwatch(self, path):
+        with self._lock:
+            path = str(Path(path).resolve())
+            self._watches.pop(path, None)
+            self._sigs.pop(path, None)
+            self._dirty.pop(path, None)
+            self._polled.discard(path)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="FileWatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._ino:
+            self._ino.close()
+            self._ino = None
+
+    # ----- werkthread -----
+    def _loop(self):
+        next_poll = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                deadlines = [t + self.debounce for t in self._dirty.values()]
+                polling = not self._ino or bool(self._polled)
+            wait = min(deadlines, default=now + (0.5 if self._ino else self.poll_interval)) - now
+            if polling:
+                wait = min(wait, next_poll - now)
+            wait = max(0.0, min(wait, 0.5))
+
+            if self._ino:
+                r, _, _ = select.select([self._ino.fd], [], [], wait)
+                if r:
+                    now = time.monotonic()
+                    with self._lock:
+                        for p in self._ino.read():
+                            if p in self._watches:
+                                self._dirty[p] = now
+            elif self._stop.wait(wait):
+                break
+            if polling:
+                now = time.monotonic()
+                if now >= next_poll:
+                    next_poll = now + self.poll_interval
+                    self._poll(now)
+            self._fire_settled()
+
+    def _poll(self, now):
+        with self._lock:
+            paths = self._polled if self._ino else self._sigs
+            for p in paths:
+                if p not in self._dirty and file_signature(p) != self._sigs.get(p):
+                    self._dirty[p] = now
+
+    def _fire_settled(self):
+        now = time.monotonic()
+        ready = []
+        with self._lock:
+            for p, t in list(self._dirty.items()):
+                if now - t < self.debounce:
+                    continue
+                del self._dirty[p]
+                sig = file_signature(p)
+                if sig == self._sigs.get(p):
+                    continue        # alleen aangeraakt, of terug naar de oude versie
+                self._sigs[p] = sig
+                ready.extend((cb, p) for cb in self._watches.get(p, ()))
+        for cb, p in ready:
+            self.fired += 1
+            try:
+                cb(p)
+            except Exception as e:
+                self.errors += 1
+                self._report(p, e)
+
+    def _report(self, path, error, message=None):
+        if self.on_error is not None:
+            try:
+                self.on_error(path, error)
+            except Exception:
+                traceback.print_exc()
+        elif message is not None:
+            print(f"FileWatcher: {message}", file=sys.stderr)
+        else:
+            traceback.print_exc()
@@ -0,0 +1,242 @@
+"""
+fleet_server.py
+
+Server-kant van fleet_sync.py: publiceert ondertekende bundels en beantwoordt
+de polls van de kiosks met ``304``, een delta of de volledige bundel. Klein
+genoeg om als centrale endpoint te draaien, en de lokale stand-in voor
+bench_fleet.py.
+
+- ETag = versie + digest; ``If-None-Match`` of ``If-Modified-Since`` -> 304.
+- ``X-Bundle-Have`` met een versie uit de geschiedenis -> delta, als die
+  kleiner is dan de volledige bundel.
+- Antwoorden (ook delta's en gzip) worden per versie één keer opgebouwd en
+  ondertekend; honderd kiosks met dezelfde versie kosten dus geen extra werk.
+- Versies lopen op over herstarts heen (minstens de huidige epoch-seconde).
+
+Gebruik (publiceert opnieuw zodra een van de bestanden verandert):
+    python fleet_server.py --key fleet.key --file pins=overlay_lock_pins.txt \\
+        --settings fleet_settings.json --port 8765
+Kiosk: FLEET_URL = "http://server:8765/bundle", zelfde fleet.key naast de app.
+"""
+
+import argparse
+import email.utils
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from fleet_sync import HAVE_HEADER, SIGNATURE_HEADER, canonical, digest, load_key, make_delta, sign
+
+HISTORY = 20                # zoveel oude versies blijven bruikbaar als delta-basis
+GZIP_MIN = 1024             # kleinere antwoorden niet comprimeren
+
+
+class _Version:
+    __slots__ = ("bundle", "body", "etag", "published", "last_modified", "bodies")
+
+    def __init__(self, bundle, published):
+        self.bundle = bundle
+        self.body = canonical(bundle)
+        self.etag = f'"{bundle["version"]}-{digest(bundle)[:16]}"'
+        self.published = int(published)
+        self.last_modified = email.utils.formatdate(self.published, usegmt=True)
+        self.bodies = {}            # (basisversie of None, gzip) -> (body, handtekening, gzip?)
+
+
+class FleetStore:
+    """Versies en antwoorden, los van HTTP (``respond`` krijgt de request-headers)."""
+
+    def __init__(self, key, history=HISTORY, clock=time.time):
+        self.key = key
+        self.history = history
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._versions = {}         # versie -> _Version
+        self.current = None
+
+        self.requests = 0
+        self.not_modified = 0
+        self.deltas = 0
+        self.fulls = 0
+        self.bytes_out = 0
+
+    def publish(self, files, settings):
+        """Nieuwe versie als de inhoud veranderd is; retourneert het versienummer."""
+        with self._lock:
+            cur = self.current
+            if cur and cur.bundle["files"] == files and cur.bundle["settings"] == settings:
+                return cur.bundle["version"]
+            now = self.clock()
+            version = max(cur.bundle["version"] + 1 if cur else 1, int(now))
+            # Last-Modified loopt ook op als er binnen één seconde opnieuw gepubliceerd wordt
+            published = max(cur.published + 1 if cur else 0, int(now))
+            ver = _Version({"version": version, "files": dict(files), "settings": dict(settings)}, published)
+            self._versions[version] = ver
+            for old in sorted(self._versions)[:-self.history - 1]:
+                del self._versions[old]
+            self.current = ver
+            return version
+
+    def respond(self, headers):
+        """(status, headers, body) voor een GET van de bundel."""
+        with self._lock:
+            self.requests += 1
+            cur = self.current
+            if cur is None:
+                return 503, {}, b""
+            inm = headers.get("If-None-Match")
+            ims = headers.get("If-Modified-Since")
+            if inm is not None:
+                fresh = cur.etag in [t.strip() for t in inm.split(",")]
+            elif ims is not None:
+                try:
+                    fresh = email.utils.parsedate_to_datetime(ims).timestamp() >= cur.published
+                except (TypeError, ValueError):
+                    fresh = False
+            else:
+                fresh = False
+            base_headers = {"ETag": cur.etag, "Last-Modified": cur.last_modified,
+                            "Cache-Control": "no-cache"}
+            if fresh:
+                self.not_modified += 1
+                return 304, base_headers, b""
+
+            try:
+                have = int(headers.get(HAVE_HEADER) or 0)
+            except ValueError:
+                have = 0
+            base = have if have in self._versions and have != cur.bundle["version"] else None
+            use_gzip = "gzip" in (headers.get("Accept-Encoding") or "")
+            body, sig, zipped = self._body(cur, base, use_gzip)
+            if base is not None and zipped is None:
+                base = None
+                body, sig, zipped = self._body(cur, None, use_gzip)
+            if base is None:
+                self.fulls += 1
+            else:
+                self.deltas += 1
+            out = dict(base_headers, **{"Content-Type": "application/json", SIGNATURE_HEADER: sig})
+            if zipped:
+                out["Content-Encoding"] = "gzip"
+            self.bytes_out += len(body)
+            return 200, out, body
+
+    def _body(self, cur, base, use_gzip):
+        """Gememoriseerd antwoord; een delta die niet kleiner is dan de bundel wordt (.., .., None)."""
+        key = (base, use_gzip)
+        hit = cur.bodies.get(key)
+        if hit is None:
+            if base is None:
+                plain = cur.body
+            else:
+                plain = canonical(make_delta(self._versions[base].bundle, cur.bundle))
+                if len(plain) >= len(cur.body):
+                    hit = cur.bodies[key] = (b"", "", None)
+                    return hit
+            sig = sign(self.key, plain)
+            if use_gzip and len(plain) >= GZIP_MIN:
+                hit = (gzip.compress(plain, 6), sig, True)
+            else:
+                hit = (plain, sig, False)
+            cur.bodies[key] = hit
+        return hit
+
+    def stats(self):
+        return {"version": self.current.bundle["version"] if self.current else 0,
+                "requests": self.requests, "not_modified": self.not_modified,
+                "deltas": self.deltas, "fulls": self.fulls, "bytes_out": self.bytes_out}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    store = None
+    refresh = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/bundle":
+            self.send_error(404)
+            return
+        if self.refresh:
+            self.refresh()
+        status, headers, body = self.store.respond(self.headers)
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(store, host="127.0.0.1", port=0, refresh=None):
+    """HTTP-server in een achtergrondthread; ``server.server_address`` geeft de poort."""
+    handler = type("FleetHandler", (_Handler,),
+                   {"store": store, "refresh": staticmethod(refresh) if refresh else None})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="FleetServer", daemon=True).start()
+    return server
+
+
+class DirectoryPublisher:
+    """Publiceert bestanden + instellingen opnieuw als een mtime verandert (hoogstens 1x per s)."""
+
+    def __init__(self, store, files, settings_path=None):
+        self.store = store
+        self.files = {k: Path(p) for k, p in files.items()}
+        self.settings_path = Path(settings_path) if settings_path else None
+        self._sig = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked < 1.0:
+                return
+            self._checked = now
+            paths = list(self.files.values()) + ([self.settings_path] if self.settings_path else [])
+            sig = tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in paths)
+            if sig == self._sig:
+                return
+            self._sig = sig
+            files = {k: p.read_text(encoding="utf-8") for k, p in self.files.items() if p.exists()}
+            settings = {}
+            if self.settings_path and self.settings_path.exists():
+                settings = json.loads(self.settings_path.read_text(encoding="utf-8"))
+            version = self.store.publish(files, settings)
+        print(f"gepubliceerd: versie {version}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--key", required=True, help="bestand met de gedeelde sleutel")
+    ap.add_argument("--file", action="append", default=[], metavar="SLEUTEL=PAD",
+                    help="bijv. pins=overlay_lock_pins.txt of cards=sacoa_cards.txt")
+    ap.add_argument("--settings", help="JSON-bestand met instellingen")
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    files = dict(item.split("=", 1) for item in args.file)
+    store = FleetStore(load_key(args.key))
+    pub = DirectoryPublisher(store, files, args.settings)
+    pub.refresh()
+    server = serve(store, args.host, args.port, refresh=pub.refresh)
+    print(f"fleet-server op http://{args.host}:{server.server_address[1]}/bundle", flush=True)
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(store.stats()), flush=True)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
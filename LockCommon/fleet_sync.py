@@ -0,0 +1,386 @@
+"""
+fleet_sync.py
+
+Optionele sync-agent: haalt een ondertekende bundel met pins/kaarten en
+instellingen op bij een centraal HTTP-adres, zodat niet elke kiosk apart
+bezocht hoeft te worden.
+
+- Voorwaardelijk: ``If-None-Match`` (ETag) en ``If-Modified-Since``. Is er
+  niets veranderd, dan antwoordt de server ``304`` zonder body; honderden
+  kiosks die pollen kosten dan één kleine request per interval.
+- Delta: de agent stuurt de versie die hij heeft mee (``X-Bundle-Have``). De
+  server mag dan alleen de gewijzigde regels sturen. Na het toepassen moet de
+  sha256 van de hele bundel kloppen, anders volgt meteen een volledige
+  download.
+- Ondertekend: HMAC-SHA256 over de body met een gedeelde sleutel
+  (``X-Bundle-Signature``). Een foute handtekening, een oudere versie of een
+  kapotte delta wordt geweigerd; de huidige bundel blijft dan staan.
+- Offline start: de laatst geldige bundel staat met handtekening in een
+  cachebestand naast de app en wordt bij de start direct toegepast.
+
+Bundel (JSON):
+    {"version": 12,
+     "files": {"pins": "<inhoud van overlay_lock_pins.txt>"},
+     "settings": {"service_pin": "1423", "auto_relock_seconds": 240}}
+
+Delta (JSON; ``base`` = de versie die de kiosk had):
+    {"version": 13, "base": 12, "digest": "<sha256 van de nieuwe bundel>",
+     "files": {"pins": [[i1, i2, ["nieuwe regels"]], ...]},
+     "settings": {"auto_relock_seconds": 300}, "unset": ["com_port"]}
+Een bestand in een delta is een lijst bewerkingen op regels, een hele tekst
+(vervangen) of ``null`` (uit de bundel halen).
+
+Bestanden gaan atomisch (tmp + rename) naar schijf, waar de FileWatcher van
+de app ze oppikt en de index atomisch wisselt. Gewijzigde instellingen gaan
+in één keer via ``post`` naar de Tk-thread.
+
+De server-kant (en een lokale stand-in om mee te testen) staat in
+fleet_server.py.
+"""
+
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from difflib import SequenceMatcher
+from pathlib import Path
+
+INTERVAL = 60.0
+JITTER = 0.2                # +/- 20% op het interval, zodat een vloot niet gelijk pollt
+TIMEOUT = 10.0
+SIGNATURE_HEADER = "X-Bundle-Signature"
+HAVE_HEADER = "X-Bundle-Have"
+
+
+class BundleError(ValueError):
+    """Bundel of delta geweigerd (handtekening, versie, digest of vorm)."""
+
+
+# ----- bundels -----
+def canonical(bundle):
+    return json.dumps(bundle, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def digest(bundle):
+    return hashlib.sha256(canonical(bundle)).hexdigest()
+
+
+def sign(key, body):
+    return hmac.new(key, body, hashlib.sha256).hexdigest()
+
+
+def load_key(path):
+    """Gedeelde sleutel uit een bestand (witruimte eromheen telt niet mee)."""
+    return Path(path).read_bytes().strip()
+
+
+def make_delta(old, new):
+    """Server-kant: delta van bundel ``old`` naar ``new``."""
+    files = {}
+    old_files, new_files = old.get("files", {}), new.get("files", {})
+    for key in old_files.keys() | new_files.keys():
+        a, b = old_files.get(key), new_files.get(key)
+        if a == b:
+            continue
+        if a is None or b is None:
+            files[key] = b
+            continue
+        la, lb = a.splitlines(keepends=True), b.splitlines(keepends=True)
+        files[key] = [[i1, i2, lb[j1:j2]]
+                      for tag, i1, i2, j1, j2 in SequenceMatcher(None, la, lb, autojunk=False).get_opcodes()
+                      if tag != "equal"]
+    old_set, new_set = old.get("settings", {}), new.get("settings", {})
+    return {
+        "version": new["version"],
+        "base": old["version"],
+        "digest": digest(new),
+        "files": files,
+        "settings": {k: v for k, v in new_set.items() if k not in old_set or old_set[k] != v},
+        "unset": sorted(old_set.keys() - new_set.keys()),
+    }
+
+
+def apply_delta(old, delta):
+    """Client-kant: nieuwe bundel uit ``old`` + ``delta``; BundleError als het niet klopt."""
+    if old is None or delta.get("base") != old.get("version"):
+        raise BundleError("delta past niet op de huidige versie")
+    try:
+        files = dict(old.get("files", {}))
+        for key, change in delta.get("files", {}).items():
+            if change is None:
+                files.pop(key, None)
+            elif isinstance(change, str):
+                files[key] = change
+            else:
+                lines = files.get(key, "").splitlines(keepends=True)
+                for i1, i2, new_lines in reversed(change):
+                    lines[i1:i2] = new_lines
+                files[key] = "".join(lines)
+        settings = dict(old.get("settings", {}))
+        settings.update(delta.get("settings", {}))
+        for key in delta.get("unset", ()):
+            settings.pop(key, None)
+        bundle = {"version": delta["version"], "files": files, "settings": settings}
+    except (KeyError, TypeError, ValueError) as e:
+        raise BundleError(f"kapotte delta: {e}") from None
+    if digest(bundle) != delta.get("digest"):
+        raise BundleError("digest klopt niet na de delta")
+    return bundle
+
+
+def write_atomic(path, text):
+    """Alleen schrijven als de inhoud echt anders is (anders reageert de watcher voor niets)."""
+    path = Path(path)
+    data = text.encode("utf-8")
+    try:
+        if path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+# ----- agent -----
+class FleetSync:
+    """
+    ``files``: bundelsleutel -> pad op schijf (bijv. ``{"pins": pins_path}``).
+    ``on_settings(settings, changed)`` draait via ``post`` op de Tk-thread,
+    alleen als er instellingen veranderd zijn; ``changed`` = sleutel -> nieuwe
+    waarde (None = vervallen).
+    """
+
+    def __init__(self, url, key, cache_path, files, on_settings=None, post=None,
+                 interval=INTERVAL, jitter=JITTER, timeout=TIMEOUT, opener=None):
+        self.url = url
+        self.key = key
+        self.cache_path = Path(cache_path)
+        self.files = {k: Path(p) for k, p in files.items()}
+        self.on_settings = on_settings
+        self.post = post or (lambda fn: fn())
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.opener = opener or urllib.request.build_opener()
+
+        self.bundle = None
+        self.etag = None
+        self.last_modified = None
+        self._proof = None              # ondertekende body waar de huidige bundel uit volgt
+        self._sig = None
+        self._lock = threading.Lock()   # één poll tegelijk
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.polls = 0
+        self.not_modified = 0
+        self.deltas = 0
+        self.fulls = 0
+        self.rejected = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.last_ok = None             # time.time() van het laatste geslaagde contact
+        self.last_error = ""
+
+    @property
+    def version(self):
+        return self.bundle["version"] if self.bundle else 0
+
+    # ----- levenscyclus -----
+    def start(self):
+        """Cache toepassen (offline start) en daarna op de achtergrond pollen."""
+        self.load_cache()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="FleetSync", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
+
+    def _run(self):
+        # eerste poll na een korte willekeurige pauze: na een stroomstoring niet de hele vloot tegelijk
+        delay = random.uniform(0, self.interval * self.jitter)
+        while not self._stop.wait(delay):
+            self.poll_once()
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    # ----- cache -----
+    def load_cache(self):
+        """Laatst geldige bundel van schijf toepassen; False als er geen (geldige) is."""
+        try:
+            cached = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            proof = cached["proof"].encode("utf-8")
+            self._verify(proof, cached["sig"])
+            body = json.loads(proof)
+            want = body["digest"] if "base" in body else digest(body)
+            bundle = cached["bundle"]
+            if digest(bundle) != want:
+                raise BundleError("cache past niet bij de handtekening")
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self._apply(bundle, proof, cached["sig"], cached.get("etag"), cached.get("last_modified"))
+        return True
+
+    def _save_cache(self):
+        data = json.dumps({
+            "etag": self.etag, "last_modified": self.last_modified,
+            "bundle": self.bundle, "proof": self._proof.decode("utf-8"), "sig": self._sig,
+        }, ensure_ascii=False)
+        try:
+            write_atomic(self.cache_path, data)
+        except OSError:
+            pass
+
+    # ----- pollen -----
+    def poll_once(self, full=False):
+        """
+        Eén voorwaardelijke request. Retourneert "304", "delta", "full",
+        "rejected" of "error". ``full``: geen ETag/versie meesturen.
+        """
+        with self._lock:
+            self.polls += 1
+            result = self._poll(full)
+            if result == "delta-failed":
+                result = self._poll(True)
+            return result
+
+    def _poll(self, full):
+        req = urllib.request.Request(self.url, headers={"Accept-Encoding": "gzip"})
+        if self.bundle and not full:
+            if self.etag:
+                req.add_header("If-None-Match", self.etag)
+            if self.last_modified:
+                req.add_header("If-Modified-Since", self.last_modified)
+            req.add_header(HAVE_HEADER, str(self.version))
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                raw = resp.read()
+                headers = resp.headers
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                self.not_modified += 1
+                self.last_ok = time.time()
+                return "304"
+            return self._error(f"HTTP {e.code}")
+        except (OSError, ValueError) as e:
+            return self._error(str(e))
+
+        self.bytes_in += len(raw)
+        try:
+            body = gzip.decompress(raw) if headers.get("Content-Encoding") == "gzip" else raw
+            sig = headers.get(SIGNATURE_HEADER, "")
+            self._verify(body, sig)
+            data = json.loads(body)
+            if not isinstance(data, dict):
+                raise BundleError("bundel is geen object")
+            if "base" in data:
+                try:
+                    bundle = apply_delta(self.bundle, data)
+                except BundleError as e:
+                    self.last_error = str(e)
+                    return "delta-failed"
+                kind = "delta"
+            else:
+                bundle, kind = data, "full"
+            if not isinstance(bundle.get("version"), int):
+                raise BundleError("bundel zonder versie")
+            if self.bundle and bundle["version"] < self.version:
+                raise BundleError(f"versie {bundle['version']} is ouder dan {self.version}")
+        except (OSError, ValueError, zlib.error) as e:     # BundleError is een ValueError
+            self.rejected += 1
+            self.last_error = str(e)
+            return "rejected"
+
+        self.last_ok = time.time()
+        if kind == "delta":
+            self.deltas += 1
+        else:
+            self.fulls += 1
+        self._apply(bundle, body, sig, headers.get("ETag"), headers.get("Last-Modified"))
+        self._save_cache()
+        return kind
+
+    def _error(self, message):
+        self.errors += 1
+        self.last_error = message
+        return "error"
+
+    def _verify(self, body, sig):
+        if not sig or not hmac.compare_digest(sign(self.key, body), sig):
+            raise BundleError("handtekening klopt niet")
+
+    # ----- toepassen -----
+    def _apply(self, bundle, proof, sig, etag, last_modified):
+        old = self.bundle or {}
+        files = bundle.get("files", {})
+        for key, path in self.files.items():
+            if key in files:
+                try:
+                    write_atomic(path, files[key])
+                except OSError as e:
+                    self.last_error = f"{path.name}: {e}"
+        old_set, new_set = old.get("settings", {}), dict(bundle.get("settings", {}))
+        changed = {k: v for k, v in new_set.items() if k not in old_set or old_set[k] != v}
+        changed.update({k: None for k in old_set.keys() - new_set.keys()})
+        self.bundle = bundle
+        self._proof, self._sig = proof, sig
+        self.etag, self.last_modified = etag, last_modified
+        if changed and self.on_settings:
+            self.post(lambda: self.on_settings(new_set, changed))
+
+    # ----- status -----
+    def status(self):
+        return {
+            "fleet_version": self.version,
+            "fleet_polls": self.polls,
+            "fleet_not_modified": self.not_modified,
+            "fleet_deltas": self.deltas,
+            "fleet_fulls": self.fulls,
+            "fleet_rejected": self.rejected,
+            "fleet_errors": self.errors,
+            "fleet_bytes_in": self.bytes_in,
+            "fleet_last_ok_s": round(time.time() - self.last_ok, 1) if self.last_ok else None,
+            "fleet_last_error": self.last_error,
+        }
+
+
+class NullFleet:
+    """Geen fleet-sync ingesteld."""
+
+    bundle = None
+    version = 0
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def status(self):
+        return {"fleet_version": 0}
+
+
+def make_fleet(url, key_path, cache_path, files, on_settings=None, post=None, **kwargs):
+    """FleetSync volgens de instellingen van een app; NullFleet als er geen URL of sleutel is."""
+    if not url:
+        return NullFleet()
+    try:
+        key = load_key(key_path)
+    except OSError:
+        return NullFleet()
+    if not key:
+        return NullFleet()
+    return FleetSync(url, key, cache_path, files, on_settings, post, **kwargs).start()
@@ -0,0 +1,188 @@
+"""
+latency_metrics.py
+
+Latentie-histogrammen (p50/p95/p99) voor de lock-apps, met export naar een
+lokaal bestand en/of een Prometheus-tekst-endpoint op 127.0.0.1.
+
+Gebruik in een app:
+    self.metrics = make_metrics(METRICS_ENABLED)
+    self.metrics.observe("sacoa_unlock_ms", ms)
+
+Staat de functie uit, dan krijg je een ``NullMetrics`` waarvan alle methodes
+niets doen; de kosten zijn dan één lege methode-aanroep.
+"""
+
+import bisect
+import os
+import threading
+import time
+
+# bucketgrenzen in ms (Prometheus 'le'), ruwweg logaritmisch
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+RESERVOIR = 2048   # laatste N metingen voor de percentielen
+
+
+def ms_since(t0):
+    """Milliseconden sinds ``t0`` (time.monotonic)."""
+    return (time.monotonic() - t0) * 1000.0
+
+
+class Histogram:
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._ring = [0.0] * RESERVOIR
+        self._pos = 0
+
+    def observe(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self._ring[self._pos % RESERVOIR] = ms
+        self._pos += 1
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)):
+        n = min(self._pos, RESERVOIR)
+        if not n:
+            return {q: 0.0 for q in qs}
+        data = sorted(self._ring[:n])
+        return {q: data[min(n - 1, int(q * n))] for q in qs}
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hists = {}
+        self._counters = {}
+        self._server = None
+
+    def observe(self, name, ms):
+        with self._lock:
+            h = self._hists.get(name)
+            if h is None:
+                h = self._hists[name] = Histogram(name)
+            h.observe(ms)
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def snapshot(self):
+        """{naam: {'count', 'p50', 'p95', 'p99'}} voor eigen gebruik of tests."""
+        with self._lock:
+            out = {}
+            for name, h in self._hists.items():
+                p = h.percentiles()
+                out[name] = {"count": h.count, "p50": p[0.5], "p95": p[0.95], "p99": p[0.99]}
+            out.update({k: {"count": v} for k, v in self._counters.items()})
+            return out
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            for name, h in sorted(self._hists.items()):
+                lines.append(f"# TYPE {name} histogram")
+                acc = 0
+                for le, c in zip(BUCKETS_MS, h.counts):
+                    acc += c
+                    lines.append(f'{name}_bucket{{le="{le}"}} {acc}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {h.count}')
+                lines.append(f"{name}_sum {h.sum:.3f}")
+                lines.append(f"{name}_count {h.count}")
+                for q, v in h.percentiles().items():
+                    lines.append(f'{name}_quantile{{quantile="{q}"}} {v:.3f}')
+            for name, v in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                lines.append(f"{name} {v}")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomisch wegschrijven (tmp + replace), zodat lezers nooit een half bestand zien."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """Start een /metrics-endpoint in een daemon-thread. Retourneert de echte poort."""
+        # pas hier importeren: http.server kost ~90 ms opstarttijd en is meestal niet nodig
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+
+class NullMetrics:
+    """Uitgeschakelde metrics: alles is een no-op."""
+
+    enabled = False
+
+    def observe(self, name, ms):
+        pass
+
+    def inc(self, name, n=1):
+        pass
+
+    def snapshot(self):
+        return {}
+
+    def render_prometheus(self):
+        return ""
+
+    def write_file(self, path):
+        pass
+
+    def serve(self, port, host="127.0.0.1"):
+        return 0
+
+    def close(self):
+        pass
+
+
+def make_metrics(enabled, file_path=None, port=0, scheduler=None, interval=10.0):
+    """
+    Maak metrics volgens de instellingen van een app.
+    - ``file_path``: elke ``interval`` s wegschrijven via ``scheduler`` (TkScheduler)
+    - ``port``: > 0 start een Prometheus-endpoint op 127.0.0.1
+    """
+    if not enabled:
+        return NullMetrics()
+    m = Metrics()
+    if port:
+        try:
+            m.serve(port)
+        except OSError:
+            pass
+    if file_path and scheduler is not None:
+        def flush():
+            try:
+                m.write_file(file_path)
+            except OSError:
+                pass
+        scheduler.call_every(interval, flush)
+    return m
@@ -0,0 +1,299 @@
+"""
+lock_config.py
+
+Eén instellingenbestand voor beide lock-apps, live herladen via de
+FileWatcher. Standaard ``lock_config.json`` in de map boven DisplayLock/ en
+SacoaDisplayLock/ (of het pad in ``LOCK_CONFIG``):
+
+    {
+      "common":      {"screen_index": 1, "max_code_len": 32},
+      "displaylock": {"keep_alive_ms": 1000},
+      "sacoa":       {"blur_radius": 8, "auto_relock_seconds": 300}
+    }
+
+Ontbreekt het bestand of een sleutel, dan gelden de standaardwaarden in
+SETTINGS (dezelfde als de oude constanten in de apps). ``common`` geldt voor
+beide apps en de app-sectie gaat daar overheen; fleet-sync (fleet_sync.py)
+legt er nog een laag overheen.
+
+Alles wordt eerst gecontroleerd (type, bereik, onbekende sleutels); bij een
+fout blijft de vorige configuratie staan en staat de fout in ``errors``. Een
+geldige wijziging wordt in één keer op de Tk-thread gezet. Daarna krijgen
+alleen de subsystemen waarvan een sleutel veranderde hun callback (bijv.
+opnieuw renderen bij ``blur_radius``, de relock verzetten bij
+``auto_relock_seconds``). Sleutels met ``live=False`` gelden pas na een
+herstart en staan tot dan in ``restart_needed``.
+
+Controleren zonder app:
+    python lock_config.py                       # effectieve waarden van beide apps
+    python lock_config.py --check ander.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent / "lock_config.json"
+APPS = ("displaylock", "sacoa")
+BOTH = APPS
+
+
+class ConfigError(ValueError):
+    """Ongeldig instellingenbestand; de vorige configuratie blijft staan."""
+
+
+class Setting:
+    __slots__ = ("name", "kind", "default", "apps", "lo", "hi", "choices", "live", "help")
+
+    def __init__(self, name, kind, default, apps=BOTH, lo=None, hi=None, choices=None,
+                 live=True, help=""):
+        self.name = name
+        self.kind = kind            # int, float, bool, str of "ports" (lijst met poorten/globs)
+        self.default = default
+        self.apps = apps
+        self.lo = lo
+        self.hi = hi
+        self.choices = choices
+        self.live = live
+        self.help = help
+
+    def coerce(self, value):
+        kind = self.kind
+        if kind == "ports":
+            if isinstance(value, str):
+                value = [value]
+            if not isinstance(value, list) or not all(isinstance(v, str) and v for v in value):
+                raise ConfigError(f"{self.name}: verwacht een lijst met poorten")
+            return list(value)
+        # bool is een int in Python; hier niet als getal accepteren (en andersom)
+        if kind is bool:
+            ok = isinstance(value, bool)
+        elif kind is float:
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+        else:
+            ok = isinstance(value, kind) and not (kind is int and isinstance(value, bool))
+        if not ok:
+            raise ConfigError(f"{self.name}: verwacht {kind.__name__}, kreeg {value!r}")
+        if self.lo is not None and value < self.lo or self.hi is not None and value > self.hi:
+            raise ConfigError(f"{self.name}: {value!r} buiten {self.lo} .. {self.hi}")
+        if self.choices is not None and value not in self.choices:
+            raise ConfigError(f"{self.name}: {value!r} niet in {', '.join(map(str, self.choices))}")
+        return value
+
+
+DL, SA = ("displaylock",), ("sacoa",)
+SETTINGS = {s.name: s for s in (
+    # beide apps
+    Setting("screen_index", int, 0, lo=0, help="0 = primair, 1 = tweede, ..."),
+    Setting("all_monitors", bool, False, help="ook de andere schermen afdekken"),
+    Setting("max_code_len", int, 32, lo=1, hi=256, help="maximale lengte van de invoer"),
+    # DisplayLock
+    Setting("keep_alive_ms", int, 1000, DL, lo=100, hi=60000,
+            help="goedkope topmost-controle (alleen winfo-vragen)"),
+    Setting("topmost_poll", bool, False, DL, help="oud gedrag: elke keep_alive_ms alles opnieuw"),
+    # Sacoa
+    Setting("start_lock_delay_seconds", float, 60, SA, lo=0, live=False,
+            help="overlay pas na X seconden tonen"),
+    Setting("auto_relock_seconds", float, 240, SA, lo=1, help="na ontgrendelen automatisch weer locken"),
+    Setting("serial_ports", "ports", ["COM10"], SA,
+            help="lezers en/of globs, bijv. [\"COM10\", \"COM1*\"] of [\"/dev/ttyUSB*\"]"),
+    Setting("baudrate", int, 9600, SA, lo=300, hi=4000000, live=False),
+    Setting("trigger_min_interval", float, 1.0, SA, lo=0, hi=60, help="debounce tegen meerdere pulsen"),
+    Setting("heartbeat_seconds", float, 1.0, SA, lo=0.05, hi=60),
+    Setting("heartbeat_misses", int, 3, SA, lo=1, hi=100),
+    Setting("ping_seconds", float, 5.0, SA, lo=0.05, hi=3600),
+    Setting("service_pin", str, "1423", SA, help="code via het Service-venster (cijfers)"),
+    Setting("blur_radius", int, 12, SA, lo=0, hi=100),
+    Setting("dim_alpha", float, 0.35, SA, lo=0, hi=1),
+    Setting("render_backend", str, "fast", SA, choices=("pil", "fast", "numpy")),
+    Setting("blur_downscale", int, 4, SA, lo=1, hi=32),
+    Setting("frame_refresh_seconds", float, 5.0, SA, lo=0.2, hi=3600),
+    Setting("render_workers", int, 0, SA, lo=0, hi=32, live=False, help="0 = één per monitor"),
+)}
+ALIASES = {"com_port": "serial_ports"}      # oude naam (één poort) -> nieuwe
+
+
+def defaults(app):
+    return {s.name: s.default for s in SETTINGS.values() if app in s.apps}
+
+
+def _for_app(app, raw):
+    """Sleutels van de andere app weglaten (geen fout); onbekende blijven staan voor de foutmelding."""
+    return {k: v for k, v in raw.items()
+            if app in getattr(SETTINGS.get(ALIASES.get(k, k)), "apps", (app,))}
+
+
+def validate_flat(app, raw, where=""):
+    """Platte ``{sleutel: waarde}`` voor ``app`` controleren; retourneert de omgezette waarden."""
+    if not isinstance(raw, dict):
+        raise ConfigError(f"{where or 'instellingen'}: verwacht een object")
+    out = {}
+    for key, value in raw.items():
+        name = ALIASES.get(key, key)
+        setting = SETTINGS.get(name)
+        if setting is None:
+            raise ConfigError(f"{where}{key}: onbekende instelling")
+        if app not in setting.apps:
+            raise ConfigError(f"{where}{key}: hoort niet bij {app}")
+        if name in out and name != key:
+            continue                # serial_ports wint van de alias com_port
+        out[name] = setting.coerce(value)
+    if "service_pin" in out and not out["service_pin"].isdigit():
+        raise ConfigError(f"{where}service_pin: alleen cijfers")
+    return out
+
+
+def validate(app, doc):
+    """Heel bestand (secties) -> platte waarden voor ``app``; ConfigError bij de eerste fout."""
+    if not isinstance(doc, dict):
+        raise ConfigError("verwacht een object met secties common/displaylock/sacoa")
+    unknown = set(doc) - {"common"} - set(APPS)
+    if unknown:
+        raise ConfigError(f"onbekende sectie(s): {', '.join(sorted(unknown))}")
+    common = doc.get("common", {})
+    if not isinstance(common, dict):
+        raise ConfigError("common: verwacht een object")
+    # common-sleutels van de andere app zijn geen fout, alleen niet van toepassing
+    out = validate_flat(app, _for_app(app, common), "common.")
+    out.update(validate_flat(app, doc.get(app, {}), f"{app}."))
+    return out
+
+
+def read_file(path):
+    """JSON van schijf; ontbrekend bestand = leeg (alle standaardwaarden)."""
+    try:
+        text = Path(path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        raise ConfigError(f"{path}: {e}") from None
+    if not text.strip():
+        return {}
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise ConfigError(f"{Path(path).name}: {e}") from None
+
+
+class LockConfig:
+    """
+    Effectieve instellingen van één app: standaard <- bestand <- fleet.
+    Lezen als attribuut (``cfg.blur_radius``); de dict wordt in zijn geheel
+    vervangen, dus lezen vanuit een andere thread (bijv. de SerialHub) is veilig.
+    """
+
+    def __init__(self, app, path=None, post=None):
+        self.app = app
+        self.path = Path(path or os.environ.get("LOCK_CONFIG") or DEFAULT_PATH)
+        self.post = post or (lambda fn: fn())
+        self.values = defaults(app)
+        self._layers = {"file": {}, "fleet": {}}
+        self._subs = []             # (sleutels, callback)
+        self.errors = []
+        self.reloads = 0
+        self.restart_needed = set()
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["values"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    # ----- laden -----
+    def load(self):
+        """Bij de start, synchroon en zonder callbacks. False bij een fout (standaardwaarden)."""
+        try:
+            self._layers["file"] = validate(self.app, read_file(self.path))
+        except ConfigError as e:
+            self.errors = [str(e)]
+            return False
+        self.values = self._merged()
+        return True
+
+    def reload(self):
+        """Vanuit elke thread (bijv. de FileWatcher): lezen en controleren hier, toepassen op Tk."""
+        try:
+            data = validate(self.app, read_file(self.path))
+        except ConfigError as e:
+            self.post(lambda error=e: self._failed(error))
+            return
+        self.post(lambda: self._apply("file", data))
+
+    def set_layer(self, layer, raw):
+        """Platte instellingen van bijv. fleet-sync (mag voor beide apps zijn); op de Tk-thread."""
+        try:
+            if not isinstance(raw, dict):
+                raise ConfigError(f"{layer}: verwacht een object")
+            data = validate_flat(self.app, _for_app(self.app, raw), f"{layer}.")
+        except ConfigError as e:
+            self._failed(e)
+            return
+        self._apply(layer, data)
+
+    def subscribe(self, keys, fn):
+        """``fn(changed)`` na een reload waarin een van ``keys`` veranderde; ``changed`` = alleen die."""
+        self._subs.append((frozenset(keys), fn))
+
+    # ----- Tk-thread -----
+    def _failed(self, error):
+        self.errors = [str(error)]
+
+    def _merged(self):
+        values = defaults(self.app)
+        for layer in ("file", "fleet"):
+            values.update(self._layers[layer])
+        return values
+
+    def _apply(self, layer, data):
+        self._layers[layer] = data
+        new = self._merged()
+        old, self.values = self.values, new
+        self.errors = []
+        self.reloads += 1
+        changed = {k: v for k, v in new.items() if old.get(k) != v}
+        for k in list(changed):
+            if not SETTINGS[k].live:
+                self.restart_needed.add(k)
+                del changed[k]
+        for keys, fn in self._subs:
+            sub = {k: changed[k] for k in keys if k in changed}
+            if sub:
+                try:
+                    fn(sub)
+                except Exception as e:      # één subsysteem mag de rest niet tegenhouden
+                    self.errors.append(f"{getattr(fn, '__name__', fn)}: {e}")
+        return changed
+
+    # ----- status -----
+    def status(self):
+        return {
+            "config_reloads": self.reloads,
+            "config_errors": "; ".join(self.errors),
+            "config_restart_needed": ",".join(sorted(self.restart_needed)),
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--check", metavar="PAD", help="ander bestand dan lock_config.json / LOCK_CONFIG")
+    args = ap.parse_args()
+    path = Path(args.check or os.environ.get("LOCK_CONFIG") or DEFAULT_PATH)
+    print(f"{path}{'' if path.exists() else ' (bestaat niet: standaardwaarden)'}")
+    ok = True
+    for app in APPS:
+        cfg = LockConfig(app, path)
+        if not cfg.load():
+            ok = False
+            print(f"[{app}] FOUT: {cfg.errors[0]}")
+            continue
+        print(f"[{app}]")
+        for name, value in cfg.values.items():
+            mark = "" if value == SETTINGS[name].default else "   *"
+            print(f"  {name:26} {json.dumps(value)}{mark}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
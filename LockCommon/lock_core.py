@@ -0,0 +1,195 @@
+"""
+lock_core.py
+
+Headless lock-kern, gedeeld door DisplayLock en SacoaDisplayLock.
+
+Bevat alles wat niet met vensters te maken heeft: de toestand, de invoerbuffer
+van het keypad, de verificatie van codes en de relock-timer. De Tk-apps zijn
+dunne views: ze sturen events naar de kern en tekenen wat de kern meldt.
+Zonder Tk draait dezelfde kern op een ``HeadlessLoop`` (zie bench_lock_core.py).
+
+Toestanden:
+    LOCKED          overlay zichtbaar
+    UNLOCKED        vrij, zonder automatische relock (DisplayLock)
+    RELOCK_PENDING  vrij, relock-timer loopt (Sacoa: na kaartscan of service-code)
+
+Events in: ``press`` (keypadknop), ``type_char`` (toetsenbord), ``backspace``,
+``clear``, ``submit``, ``trigger``, ``lock``, ``unlock`` en de eigen timer.
+Meldingen uit (callbacks, allemaal optioneel):
+    on_state(state, reason)   na elke toestandswissel
+    on_input(length)          invoer veranderd (view toont maskering)
+    on_reject()               foutieve code
+"""
+
+import hmac
+
+LOCKED = "locked"
+UNLOCKED = "unlocked"
+RELOCK_PENDING = "relock_pending"
+STATES = (LOCKED, UNLOCKED, RELOCK_PENDING)
+
+KEY_CLEAR = "Wissen"
+KEY_BACKSPACE = "⌫"
+
+
+def single_pin_verifier(pin):
+    """Verifier voor één vaste code (bijv. SERVICE_PIN), constante-tijd vergelijking."""
+    expected = pin.encode("utf-8")
+    return lambda code: True if hmac.compare_digest(code.encode("utf-8"), expected) else None
+
+
+class LockCore:
+    def __init__(self, scheduler, verify, max_len=32, allowed=str.isalnum,
+                 relock_seconds=None, state=LOCKED):
+        """
+        ``verify(code)`` -> iets truthy (bijv. PinMatch) bij een geldige code, anders None.
+        ``allowed(ch)``  -> welke toetsenbordtekens de buffer in mogen.
+        ``relock_seconds``: None = na ontgrendelen geen automatische relock.
+        """
+        self.scheduler = scheduler
+        self.verify = verify
+        self.max_len = max_len
+        self.allowed = allowed
+        self.relock_seconds = relock_seconds
+        self.state = state
+        self.entered = ""
+        self.entry_started = None       # scheduler-klok bij de eerste toets van de huidige code
+        self.last_match = None
+        self.relock_timer = None
+        self._relock_default = False    # loopt de timer op relock_seconds (niet op een eenmalige duur)?
+
+        self.on_state = None
+        self.on_input = None
+        self.on_reject = None
+
+        self.unlocks = 0
+        self.rejects = 0
+        self.relocks = 0
+
+    # ----- invoer -----
+    def press(self, label):
+        """Keypadknop: cijfer, 'Wissen' of '⌫'. Retourneert False als de buffer vol is."""
+        if label == KEY_CLEAR:
+            return self.clear()
+        if label == KEY_BACKSPACE:
+            return self.backspace()
+        return self._append(label)
+
+    def type_char(self, ch):
+        """Toetsenbordteken; niet-toegestane tekens worden genegeerd (True)."""
+        if not ch or not self.allowed(ch):
+            return True
+        return self._append(ch)
+
+    def _append(self, ch):
+        if len(self.entered) >= self.max_len:
+            return False
+        if not self.entered:
+            self.entry_started = self.scheduler.now()
+        self.entered += ch
+        self._input_changed()
+        return True
+
+    def backspace(self):
+        if self.entered:
+            self.entered = self.entered[:-1]
+            self._input_changed()
+        return True
+
+    def clear(self):
+        self.entered = ""
+        self._input_changed()
+        return True
+
+    def _input_changed(self):
+        if self.on_input:
+            self.on_input(len(self.entered))
+
+    def submit(self):
+        """Controleer de ingevoerde code. Retourneert de match of None."""
+        code, self.entered = self.entered, ""
+        match = self.verify(code) if code else None
+        if match:
+            self.last_match = match
+            self.unlocks += 1
+            self._input_changed()
+            self._unlock("code")
+        else:
+            self.rejects += 1
+            if self.on_reject:
+                self.on_reject()
+        return match
+
+    # ----- toestand -----
+    def trigger(self, relock_after=None):
+        """
+        Externe ontgrendeling (seriële TRIGGER of kaart): altijd (her)start van de
+        relock. ``relock_after`` = sessieduur van de kaart (None/0 = relock_seconds).
+        """
+        self.unlocks += 1
+        self._unlock("trigger", relock_after or None)
+
+    def unlock(self, reason="extern", relock_after=None):
+        """Ontgrendel vanuit de app; ``relock_after`` overschrijft relock_seconds eenmalig."""
+        self._unlock(reason, relock_after)
+
+    def set_relock_seconds(self, seconds):
+        """
+        Nieuwe standaard-relocktijd (instellingen herladen). Een lopende timer
+        die op de oude standaard liep schuift het verschil mee; een eenmalige
+        duur (kaartsessie, startvertraging) blijft staan.
+        """
+        old, self.relock_seconds = self.relock_seconds, seconds
+        if self.relock_timer is None or not self._relock_default or old is None or seconds is None:
+            return
+        remaining = self.relock_remaining
+        self.relock_timer.cancel()
+        self.relock_timer = self.scheduler.call_later(max(0.0, remaining + seconds - old), self._relock_due)
+
+    def lock(self, reason="handmatig"):
+        self._cancel_relock()
+        self.entered = ""
+        self.entry_started = None
+        self._input_changed()
+        self._set_state(LOCKED, reason)
+
+    def _unlock(self, reason, relock_after=None):
+        delay = self.relock_seconds if relock_after is None else relock_after
+        self._cancel_relock()
+        self.entry_started = None
+        if delay is None:
+            self._set_state(UNLOCKED, reason)
+        else:
+            self.relock_timer = self.scheduler.call_later(delay, self._relock_due)
+            self._relock_default = relock_after is None
+            self._set_state(RELOCK_PENDING, reason)
+
+    def _relock_due(self):
+        self.relock_timer = None
+        self.relocks += 1
+        self.lock("relock")
+
+    def _cancel_relock(self):
+        if self.relock_timer:
+            self.relock_timer.cancel()
+            self.relock_timer = None
+
+    def _set_state(self, state, reason):
+        self.state = state
+        if self.on_state:
+            self.on_state(state, reason)
+
+    @property
+    def relock_remaining(self):
+        if self.relock_timer is None:
+            return None
+        return max(0.0, self.relock_timer.due - self.scheduler.now())
+
+    def check_invariants(self):
+        """Voor fuzzing: gooit AssertionError als de kern inconsistent is."""
+        assert self.state in STATES, self.state
+        assert len(self.entered) <= self.max_len
+        assert (self.relock_timer is not None) == (self.state == RELOCK_PENDING), \
+            (self.state, self.relock_timer)
+        if self.relock_timer is not None:
+            assert self.relock_timer.active
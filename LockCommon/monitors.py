@@ -0,0 +1,148 @@
+"""
+monitors.py
+
+Monitor-opsomming voor beide lock-apps, achter één functie ``get_monitors()``.
+
+Bronnen, in volgorde van voorkeur:
+    LOCK_MONITORS   omgevingsvariabele met vaste geometrieën (tests, Xvfb):
+                    LOCK_MONITORS="1920x1080+0+0;1280x1024+1920+0"
+    Windows         EnumDisplayMonitors (DPI-aware)
+    Linux/X11       ``xrandr --listmonitors`` (primaire monitor eerst)
+    anders          één scherm ter grootte van het Tk-display
+
+Een monitor is een ``Monitor(left, top, right, bottom)``; dat blijft gewoon
+een tuple, dus ``sx, sy, sr, sb = monitor`` werkt zoals voorheen.
+Met ``set_provider`` kan een test of benchmark een eigen bron instellen.
+"""
+
+import os
+import re
+import subprocess
+import sys
+from typing import NamedTuple
+
+if sys.platform == "win32":
+    # bij het importeren, vóór tk.Tk(): daarna heeft Tk zijn schaal al gekozen
+    # en kloppen overlay- en knopgeometrie niet op high-DPI-schermen
+    try:
+        import ctypes
+        ctypes.windll.user32.SetProcessDPIAware()
+    except Exception:
+        pass
+
+
+class Monitor(NamedTuple):
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+    @property
+    def width(self):
+        return self.right - self.left
+
+    @property
+    def height(self):
+        return self.bottom - self.top
+
+    @property
+    def geometry(self):
+        """Tk-geometrie ``BxH+X+Y``."""
+        return f"{self.width}x{self.height}+{self.left}+{self.top}"
+
+
+_GEOM = re.compile(r"(\d+)(?:/\d+)?x(\d+)(?:/\d+)?\+(-?\d+)\+(-?\d+)")
+
+
+def parse_geometry(text):
+    """'1920x1080+0+0' (ook xrandr-vorm '1920/530x1080/300+0+0') -> Monitor."""
+    m = _GEOM.search(text)
+    if not m:
+        raise ValueError(f"ongeldige geometrie: {text!r}")
+    w, h, x, y = map(int, m.groups())
+    return Monitor(x, y, x + w, y + h)
+
+
+class FakeMonitors:
+    """Vaste lijst, voor tests en Xvfb."""
+
+    def __init__(self, monitors):
+        self.monitors = [m if isinstance(m, Monitor) else
+                         (parse_geometry(m) if isinstance(m, str) else Monitor(*m))
+                         for m in monitors]
+
+    def __call__(self):
+        return list(self.monitors)
+
+
+def _win32_monitors():
+    import ctypes
+    from ctypes import wintypes
+    user32 = ctypes.windll.user32
+    proc_type = ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_ulong, ctypes.c_ulong,
+                                   ctypes.POINTER(wintypes.RECT), ctypes.c_double)
+    found = []
+
+    def _enum(hMonitor, hdcMonitor, lprcMonitor, dwData):
+        r = lprcMonitor.contents
+        found.append(Monitor(r.left, r.top, r.right, r.bottom))
+        return 1
+    user32.EnumDisplayMonitors(0, 0, proc_type(_enum), 0)
+    return found
+
+
+def _xrandr_monitors():
+    if not os.environ.get("DISPLAY"):
+        return []
+    try:
+        out = subprocess.run(["xrandr", "--listmonitors"], capture_output=True,
+                             text=True, timeout=3).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    primary, others = [], []
+    for line in out.splitlines()[1:]:
+        try:
+            mon = parse_geometry(line)
+        except ValueError:
+            continue
+        (primary if "*" in line.split(":", 1)[-1].split()[0] else others).append(mon)
+    return primary + others
+
+
+def _tk_monitors():
+    import tkinter as tk
+    root = tk._default_root
+    if root is None:
+        return []
+    return [Monitor(0, 0, root.winfo_screenwidth(), root.winfo_screenheight())]
+
+
+_provider = None
+
+
+def set_provider(provider):
+    """Eigen bron instellen (callable -> lijst van monitors); None = automatisch."""
+    global _provider
+    _provider = provider
+
+
+def get_monitors():
+    if _provider is not None:
+        return _provider()
+    env = os.environ.get("LOCK_MONITORS", "").strip()
+    if env:
+        return FakeMonitors(p for p in env.split(";") if p.strip())()
+    if sys.platform == "win32":
+        return _win32_monitors()
+    return _xrandr_monitors() or _tk_monitors()
+
+
+def select_monitors(monitors, index, all_monitors=False):
+    """
+    Welke monitors afgeschermd worden. De eerste in de lijst is altijd het
+    hoofdscherm ``monitors[index]``; met ``all_monitors`` volgen de rest.
+    """
+    main = monitors[index]
+    if not all_monitors:
+        return [main]
+    return [main] + [m for i, m in enumerate(monitors) if i != index]
@@ -0,0 +1,442 @@
+"""
+replay.py
+
+Speelt een trace van event_trace.py af en controleert of eindtoestand,
+aantal ontgrendelingen en de reeks toestandswissels overeenkomen met de
+opname. Meteen een regressie- en doorvoerbenchmark voor het pad
+serieel -> debounce -> trigger -> relock.
+
+Headless (standaard) wordt de keten zonder Tk nagebouwd: FrameParser per
+poort -> TRIGGER/CARD-regels -> TriggerGate -> LockCore met TkScheduler op
+een virtuele klok. De uitkomst hangt dus niet af van de snelheid; ``--speed``
+bepaalt alleen hoe lang er echt gewacht wordt (1 = realtime, 100 = 100x,
+0 = zo snel als het kan).
+
+Met ``--app sacoa|displaylock`` gaat de trace in de echte app (display
+nodig, altijd realtime: de timers van de app lopen op de echte klok).
+
+Gebruik:
+    python replay.py sacoa_trace_20250101_120000.lktrace
+    python replay.py trace.lktrace.gz --speed 100
+    python replay.py trace.lktrace --cards ../SacoaDisplayLock/sacoa_cards.txt
+    python replay.py --bench -n 20000            # synthetische opname + replay
+Exitcode 1 als de afgespeelde run afwijkt (of bij --bench als een controle faalt).
+"""
+
+import argparse
+import gzip
+import random
+import sys
+import time
+import types
+from collections import deque
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "SacoaDisplayLock"))    # trigger_queue, serial_frames, card_store
+
+from event_trace import MASK_CHAR, TraceRecorder, parse_trace, read_trace
+from lock_core import LockCore, KEY_BACKSPACE, KEY_CLEAR, UNLOCKED
+from serial_frames import FrameParser
+from tk_scheduler import HeadlessLoop, TkScheduler
+from trigger_queue import TriggerGate
+
+ALLOWED = {"digit": str.isdigit, "alnum": str.isalnum}
+TOLERANCE_MS = 250.0       # Tk-vertraging bij opnemen; de virtuele replay is exact
+
+
+def _num(text):
+    return None if text == "-" else float(text)
+
+
+class HeadlessReplay:
+    """
+    Speelt events af op een nieuwe kern met virtuele klok. ``cards``: een
+    ``CardStore`` om kaarten opnieuw te controleren; zonder worden de
+    opgenomen C-beslissingen gebruikt.
+    """
+
+    def __init__(self, meta, events, cards=None):
+        self.meta = meta
+        self.events = events
+        self.loop = HeadlessLoop()
+        self.clock = self.loop.clock
+        self.scheduler = TkScheduler(self.loop, clock=self.clock)
+        self.core = LockCore(
+            self.scheduler, self._verify, max_len=meta.get("max_len", 32),
+            allowed=ALLOWED[meta.get("allowed", "alnum")],
+            relock_seconds=meta.get("relock_seconds"), state=meta["state"],
+        )
+        self.core.on_state = self._on_state
+        self.gate = TriggerGate(
+            lambda fn: self.loop.after(0, fn), self._on_trigger,
+            meta.get("trigger_min_interval", 0.0), clock=self.clock,
+        )
+        self.trigger_word = meta.get("trigger_word")
+        self.card_prefix = meta.get("card_prefix")
+        self.cards = cards
+        self._decisions = deque(a for _, k, a in events if k == "C")
+        self._ports = {}
+        self._parsers = {}
+        self._verdict = False
+        self.transitions = []       # (t, toestand, reden, unlocks), zoals X-regels
+        self.frames = 0
+
+    # ----- keten, zoals in de apps -----
+    def _verify(self, code):
+        return types.SimpleNamespace(name="replay") if self._verdict else None
+
+    def _on_state(self, state, reason):
+        self.transitions.append((self.clock(), state, reason, self.core.unlocks))
+
+    def _on_trigger(self, rx_time, source, session):
+        self.core.trigger(session)
+
+    def _check_card(self, uid):
+        if self.cards is not None:
+            return self.cards.check(uid)
+        if not self._decisions:
+            return None
+        secs = self._decisions.popleft()[1]
+        return None if secs == "-" else int(float(secs))
+
+    def _on_frame(self, frame, source):
+        """Zelfde regels als SacoaOverlayApp._on_serial_frame."""
+        self.frames += 1
+        if frame.line == self.trigger_word:
+            self.gate.offer(frame.time, source)
+        elif self.card_prefix and frame.line.startswith(self.card_prefix):
+            session = self._check_card(frame.line[len(self.card_prefix):])
+            if session is not None:
+                self.gate.offer(frame.time, source, session)
+
+    def _apply(self, kind, args):
+        core = self.core
+        if kind == "P":
+            self._ports[args[0]] = args[1]
+            self._parsers[args[0]] = FrameParser()
+        elif kind == "S":
+            for frame in self._parsers[args[0]].feed(bytes.fromhex(args[1]), self.clock()):
+                self._on_frame(frame, self._ports[args[0]])
+        elif kind == "K":
+            op = args[0]
+            if op == "press":
+                core.press(args[1])
+            elif op == "type":
+                core.type_char(MASK_CHAR)
+            elif op == "backspace":
+                core.backspace()
+            elif op == "clear":
+                core.clear()
+            elif op == "submit":
+                self._verdict = args[1] == "ok"
+                core.submit()
+            elif op == "lock":
+                core.lock(args[1])
+            elif op == "unlock":
+                core.unlock(args[1], relock_after=_num(args[2]))
+
+    def run(self, speed=0.0, until=None):
+        """
+        Alle events (tot ``until`` seconden) afspelen. ``speed`` > 0: echt
+        wachten tussen events; de virtuele klok loopt altijd exact mee.
+        """
+        wall0 = time.perf_counter()
+        loop = self.loop
+        end = 0.0
+        for t, kind, args in self.events:
+            if until is not None and t > until:
+                break
+            if speed > 0:
+                delay = t / speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            if t > self.clock():
+                loop.advance(t - self.clock())
+            self._apply(kind, args)
+            loop.run_due()
+            end = t
+        if end > self.clock():
+            loop.advance(end - self.clock())
+        return self
+
+
+class AppReplay(HeadlessReplay):
+    """Zelfde events, maar naar een draaiende app (Tk-thread, echte klok)."""
+
+    def __init__(self, app, meta, events):
+        self.meta = meta
+        self.events = events
+        self.app = app
+        self.root = app.root
+        self.core = app.core
+        self.cards = None
+        self._decisions = deque(a for _, k, a in events if k == "C")
+        self._ports = {}
+        self._parsers = {}
+        self._verdict = False
+        self.transitions = []
+        self.frames = 0
+        self.t0 = time.monotonic()
+        self.clock = time.monotonic
+        self.core.verify = self._verify
+        if getattr(app, "card_store", None) is not None:
+            app.card_store.check = self._check_card
+        on_state = self.core.on_state
+
+        def chained(state, reason):
+            self.transitions.append((time.monotonic() - self.t0, state, reason, self.core.unlocks))
+            on_state(state, reason)
+        self.core.on_state = chained
+
+    def _on_frame(self, frame, source):
+        self.frames += 1
+        if hasattr(self.app, "_on_serial_frame"):
+            self.app._on_serial_frame(frame, source)
+
+    def _apply(self, kind, args):
+        if kind == "K" and args[0] == "unlock" and args[1] == "start":
+            return                          # heeft de app zelf al gedaan
+        super()._apply(kind, args)
+
+    def run(self, speed=1.0, until=None):
+        events = [e for e in self.events if until is None or e[0] <= until]
+        for t, kind, args in events:
+            self.root.after(max(0, int((self.t0 + t - time.monotonic()) * 1000)),
+                            self._apply, kind, args)
+        end = events[-1][0] if events else 0.0
+        self.root.after(max(0, int((self.t0 + end - time.monotonic()) * 1000)) + 200, self.root.quit)
+        self.root.mainloop()
+        return self
+
+
+# ----- vergelijken -----
+def expected_outcome(meta, events):
+    """Eindtoestand en unlocks volgens de opname: E-regel, anders de laatste X."""
+    for _, kind, args in reversed(events):
+        if kind == "E":
+            return args[0], int(args[1])
+    for _, kind, args in reversed(events):
+        if kind == "X":
+            return args[0], int(args[2])
+    return meta["state"], 0
+
+
+def compare(replay, tolerance_ms=TOLERANCE_MS):
+    """
+    Afgespeeld tegen opgenomen: eindtoestand, aantal unlocks en de reeks
+    toestandswissels met hun grootste tijdsafwijking. Retourneert (ok, regels).
+    """
+    meta, events = replay.meta, replay.events
+    want_state, want_unlocks = expected_outcome(meta, events)
+    recorded = [(t, a[0], a[1], int(a[2])) for t, k, a in events if k == "X"]
+    got = replay.transitions
+    ok = True
+    lines = []
+
+    if replay.core.state != want_state:
+        ok = False
+        lines.append(f"eindtoestand {replay.core.state}, opgenomen {want_state}")
+    if replay.core.unlocks != want_unlocks:
+        ok = False
+        lines.append(f"unlocks {replay.core.unlocks}, opgenomen {want_unlocks}")
+
+    drift = 0.0
+    for i, (rec, new) in enumerate(zip(recorded, got)):
+        if rec[1:] != new[1:]:
+            ok = False
+            lines.append(f"eerste afwijking bij wissel {i}: opgenomen {rec[1:]} op {rec[0]:.3f} s, "
+                         f"afgespeeld {new[1:]} op {new[0]:.3f} s")
+            break
+        drift = max(drift, abs(rec[0] - new[0]))
+    else:
+        if len(recorded) != len(got):
+            ok = False
+            lines.append(f"{len(got)} wissels afgespeeld, {len(recorded)} opgenomen")
+    if drift * 1000.0 > tolerance_ms:
+        ok = False
+    lines.append(f"{len(got)} wissels, {replay.core.unlocks} unlocks, eindtoestand "
+                 f"{replay.core.state}, grootste tijdsafwijking {drift * 1000:.1f} ms")
+    return ok, lines
+
+
+# ----- synthetische opname (--bench) -----
+SYNTH_META = {
+    "app": "synthetisch", "relock_seconds": 240.0, "max_len": 32, "allowed": "digit",
+    "trigger_word": "TRIGGER", "card_prefix": "CARD ", "trigger_min_interval": 1.0,
+}
+SYNTH_PORTS = ("/dev/ttyACM0", "/dev/ttyACM1")
+
+
+def _chunks(rng, data):
+    """Bytes in 1-3 willekeurige stukken, zoals ze over USB binnen kunnen komen."""
+    cuts = sorted(rng.sample(range(1, len(data)), min(len(data) - 1, rng.randint(0, 2))))
+    return [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+
+
+def record_synthetic(cycles, seed=1):
+    """
+    Draait de headless keten 'live' met een TraceRecorder eraan en willekeurige
+    invoer (stuiterende triggers, kaarten, keypad, besturing, ruis).
+    Retourneert (trace-regels, seconden voor het opnemen).
+    """
+    rng = random.Random(seed)
+    meta = dict(SYNTH_META, state=UNLOCKED)
+    live = HeadlessReplay(meta, [])
+    rec = TraceRecorder(None, meta, clock=live.clock)
+    uids = [f"04{rng.getrandbits(32):08X}" for _ in range(20)]
+    table = {u: (None if i % 7 == 0 else rng.choice((0, 30, 300))) for i, u in enumerate(uids)}
+    live.cards = types.SimpleNamespace(check=lambda uid: table.get(uid.strip()))
+    rec.attach_cards(live.cards)
+    rec.attach_core(live.core)
+    parsers = {p: FrameParser() for p in SYNTH_PORTS}
+    loop, core = live.loop, live.core
+
+    def serial(port, data):
+        for part in _chunks(rng, data):
+            rec.serial_bytes(part, port)
+            for frame in parsers[port].feed(part, live.clock()):
+                live._on_frame(frame, port)
+            loop.run_due()
+            loop.advance(0.001)
+
+    t0 = time.perf_counter()
+    core.unlock("start", relock_after=60.0)
+    for _ in range(cycles):
+        loop.advance(rng.expovariate(1 / 90.0))
+        r = rng.random()
+        port = rng.choice(SYNTH_PORTS)
+        if r < 0.45:
+            serial(port, b"TRIGGER\r\n")
+            if rng.random() < 0.3:                  # contact stuitert
+                loop.advance(rng.uniform(0.02, 0.2))
+                serial(port, b"TRIGGER\r\n")
+        elif r < 0.65:
+            uid = rng.choice(uids) if rng.random() < 0.8 else f"04{rng.getrandbits(32):08X}"
+            serial(port, f"CARD {uid}\r\n".encode())
+        elif r < 0.85:
+            for _ in range(4):
+                if rng.random() < 0.5:
+                    core.press(str(rng.randint(0, 9)))
+                else:
+                    core.type_char(str(rng.randint(0, 9)))
+                loop.advance(0.3)
+            if rng.random() < 0.1:
+                core.press(rng.choice((KEY_BACKSPACE, KEY_CLEAR)))
+            live._verdict = rng.random() < 0.6
+            core.submit()
+        elif r < 0.93:
+            serial(port, rng.choice((b"xx\r\n", b"TRIG", b"\x00\xff\r\n")))
+        elif r < 0.97:
+            core.lock("extern")
+        else:
+            core.unlock("extern", relock_after=rng.choice((None, 60.0)))
+        loop.run_due()
+    rec.close()
+    return rec.lines, time.perf_counter() - t0
+
+
+def drop_first_trigger(lines):
+    """Kopie van de trace zonder de eerste S-regel met een complete TRIGGER (negatieve controle)."""
+    out, dropped = [], False
+    needle = b"TRIGGER\r\n".hex()
+    for line in lines:
+        parts = line.split("\t")
+        if not dropped and len(parts) == 4 and parts[1] == "S" and parts[3] == needle:
+            dropped = True
+            continue
+        out.append(line)
+    return out
+
+
+def bench(args):
+    ok = True
+    lines, rec_s = record_synthetic(args.cycles, args.seed)
+    meta, events = parse_trace(lines)
+    raw = ("\n".join(lines) + "\n").encode()
+    print(f"opname: {args.cycles} cycli, {len(events)} events, {len(raw) / 1e3:.0f} kB "
+          f"({len(gzip.compress(raw)) / 1e3:.0f} kB gzip), "
+          f"{rec_s / len(events) * 1e6:.1f} us per event incl. opnemen")
+    if args.save:
+        Path(args.save).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    t0 = time.perf_counter()
+    replay = HeadlessReplay(meta, events).run(speed=0)
+    dt = time.perf_counter() - t0
+    good, report = compare(replay, args.tolerance_ms)
+    span = events[-1][0]
+    print(f"replay: {len(events) / dt:,.0f} events/s, {span / dt:,.0f}x realtime "
+          f"({span / 3600:.1f} uur in {dt:.2f} s)  {'ok' if good else 'FOUT'}")
+    for line in report:
+        print("   ", line)
+    ok &= good
+
+    meta2, events2 = parse_trace(drop_first_trigger(lines))
+    good, _ = compare(HeadlessReplay(meta2, events2).run(speed=0), args.tolerance_ms)
+    print(f"gemiste trigger wordt opgemerkt: {'ok' if not good else 'FOUT'}")
+    ok &= not good
+
+    # tempo: een stuk van de trace op 100x, de wandklok moet meelopen
+    window = 100.0 * args.pace_seconds
+    t0 = time.perf_counter()
+    HeadlessReplay(meta, events).run(speed=100.0, until=window)
+    wall = time.perf_counter() - t0
+    last = max((t for t, _, _ in events if t <= window), default=0.0)
+    good = abs(wall - last / 100.0) < 0.25
+    print(f"100x: {last:.0f} s trace in {wall:.2f} s (verwacht {last / 100.0:.2f} s)  "
+          f"{'ok' if good else 'FOUT'}")
+    ok &= good
+    return ok
+
+
+def load_app(name):
+    import tkinter as tk
+    from soak import load_app_module
+    root = tk.Tk()
+    mod = load_app_module(name, fast_timers=False)
+    return (mod.DisplayLockApp if name == "displaylock" else mod.SacoaOverlayApp)(root)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("trace", nargs="?", help="lktrace-bestand (.gz mag)")
+    ap.add_argument("--speed", type=float, default=0.0, help="1 = realtime, 100 = 100x, 0 = max")
+    ap.add_argument("--cards", help="kaartenbestand opnieuw toepassen i.p.v. opgenomen beslissingen")
+    ap.add_argument("--app", choices=["sacoa", "displaylock"], help="in de echte app afspelen")
+    ap.add_argument("--tolerance-ms", type=float, default=TOLERANCE_MS)
+    ap.add_argument("--bench", action="store_true", help="synthetische opname + replay meten")
+    ap.add_argument("-n", "--cycles", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--pace-seconds", type=float, default=2.0, help="duur van de 100x-controle")
+    ap.add_argument("--save", help="bij --bench: synthetische trace hier bewaren")
+    args = ap.parse_args()
+
+    if args.bench:
+        ok = bench(args)
+    elif args.trace:
+        meta, events = read_trace(args.trace)
+        print(f"{args.trace}: {meta.get('app', '?')}, {len(events)} events, "
+              f"{events[-1][0] if events else 0:.1f} s")
+        if args.app:
+            replay = AppReplay(load_app(args.app), meta, events).run()
+        else:
+            cards = None
+            if args.cards:
+                from card_store import CardStore
+                cards = CardStore(Path(args.cards))
+                cards.load()
+            t0 = time.perf_counter()
+            replay = HeadlessReplay(meta, events, cards).run(speed=args.speed)
+            print(f"afgespeeld in {time.perf_counter() - t0:.2f} s, {replay.frames} regels, "
+                  f"triggers {replay.gate.stats()}")
+        ok, report = compare(replay, args.tolerance_ms)
+        for line in report:
+            print("   ", line)
+    else:
+        ap.error("geef een trace of --bench")
+    print("OK" if ok else "AFWIJKING")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
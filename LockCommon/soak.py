@@ -0,0 +1,291 @@
+"""
+soak.py
+
+Duurtest (soak) voor de lock-apps: tienduizenden lock/unlock/relock-cycli
+in versnelde tijd, met periodieke metingen van
+- RSS van het proces
+- tracemalloc: huidig geheugen en de grootste allocatieplekken
+- aantal threads
+- aantal Tk-widgets en Tk-images
+
+Het resultaat is een tijdreeks (CSV) plus een samenvatting. De run faalt
+(exitcode 1) als een van de reeksen na de opwarmfase gestaag blijft groeien.
+
+Modi:
+    --app displaylock   echte DisplayLockApp (display nodig)
+    --app sacoa         echte SacoaOverlayApp (display nodig)
+    --app core          alleen LockCore + TkScheduler op een HeadlessLoop
+
+Onder Linux zonder scherm:
+    xvfb-run -s "-screen 0 1920x1080x24" python soak.py --app sacoa -n 20000
+"""
+
+import argparse
+import csv
+import gc
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+APPS = {
+    "displaylock": HERE.parent / "DisplayLock" / "overlay_lock.py",
+    "sacoa": HERE.parent / "SacoaDisplayLock" / "sacoa_overlay_lock.py",
+}
+FAST_TIMERS = {"start_lock_delay_seconds": 0.0, "auto_relock_seconds": 0.002, "keep_alive_ms": 5,
+               "frame_refresh_seconds": 0.05, "trigger_min_interval": 0.0}
+# bestanden die de apps naast zichzelf lezen (meekopiëren) en schrijven (omleiden)
+COPIED_FILES = ("PINS_FILENAME", "CARDS_FILENAME")
+WRITTEN_FILES = ("AUDIT_FILE", "METRICS_FILE")
+WARMUP_FRACTION = 0.2       # eerste deel van de samples telt niet mee voor groei
+# toegestane groei over de hele run (na opwarmen) per reeks
+TOLERANCE = {"rss_kb": 8192, "traced_kb": 1024, "threads": 0, "widgets": 0, "images": 0}
+
+
+# ----- metingen -----
+def current_rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PMC(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (n, ctypes.c_size_t) for n in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                    "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        pmc = PMC()
+        pmc.cb = ctypes.sizeof(PMC)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+        return pmc.WorkingSetSize // 1024
+    except Exception:
+        return 0
+
+
+def count_widgets(root):
+    if root is None:
+        return 0
+    n, stack = 0, [root]
+    while stack:
+        w = stack.pop()
+        n += 1
+        stack.extend(w.winfo_children())
+    return n
+
+
+def count_images(root):
+    if root is None:
+        return 0
+    try:
+        return len(root.tk.splitlist(root.tk.call("image", "names")))
+    except Exception:
+        return 0
+
+
+def top_allocators(limit=3):
+    snap = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+    out = []
+    for stat in snap.statistics("lineno")[:limit]:
+        fr = stat.traceback[0]
+        out.append(f"{os.path.basename(fr.filename)}:{fr.lineno}={stat.size // 1024}KB")
+    return " ".join(out)
+
+
+class Sampler:
+    FIELDS = ("cycle", "t", "rss_kb", "traced_kb", "threads", "widgets", "images", "top")
+
+    def __init__(self, root, path):
+        self.root = root
+        self.rows = []
+        self.t0 = time.monotonic()
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=self.FIELDS)
+        self._w.writeheader()
+
+    def sample(self, cycle):
+        gc.collect()
+        row = {
+            "cycle": cycle,
+            "t": round(time.monotonic() - self.t0, 3),
+            "rss_kb": current_rss_kb(),
+            "traced_kb": tracemalloc.get_traced_memory()[0] // 1024,
+            "threads": threading.active_count(),
+            "widgets": count_widgets(self.root),
+            "images": count_images(self.root),
+            "top": top_allocators(),
+        }
+        self.rows.append(row)
+        self._w.writerow(row)
+        self._f.flush()
+        return row
+
+    def close(self):
+        self._f.close()
+
+
+def growth_report(rows):
+    """
+    Per reeks: groei tussen het eerste en laatste kwart (na opwarmen) en of
+    die 'monotoon' is: het minimum van het laatste kwart ligt boven het
+    maximum van het eerste kwart.
+    """
+    start = int(len(rows) * WARMUP_FRACTION)
+    rows = rows[start:]
+    result = {}
+    if len(rows) < 4:
+        return result
+    q = max(1, len(rows) // 4)
+    for key, tol in TOLERANCE.items():
+        first = [r[key] for r in rows[:q]]
+        last = [r[key] for r in rows[-q:]]
+        grow = last[-1] - first[0]
+        monotonic = min(last) > max(first)
+        result[key] = (grow, monotonic and grow > tol)
+    return result
+
+
+# ----- drivers -----
+def load_app_module(name, fast_timers=True, workdir=None):
+    path = APPS[name]
+    sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(f"soak_{name}", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    # niet in de echte app-map schrijven (auditlog, pins-/kaartcache, metrics): alles naar
+    # workdir; pins en kaarten gaan mee zodat --pin en de kaartlijst blijven werken
+    workdir = workdir or tempfile.mkdtemp(prefix="soak_")
+    for attr in COPIED_FILES + WRITTEN_FILES:
+        filename = getattr(mod, attr, "")
+        if not filename:
+            continue
+        target = Path(workdir) / filename
+        if attr in COPIED_FILES and (path.parent / filename).is_file():
+            shutil.copy2(path.parent / filename, target)
+        setattr(mod, attr, str(target))
+    # geen lokale lock_config.json meenemen: standaardwaarden (+ FAST_TIMERS)
+    os.environ["LOCK_CONFIG"] = str(HERE / "soak_geen_config.json")
+    if fast_timers:
+        # versnelde tijd: alle wachttijden naar (bijna) nul, buiten de grenzen van het bestand om
+        class FastConfig(mod.LockConfig):
+            def load(self):
+                ok = super().load()
+                self.values = dict(self.values, **{k: v for k, v in FAST_TIMERS.items()
+                                                   if k in self.values})
+                return ok
+        mod.LockConfig = FastConfig
+    return mod
+
+
+def pump(root, until, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not until() and time.monotonic() < end:
+        root.update()
+        time.sleep(0.0005)
+
+
+def drive_displaylock(app, root, i, pin):
+    app.lock_now()
+    root.update()
+    for ch in pin:
+        app.core.type_char(ch)
+    app.try_unlock()
+    app.topmost.check()
+    if i % 50 == 0:
+        # lock-knop weg (Alt+F4): de periodieke controle moet hem zelf herbouwen
+        app.lock_btn_win.destroy()
+        app.topmost.check()
+        assert app.lock_btn_win.winfo_exists(), "lock-knop niet herbouwd"
+    root.update()
+
+
+def drive_sacoa(app, root, i, pin):
+    from lock_core import LOCKED
+    if i % 20 == 0:
+        app._on_service_pressed()
+        for ch in pin:
+            app.core.type_char(ch)
+        app._keypad_try_unlock()
+    else:
+        app.on_serial_trigger(time.monotonic())
+    pump(root, lambda: app.core.state == LOCKED)
+
+
+def make_core_driver():
+    from lock_core import LockCore, UNLOCKED, single_pin_verifier
+    from tk_scheduler import TkScheduler, HeadlessLoop
+    loop = HeadlessLoop()
+    sched = TkScheduler(loop, clock=loop.clock)
+    core = LockCore(sched, single_pin_verifier("1423"), relock_seconds=240.0, state=UNLOCKED)
+
+    def drive(_app, _root, i, pin):
+        if i % 3 == 0:
+            for ch in pin:
+                core.type_char(ch)
+            core.submit()
+        else:
+            core.trigger()
+        loop.advance(241.0)
+    return core, drive
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--app", choices=["displaylock", "sacoa", "core"], default="core")
+    ap.add_argument("-n", "--cycles", type=int, default=20000)
+    ap.add_argument("--samples", type=int, default=40)
+    ap.add_argument("--pin", default="1423")
+    ap.add_argument("--report", default="soak_report.csv")
+    args = ap.parse_args()
+
+    tracemalloc.start(5)
+    root = None
+    workdir = tempfile.mkdtemp(prefix="soak_")
+    if args.app == "core":
+        app, drive = make_core_driver()
+    else:
+        import tkinter as tk
+        root = tk.Tk()
+        mod = load_app_module(args.app, workdir=workdir)
+        app = (mod.DisplayLockApp if args.app == "displaylock" else mod.SacoaOverlayApp)(root)
+        drive = drive_displaylock if args.app == "displaylock" else drive_sacoa
+        root.update()
+
+    sampler = Sampler(root, args.report)
+    every = max(1, args.cycles // args.samples)
+    t0 = time.monotonic()
+    for i in range(args.cycles):
+        drive(app, root, i, args.pin)
+        if i % every == 0:
+            row = sampler.sample(i)
+            print(f"{i:7} rss {row['rss_kb']:7} KB  traced {row['traced_kb']:6} KB  "
+                  f"threads {row['threads']:2}  widgets {row['widgets']:4}  "
+                  f"images {row['images']:3}  {row['top']}")
+    sampler.sample(args.cycles)
+    sampler.close()
+    dt = time.monotonic() - t0
+
+    report = growth_report(sampler.rows)
+    failed = [k for k, (_, bad) in report.items() if bad]
+    print(f"\n{args.cycles} cycli in {dt:.1f} s ({args.cycles/dt:,.0f}/s), rapport: {args.report}")
+    for key, (grow, bad) in report.items():
+        print(f"  {key:10} groei {grow:+8}  {'GROEIT' if bad else 'ok'}")
+    print("FOUT: " + ", ".join(failed) if failed else "OK")
+    shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
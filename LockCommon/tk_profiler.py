@@ -0,0 +1,201 @@
+"""
+tk_profiler.py
+
+Opt-in profiler voor de Tk-lus: meet hoe lang elke ``after``-callback en
+event-binding duurt, detecteert haperingen met een watchdog-thread en
+schrijft periodiek een overzicht van de traagste callbacks.
+
+Aanzetten met de omgevingsvariabele ``LOCK_PROFILE=1`` (of ``--profile`` op de
+opdrachtregel). Staat het uit, dan wordt er niets gepatcht.
+
+- Elke callback zet bij start een 'hartslag'; de watchdog kijkt om de
+  ``STALL_POLL`` seconden of de huidige callback langer loopt dan
+  ``threshold_ms`` en dumpt dan de stack van de Tk-thread (één keer per hapering).
+- ``report_every`` seconden wordt de top-N traagste callbacks naar het
+  rapportbestand geschreven.
+"""
+
+import functools
+import os
+import sys
+import threading
+import time
+import traceback
+
+ENV_VAR = "LOCK_PROFILE"
+STALL_THRESHOLD_MS = 200
+STALL_POLL = 0.05
+TOP_N = 15
+
+
+def profiling_requested(argv=None):
+    argv = sys.argv if argv is None else argv
+    return os.environ.get(ENV_VAR, "") not in ("", "0") or "--profile" in argv
+
+
+def _callback_name(fn):
+    f = getattr(fn, "__func__", fn)
+    name = getattr(f, "__qualname__", None) or repr(f)
+    code = getattr(f, "__code__", None)
+    if code is not None and name == "<lambda>":
+        name = f"<lambda {os.path.basename(code.co_filename)}:{code.co_firstlineno}>"
+    return name
+
+
+class CallbackStats:
+    __slots__ = ("calls", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+
+class TkProfiler:
+    def __init__(self, root, report_path, threshold_ms=STALL_THRESHOLD_MS, report_every=60.0,
+                 scheduler=None):
+        self.root = root
+        self.scheduler = scheduler
+        self.report_path = report_path
+        self.threshold_ms = threshold_ms
+        self.report_every = report_every
+        self.stats = {}
+        self.stalls = 0
+        self._lock = threading.Lock()
+        self._tk_thread = threading.get_ident()
+        self._current = None        # (naam, starttijd) van de lopende callback
+        self._reported = None       # voorkomt dubbele dumps voor dezelfde hapering
+        self._stop = threading.Event()
+        self._orig = {}
+        self._wrapped_cmds = set()
+
+    # ----- installeren -----
+    def install(self):
+        """Patch ``Misc.after``/``after_idle``/``bind`` zodat alle callbacks gemeten worden."""
+        import tkinter as tk
+        misc = tk.Misc
+        prof = self
+        self._orig = {"after": misc.after, "after_idle": misc.after_idle, "bind": misc.bind}
+
+        def after(widget, ms, func=None, *args):
+            if func is None:
+                return prof._orig["after"](widget, ms)
+            return prof._orig["after"](widget, ms, prof.wrap(func), *args)
+
+        def after_idle(widget, func, *args):
+            return prof._orig["after_idle"](widget, prof.wrap(func), *args)
+
+        def bind(widget, sequence=None, func=None, add=None):
+            if func is not None:
+                func = prof.wrap(func, f"bind {sequence} {_callback_name(func)}")
+            return prof._orig["bind"](widget, sequence, func, add)
+
+        misc.after, misc.after_idle, misc.bind = after, after_idle, bind
+        if self.scheduler is not None:
+            self.scheduler.wrap = self.wrap
+        threading.Thread(target=self._watchdog, name="TkWatchdog", daemon=True).start()
+        self._schedule_report()
+        return self
+
+    def uninstall(self):
+        import tkinter as tk
+        for k, v in self._orig.items():
+            setattr(tk.Misc, k, v)
+        if self.scheduler is not None:
+            self.scheduler.wrap = None
+        self._stop.set()
+
+    def wrap(self, fn, label=None):
+        """Wikkel een callback zodat duur en hartslag worden bijgehouden."""
+        name = label or _callback_name(fn)
+        prof = self
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            outer = prof._current           # geneste callbacks (scheduler binnen after)
+            prof._current = (name, t0)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                prof._current = outer
+                prof._record(name, (time.perf_counter() - t0) * 1000.0)
+        return wrapper
+
+    def wrap_commands(self, widget):
+        """
+        ``command=``-opties van knoppen lopen niet via bind of after; loop de
+        widgetboom af en wikkel ze. Veilig om herhaald aan te roepen (nieuwe
+        vensters zoals het Service-keypad worden dan ook meegenomen).
+        """
+        try:
+            cmd = str(widget.cget("command"))
+        except Exception:
+            cmd = ""
+        if cmd and cmd not in self._wrapped_cmds:
+            try:
+                label = f"command {widget.cget('text') or widget.winfo_name()}"
+            except Exception:
+                label = f"command {widget.winfo_name()}"
+            widget.configure(command=self.wrap(lambda c=cmd, w=widget: w.tk.call(c), label))
+            self._wrapped_cmds.add(str(widget.cget("command")))
+        for child in widget.winfo_children():
+            self.wrap_commands(child)
+
+    # ----- meten -----
+    def _record(self, name, ms):
+        with self._lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = self.stats[name] = CallbackStats()
+            s.calls += 1
+            s.total_ms += ms
+            if ms > s.max_ms:
+                s.max_ms = ms
+
+    def _watchdog(self):
+        while not self._stop.wait(STALL_POLL):
+            cur = self._current
+            if cur is None:
+                self._reported = None
+                continue
+            name, t0 = cur
+            ms = (time.perf_counter() - t0) * 1000.0
+            if ms >= self.threshold_ms and self._reported is not cur:
+                self._reported = cur
+                self.stalls += 1
+                frame = sys._current_frames().get(self._tk_thread)
+                stack = "".join(traceback.format_stack(frame)) if frame else "(geen stack)\n"
+                self._append(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] HAPERING "
+                             f"{ms:.0f} ms in {name}\n{stack}\n")
+
+    # ----- rapporteren -----
+    def summary(self, top=TOP_N):
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda kv: kv[1].max_ms, reverse=True)[:top]
+            lines = [f"{'max ms':>9} {'gem ms':>8} {'aantal':>8}  callback"]
+            for name, s in rows:
+                lines.append(f"{s.max_ms:9.1f} {s.total_ms / s.calls:8.2f} {s.calls:8}  {name}")
+        return "\n".join(lines)
+
+    def _schedule_report(self):
+        def report():
+            self.wrap_commands(self.root)
+            self._append(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] traagste callbacks "
+                         f"(haperingen: {self.stalls})\n{self.summary()}\n\n")
+            self._orig["after"](self.root, int(self.report_every * 1000), report)
+        self._orig["after"](self.root, int(self.report_every * 1000), report)
+
+    def _append(self, text):
+        try:
+            with open(self.report_path, "a", encoding="utf-8") as f:
+                f.write(text)
+        except OSError:
+            pass
+
+
+def maybe_install(root, report_path, **kwargs):
+    """Installeer de profiler als die gevraagd is; anders None."""
+    if not profiling_requested():
+        return None
+    return TkProfiler(root, report_path, **kwargs).install()
@@ -0,0 +1,223 @@
+"""
+tk_scheduler.py
+
+Eén event-scheduler bovenop de Tk-lus, gedeeld door DisplayLock en SacoaDisplayLock.
+
+Alle timers (startvertraging, auto-relock, keep-alive, debounce) staan in
+één heap met deadlines op een monotone klok. Er staat steeds hoogstens één
+``root.after`` uit, voor de eerstvolgende deadline. Er worden dus geen
+threads meer gestart per timer, en een klokverzetting van Windows heeft
+geen invloed.
+
+``cancel()`` markeert alleen; geannuleerde items worden lui opgeruimd en de
+heap wordt gecompacteerd zodra meer dan de helft ervan geannuleerd is, zodat
+het geheugen vlak blijft bij tienduizenden herplanningen.
+
+Alles draait op de Tk-thread; roep de scheduler niet aan vanuit andere threads.
+"""
+
+import heapq
+import itertools
+import math
+import sys
+import time
+import traceback
+
+COMPACT_MIN = 64    # pas compacteren als de heap minstens zo groot is
+
+
+class TimerHandle:
+    __slots__ = ("due", "seq", "fn", "args", "interval", "cancelled", "_sched")
+
+    def __init__(self, sched, due, seq, fn, args, interval):
+        self._sched = sched
+        self.due = due
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.due, self.seq) < (other.due, other.seq)
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.fn = self.args = None
+            self._sched._on_cancel()
+
+    @property
+    def active(self):
+        return not self.cancelled
+
+
+class TkScheduler:
+    def __init__(self, root, clock=time.monotonic):
+        self.root = root
+        self.clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._cancelled = 0
+        self._after_id = None
+        self._armed_for = None
+        self.fired = 0
+        self.errors = 0
+        self.wrap = None        # optioneel: profiler die elke callback wikkelt (tk_profiler)
+
+    # ----- publiek -----
+    def now(self):
+        return self.clock()
+
+    def call_later(self, delay, fn, *args):
+        """Roep ``fn(*args)`` over ``delay`` seconden aan. Retourneert een ``TimerHandle``."""
+        return self._push(self.clock() + max(0.0, delay), fn, args, None)
+
+    def call_every(self, interval, fn, *args):
+        """Herhaal ``fn(*args)`` elke ``interval`` seconden (eerste keer direct)."""
+        return self._push(self.clock(), fn, args, interval)
+
+    def pending(self):
+        return len(self._heap) - self._cancelled
+
+    def close(self):
+        for h in self._heap:
+            h.cancelled = True
+        self._heap.clear()
+        self._cancelled = 0
+        self._disarm()
+
+    # ----- intern -----
+    def _push(self, due, fn, args, interval):
+        if self.wrap is not None:
+            fn = self.wrap(fn)
+        h = TimerHandle(self, due, next(self._seq), fn, args, interval)
+        heapq.heappush(self._heap, h)
+        if self._armed_for is None or due < self._armed_for:
+            self._arm()
+        return h
+
+    def _on_cancel(self):
+        self._cancelled += 1
+        if self._cancelled > COMPACT_MIN and self._cancelled * 2 > len(self._heap):
+            self._heap = [h for h in self._heap if not h.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def _pop_cancelled(self):
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+
+    def _disarm(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+        self._after_id = None
+        self._armed_for = None
+
+    def _arm(self):
+        self._disarm()
+        self._pop_cancelled()
+        if not self._heap:
+            return
+        due = self._heap[0].due
+        # naar boven afronden: nooit vóór de deadline wakker worden (anders een lege ronde)
+        ms = max(0, math.ceil((due - self.clock()) * 1000))
+        self._armed_for = due
+        self._after_id = self.root.after(ms, self._run)
+
+    def _run(self):
+        self._after_id = None
+        self._armed_for = None
+        now = self.clock()
+        while self._heap and (self._heap[0].cancelled or self._heap[0].due <= now):
+            h = heapq.heappop(self._heap)
+            if h.cancelled:
+                self._cancelled -= 1
+                continue
+            fn, args = h.fn, h.args
+            if h.interval is not None:
+                h.due = max(h.due + h.interval, now)
+                h.seq = next(self._seq)
+                heapq.heappush(self._heap, h)
+            else:
+                h.cancelled = True      # eenmalig: klaar
+                h.fn = h.args = None
+            self.fired += 1
+            try:
+                fn(*args)
+            except Exception:
+                # melden zoals een gewone root.after (bijv. een mislukte relock), maar doorgaan
+                self.errors += 1
+                self._report()
+        self._arm()
+
+    def _report(self):
+        report = getattr(self.root, "report_callback_exception", None)
+        if report is not None:
+            report(*sys.exc_info())
+        else:
+            traceback.print_exc()
+
+
+class HeadlessLoop:
+    """
+    Tk-vrije stand-in met dezelfde ``after``/``after_cancel``-interface, voor
+    benchmarks en headless runs. Met ``clock`` als virtuele klok kan de tijd
+    versneld worden via ``advance``.
+    """
+
+    def __init__(self, clock=None):
+        self._virtual = clock is None
+        self._t = 0.0
+        self.clock = (lambda: self._t) if clock is None else clock
+        self._q = []
+        self._ids = itertools.count(1)
+        self._live = {}
+
+    def after(self, ms, fn=None, *args):
+        aid = f"after#{next(self._ids)}"
+        heapq.heappush(self._q, (self.clock() + ms / 1000.0, aid))
+        self._live[aid] = (fn, args)
+        return aid
+
+    def after_cancel(self, aid):
+        self._live.pop(aid, None)
+
+    def after_idle(self, fn, *args):
+        return self.after(0, fn, *args)
+
+    def pending(self):
+        return len(self._live)
+
+    def run_due(self):
+        """Voer alle callbacks uit waarvan de tijd verstreken is."""
+        n = 0
+        while self._q and self._q[0][0] <= self.clock():
+            _, aid = heapq.heappop(self._q)
+            cb = self._live.pop(aid, None)
+            if cb:
+                cb[0](*cb[1])
+                n += 1
+        if len(self._q) > 4 * len(self._live) + COMPACT_MIN:
+            self._q = [e for e in self._q if e[1] in self._live]
+            heapq.heapify(self._q)
+        return n
+
+    def advance(self, seconds):
+        """Virtuele klok vooruit zetten en alles wat daardoor vervalt uitvoeren."""
+        if not self._virtual:
+            raise RuntimeError("advance() werkt alleen met de virtuele klok")
+        end = self._t + seconds
+        while True:
+            self.run_due()
+            while self._q and self._q[0][1] not in self._live:
+                heapq.heappop(self._q)
+            if not self._q or self._q[0][0] > end:
+                break
+            self._t = max(self._t, self._q[0][0])
+        self._t = end
+        self.run_due()
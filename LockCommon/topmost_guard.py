@@ -0,0 +1,235 @@
+"""
+topmost_guard.py
+
+Vensters zichtbaar en bovenaan houden zonder de window manager elke seconde
+lastig te vallen.
+
+Vroeger riep een timer elke KEEP_ALIVE_MS onvoorwaardelijk ``deiconify``,
+``geometry``, ``lift`` en ``attributes("-topmost", True)`` aan, en plande
+``<Unmap>`` daar nog extra aanroepen bij. Nu:
+
+- Events (``<Unmap>``, ``<Visibility>`` obscured, ``<Configure>`` naar een
+  andere plek, ``<FocusOut>``) plannen één samengevoegde controle na
+  ``settle`` seconden.
+- Elke ``interval`` seconden een goedkope controle met alleen ``winfo``-
+  vragen: gemapt? op de juiste plek? is het middelpunt nog van dit venster
+  (``winfo_containing``)? heeft de app de focus nog? Dat vangt ook platforms
+  zonder Visibility-events (Windows).
+- Alleen wat echt mis is wordt hersteld: niet gemapt -> ``deiconify``,
+  verschoven -> ``geometry``, afgedekt -> ``lift`` + topmost, focus kwijt ->
+  ``focus_force``. Bestaat het venster niet meer (Alt+F4, extern gesloten),
+  dan bouwt ``on_lost`` het opnieuw op, net als de oude keep-alive deed.
+
+``poll=True`` geeft het oude gedrag (alles elke interval), om WM-aanroepen per
+minuut voor en na te kunnen vergelijken; zie bench_topmost.py.
+"""
+
+import time
+from collections import deque
+
+SETTLE = 0.05               # events kort samenvoegen (zelfde 50 ms als de oude <Unmap>-handler)
+_OBSCURED = ("VisibilityPartiallyObscured", "VisibilityFullyObscured")
+
+
+class _Target:
+    __slots__ = ("win", "geometry", "active", "focus", "on_lost", "dirty")
+
+    def __init__(self, win, geometry, active, focus, on_lost):
+        self.win = win
+        self.geometry = geometry    # (breedte, hoogte, x, y) of None
+        self.active = active        # callable: nu bewaken?
+        self.focus = focus          # ook de toetsenbordfocus terughalen
+        self.on_lost = on_lost      # callable: venster is weg, opnieuw opbouwen
+        self.dirty = False
+
+
+class TopmostGuard:
+    def __init__(self, scheduler, interval=1.0, settle=SETTLE, poll=False,
+                 metrics=None, metric="wm_calls", clock=time.monotonic):
+        self.scheduler = scheduler
+        self.interval = interval
+        self.settle = settle
+        self.poll = poll
+        self.metrics = metrics
+        self.metric = metric
+        self.clock = clock
+        self._targets = []
+        self._pending = None
+        self._recent = deque()      # tijdstippen van WM-aanroepen, laatste minuut
+        self._timer = None
+
+        self.wm_calls = 0
+        self.checks = 0
+        self.events = 0
+        self.repairs = 0
+
+    def add(self, win, geometry=None, active=None, focus=False, on_lost=None):
+        """
+        Venster bewaken; ``active()`` bepaalt of het nu boven moet zijn (standaard altijd).
+        ``on_lost()`` wordt aangeroepen als het venster vernietigd is; die bouwt een
+        nieuw venster en meldt het opnieuw aan (het oude doel vervalt).
+        """
+        target = _Target(win, geometry, active or (lambda: True), focus, on_lost)
+        self._targets.append(target)
+        if self.poll:
+            seqs = ("<Unmap>",)        # oud gedrag: alleen Unmap
+        else:
+            seqs = ("<Unmap>", "<Visibility>", "<Configure>") + (("<FocusOut>",) if focus else ())
+        for seq in seqs:
+            win.bind(seq, lambda e, t=target: self._on_event(t, e), add="+")
+        return target
+
+    def remove(self, target):
+        """Niet meer bewaken (bijv. venster opnieuw opgebouwd)."""
+        if target in self._targets:
+            self._targets.remove(target)
+
+    def start(self):
+        if self._timer is None:
+            self._timer = self.scheduler.call_every(self.interval, self.check)
+        return self
+
+    def stop(self):
+        for h in (self._timer, self._pending):
+            if h is not None:
+                h.cancel()
+        self._timer = self._pending = None
+
+    # ----- events -----
+    def _on_event(self, target, event):
+        kind = getattr(event.type, "name", event.type)     # tkinter.EventType of een naam
+        # bindings op een Toplevel krijgen ook de events van de kinderen
+        if event.widget is not target.win and kind != "FocusOut":
+            return
+        if kind == "Visibility" and event.state not in _OBSCURED:
+            return
+        if kind == "Configure" and target.geometry is not None:
+            w, h, x, y = target.geometry
+            if (event.width, event.height) == (w, h) and self._position(target.win) == (x, y):
+                return
+        self.events += 1
+        target.dirty = True
+        if self._pending is None:
+            self._pending = self.scheduler.call_later(self.settle, self._run_pending)
+
+    def _run_pending(self):
+        self._pending = None
+        for target in list(self._targets):     # on_lost kan doelen vervangen
+            if target.dirty:
+                target.dirty = False
+                self._handle(target)
+
+    # ----- controle -----
+    def check(self):
+        """Periodiek: goedkope controle, of (poll=True) het oude onvoorwaardelijke herstel."""
+        self.checks += 1
+        for target in list(self._targets):     # on_lost kan doelen vervangen
+            self._handle(target)
+
+    def enforce(self, target):
+        """Direct bovenaan zetten (bijv. bij een toestandswissel), zonder eerst te controleren."""
+        self._repair(target, ("map", "place", "raise") + (("focus",) if target.focus else ()))
+
+    def _handle(self, target):
+        if not target.active():
+            return
+        if self.poll and not self._lost(target.win):
+            self._repair(target, ("map", "place", "raise"))
+            return
+        problems = self.inspect(target)
+        if problems:
+            self.repairs += 1
+            self._repair(target, problems)
+
+    def inspect(self, target):
+        """Wat er mis is, met alleen winfo-vragen (geen WM-aanroepen)."""
+        win = target.win
+        if self._lost(win):
+            return ("rebuild",)
+        try:
+            if not win.winfo_ismapped():
+                return ("map", "place", "raise") + (("focus",) if target.focus else ())
+            problems = []
+            if target.geometry is not None:
+                w, h, x, y = target.geometry
+                if (win.winfo_width(), win.winfo_height()) != (w, h) or self._position(win) != (x, y):
+                    problems.append("place")
+                cx, cy = x + w // 2, y + h // 2
+            else:
+                cx = win.winfo_rootx() + win.winfo_width() // 2
+                cy = win.winfo_rooty() + win.winfo_height() // 2
+            if not self._owns(win, win.winfo_containing(cx, cy)):
+                problems.append("raise")
+            if target.focus and win.focus_get() is None:
+                problems.append("focus")
+            return tuple(problems)
+        except Exception:           # venster weg of Tk al afgesloten
+            return ()
+
+    @staticmethod
+    def _owns(win, hit):
+        """Is ``hit`` het venster zelf of een kind ervan? (``.!toplevel12`` hoort niet bij ``.!toplevel1``)"""
+        if hit is None:
+            return False
+        h, w = str(hit), str(win)
+        return h == w or h.startswith(w + ".")
+
+    @staticmethod
+    def _lost(win):
+        try:
+            return not win.winfo_exists()
+        except Exception:           # Tk al afgesloten: niets meer te herstellen
+            return False
+
+    @staticmethod
+    def _position(win):
+        return win.winfo_rootx(), win.winfo_rooty()
+
+    def _repair(self, target, what):
+        win = target.win
+        if "rebuild" in what:
+            if target.on_lost is not None:
+                try:
+                    target.on_lost()
+                except Exception:
+                    pass
+            return
+        try:
+            if "map" in what:
+                win.deiconify()
+                self._count()
+            if "place" in what and target.geometry is not None:
+                w, h, x, y = target.geometry
+                win.geometry(f"{w}x{h}+{x}+{y}")
+                self._count()
+            if "raise" in what:
+                win.lift()
+                win.attributes("-topmost", True)
+                self._count(2)
+            if "focus" in what:
+                win.focus_force()
+                self._count()
+        except Exception:
+            pass
+
+    def _count(self, n=1):
+        self.wm_calls += n
+        now = self.clock()
+        recent = self._recent
+        recent.extend([now] * n)
+        while recent and now - recent[0] > 60.0:
+            recent.popleft()
+        if self.metrics is not None:
+            self.metrics.inc(self.metric, n)
+
+    # ----- status -----
+    def per_minute(self):
+        now = self.clock()
+        recent = self._recent
+        while recent and now - recent[0] > 60.0:
+            recent.popleft()
+        return len(recent)
+
+    def stats(self):
+        return {"wm_calls": self.wm_calls, "wm_calls_per_min": self.per_minute(),
+                "topmost_repairs": self.repairs, "topmost_events": self.events}
@@ -21,6 +21,11 @@
 # Dat betekent:
 #   - */5 : elke 5 minuten
 #   - * * * * : elk uur, elke dag, elke maand
+#
+# Liever niet meer gebruiken: wifi_watchdog.py
+# (zelfde map) draait continu, pingt meerdere
+# doelen per halve seconde en herstart pas na
+# meerdere mislukte rondes, met backoff.
 # ===============================================
 
 # Test of er een internetverbinding is door 1x te pingen
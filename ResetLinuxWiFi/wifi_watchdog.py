@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+wifi_watchdog.py
+
+Vervanger van checkwifi.sh: een blijvend draaiende watchdog (asyncio) die
+de internetverbinding van de Raspberry Pi bewaakt en wlan0 alleen herstart
+als de verbinding echt weg is.
+
+- Meerdere doelen tegelijk (ping en/of TCP-connect), elke PROBE_INTERVAL s.
+  Eén geslaagde probe per ronde = verbinding ok.
+- Pas na FAIL_THRESHOLD mislukte rondes op rij telt het als storing;
+  één verloren pakket leidt dus niet tot een herstart.
+- Herstarts met exponentiële backoff (RESTART_BACKOFF .. RESTART_BACKOFF_MAX),
+  zodat een langdurige storing (router uit) de interface niet blijft bouncen.
+- Logt per storing de detectietijd (eerste mislukte ronde -> storing) en de
+  hersteltijd (eerste mislukte ronde -> weer verbinding).
+
+Probes en de herstartactie zijn losse objecten; ``--selftest`` draait de hele
+watchdog tegen lokale TCP-servers en een nep-interface.
+
+Installeren (i.p.v. de crontab-regel van checkwifi.sh):
+    sudo cp wifi_watchdog.py /usr/local/bin/ && sudo chmod +x /usr/local/bin/wifi_watchdog.py
+    /etc/systemd/system/wifi-watchdog.service:
+        [Unit]
+        Description=Wi-Fi watchdog
+        After=network.target
+        [Service]
+        ExecStart=/usr/bin/python3 /usr/local/bin/wifi_watchdog.py
+        Restart=always
+        [Install]
+        WantedBy=multi-user.target
+    sudo systemctl enable --now wifi-watchdog
+"""
+
+import argparse
+import asyncio
+import logging
+import shutil
+import sys
+import time
+
+# ===== Instellingen =====
+INTERFACE = "wlan0"
+TARGETS = ["ping:8.8.8.8", "tcp:1.1.1.1:53", "tcp:8.8.8.8:53"]
+PROBE_INTERVAL = 0.5          # seconden tussen probe-rondes
+PROBE_TIMEOUT = 1.0           # per probe
+FAIL_THRESHOLD = 4            # mislukte rondes op rij voordat het een storing is
+RESTART_DOWN_SECONDS = 2      # tijd tussen 'down' en 'up' (zoals de sleep 2 in checkwifi.sh)
+RESTART_BACKOFF = 10.0        # minimaal zoveel s tussen herstarts; verdubbelt per herstart
+RESTART_BACKOFF_MAX = 300.0
+
+log = logging.getLogger("wifi_watchdog")
+
+
+# ===== Probes =====
+class TcpProbe:
+    """Geslaagd als een TCP-verbinding binnen de timeout lukt (bijv. DNS-poort 53)."""
+
+    def __init__(self, host, port, timeout=PROBE_TIMEOUT):
+        self.host, self.port, self.timeout = host, int(port), timeout
+        self.name = f"tcp:{host}:{port}"
+
+    async def __call__(self):
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+
+class PingProbe:
+    """Eén ICMP-echo via het systeem-``ping`` (geen root nodig voor raw sockets)."""
+
+    def __init__(self, host, timeout=PROBE_TIMEOUT):
+        self.host, self.timeout = host, timeout
+        self.name = f"ping:{host}"
+
+    async def __call__(self):
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "ping", "-c1", f"-W{max(1, round(self.timeout))}", self.host,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        except OSError:
+            return False
+        try:
+            return await asyncio.wait_for(proc.wait(), self.timeout + 1) == 0
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return False
+
+
+def make_probe(spec, timeout=PROBE_TIMEOUT):
+    """'ping:HOST' of 'tcp:HOST:POORT' -> probe."""
+    kind, _, rest = spec.partition(":")
+    if kind == "ping":
+        return PingProbe(rest, timeout)
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return TcpProbe(host, port, timeout)
+    raise ValueError(f"onbekend probe-type: {spec!r}")
+
+
+# ===== Herstartacties =====
+class InterfaceRestart:
+    """Interface down/up, met ``ip link`` of (oud) ``ifconfig``."""
+
+    def __init__(self, interface=INTERFACE, down_seconds=RESTART_DOWN_SECONDS):
+        self.interface = interface
+        self.down_seconds = down_seconds
+        self.name = f"restart {interface}"
+
+    async def _run(self, *args):
+        proc = await asyncio.create_subprocess_exec(*args)
+        return await proc.wait()
+
+    async def __call__(self):
+        if shutil.which("ip"):
+            down = ("ip", "link", "set", self.interface, "down")
+            up = ("ip", "link", "set", self.interface, "up")
+        else:
+            down = ("ifconfig", self.interface, "down")
+            up = ("ifconfig", self.interface, "up")
+        await self._run(*down)
+        await asyncio.sleep(self.down_seconds)
+        return await self._run(*up) == 0
+
+
+# ===== Watchdog =====
+class Watchdog:
+    def __init__(self, probes, restart, interval=PROBE_INTERVAL, threshold=FAIL_THRESHOLD,
+                 backoff=RESTART_BACKOFF, backoff_max=RESTART_BACKOFF_MAX, clock=time.monotonic):
+        self.probes = list(probes)
+        self.restart = restart
+        self.interval = interval
+        self.threshold = threshold
+        self.backoff_initial = backoff
+        self.backoff_max = backoff_max
+        self.clock = clock
+
+        self.fails = 0                  # mislukte rondes op rij
+        self.first_fail = None          # klok bij de eerste mislukte ronde van deze reeks
+        self.outage = False
+        self.backoff = backoff
+        self.next_restart = 0.0
+        self._stop = asyncio.Event()
+
+        self.rounds = 0
+        self.detections = 0
+        self.restarts = 0
+        self.recoveries = 0
+        self.detect_times = []          # s, per storing
+        self.recover_times = []
+
+    def stop(self):
+        self._stop.set()
+
+    async def probe_round(self):
+        """True als minstens één probe slaagt. Alle probes lopen tegelijk."""
+        results = await asyncio.gather(*(p() for p in self.probes), return_exceptions=True)
+        return any(r is True for r in results)
+
+    async def step(self):
+        now = self.clock()
+        ok = await self.probe_round()
+        self.rounds += 1
+        if ok:
+            if self.outage:
+                took = now - self.first_fail
+                self.recoveries += 1
+                self.recover_times.append(took)
+                log.info("verbinding hersteld na %.2f s (%d herstart(s))", took, self.restarts)
+            elif self.fails:
+                log.debug("%d losse mislukte ronde(s) genegeerd", self.fails)
+            self.fails = 0
+            self.first_fail = None
+            self.outage = False
+            self.backoff = self.backoff_initial
+            return
+
+        if self.fails == 0:
+            self.first_fail = now
+        self.fails += 1
+        if not self.outage and self.fails >= self.threshold:
+            self.outage = True
+            took = now - self.first_fail
+            self.detections += 1
+            self.detect_times.append(took)
+            log.warning("storing gedetecteerd na %.2f s (%d rondes)", took, self.fails)
+        if self.outage and now >= self.next_restart:
+            self.restarts += 1
+            self.next_restart = now + self.backoff
+            log.warning("%s (poging %d, volgende niet voor %.0f s)",
+                        self.restart.name, self.restarts, self.backoff)
+            self.backoff = min(self.backoff * 2, self.backoff_max)
+            try:
+                await self.restart()
+            except Exception:
+                log.exception("herstart mislukt")
+
+    async def run(self):
+        log.info("watchdog gestart: %s, elke %.2f s, storing na %d rondes",
+                 ", ".join(p.name for p in self.probes), self.interval, self.threshold)
+        while not self._stop.is_set():
+            t0 = self.clock()
+            await self.step()
+            delay = max(0.0, self.interval - (self.clock() - t0))
+            try:
+                await asyncio.wait_for(self._stop.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+# ===== Zelftest met lokale stand-ins =====
+class FakeInterface:
+    """Nep-interface: 'herstart' zet de lokale servers na ``heal_after`` herstarts weer aan."""
+
+    def __init__(self, network, heal_after=1):
+        self.network = network
+        self.heal_after = heal_after
+        self.calls = 0
+        self.name = "restart fake0"
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.calls >= self.heal_after:
+            await self.network.up()
+        return True
+
+
+class FakeNetwork:
+    """Lokale TCP-servers die aan/uit gezet kunnen worden als 'internet'."""
+
+    def __init__(self, n=3):
+        self.n = n
+        self.ports = []
+        self.servers = []
+
+    async def _handle(self, reader, writer):
+        writer.close()
+
+    async def up(self):
+        if self.servers:
+            return
+        for i in range(self.n):
+            port = self.ports[i] if len(self.ports) > i else 0
+            srv = await asyncio.start_server(self._handle, "127.0.0.1", port)
+            self.servers.append(srv)
+            if len(self.ports) <= i:
+                self.ports.append(srv.sockets[0].getsockname()[1])
+
+    async def down(self):
+        for srv in self.servers:
+            srv.close()
+            await srv.wait_closed()
+        self.servers = []
+
+
+class FlakyProbe:
+    """Laat elke n-de aanroep mislukken (los verloren pakket)."""
+
+    def __init__(self, probe, every):
+        self.probe, self.every, self.calls = probe, every, 0
+        self.name = f"flaky({probe.name})"
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls % self.every == 0:
+            return False
+        return await self.probe()
+
+
+async def selftest(interval=0.05, threshold=3):
+    ok = True
+    net = FakeNetwork()
+    await net.up()
+
+    # 1) losse verloren pakketten: nooit een herstart
+    iface = FakeInterface(net)
+    probes = [FlakyProbe(TcpProbe("127.0.0.1", p, 0.2), every=2 + i) for i, p in enumerate(net.ports)]
+    single = [FlakyProbe(TcpProbe("127.0.0.1", net.ports[0], 0.2), every=3)]
+    for label, ps in (("3 doelen, los verlies", probes), ("1 doel, elke 3e mislukt", single)):
+        wd = Watchdog(ps, iface, interval=interval, threshold=threshold, backoff=0.5)
+        task = asyncio.create_task(wd.run())
+        await asyncio.sleep(interval * 40)
+        wd.stop()
+        await task
+        good = wd.restarts == 0 and wd.detections == 0
+        ok &= good
+        print(f"  {label:28} rondes {wd.rounds:3}  herstarts {wd.restarts}  "
+              f"{'ok' if good else 'FOUT'}")
+
+    # 2) echte storing: detectie, herstart, herstel; tweede keer pas na 2 herstarts (backoff)
+    for heal_after in (1, 2):
+        iface = FakeInterface(net, heal_after=heal_after)
+        wd = Watchdog([TcpProbe("127.0.0.1", p, 0.2) for p in net.ports], iface,
+                      interval=interval, threshold=threshold, backoff=interval * 4)
+        task = asyncio.create_task(wd.run())
+        await asyncio.sleep(interval * 5)
+        await net.down()
+        t_down = time.monotonic()
+        while wd.recoveries == 0 and time.monotonic() - t_down < 10:
+            await asyncio.sleep(interval / 2)
+        wd.stop()
+        await task
+        detect = wd.detect_times[0] if wd.detect_times else float("inf")
+        recover = wd.recover_times[0] if wd.recover_times else float("inf")
+        limit = interval * (threshold + 2)
+        good = (wd.detections == 1 and wd.recoveries == 1 and wd.restarts == heal_after
+                and detect <= limit)
+        ok &= good
+        print(f"  storing, herstel na {heal_after} herstart(s):  detectie {detect:.3f} s "
+              f"(max {limit:.2f}), herstel {recover:.3f} s, herstarts {wd.restarts}  "
+              f"{'ok' if good else 'FOUT'}")
+    await net.down()
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--interface", default=INTERFACE)
+    ap.add_argument("--target", action="append", help="ping:HOST of tcp:HOST:POORT (herhaalbaar)")
+    ap.add_argument("--interval", type=float, default=PROBE_INTERVAL)
+    ap.add_argument("--threshold", type=int, default=FAIL_THRESHOLD)
+    ap.add_argument("--selftest", action="store_true")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.selftest:
+        logging.getLogger().setLevel(logging.ERROR)
+        ok = asyncio.run(selftest())
+        print("OK" if ok else "FOUT")
+        sys.exit(0 if ok else 1)
+
+    probes = [make_probe(t) for t in (args.target or TARGETS)]
+    wd = Watchdog(probes, InterfaceRestart(args.interface),
+                  interval=args.interval, threshold=args.threshold)
+    try:
+        asyncio.run(wd.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
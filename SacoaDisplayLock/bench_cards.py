@@ -0,0 +1,125 @@
+"""
+bench_cards.py
+
+Benchmark voor card_store.py bij 1k / 100k / 500k kaarten:
+- bouwtijd van de index (parse + hashing), met en zonder Bloom-filter
+- lookuptijd voor bekende en onbekende kaarten
+- geheugen van de index, vergeleken met een gewone dict {uid: sessieduur}
+- herladen terwijl een lezer-thread continu opzoekt: de langste lookup
+  tijdens de wissel (de lezer mag nooit op de herlaad wachten)
+
+Gebruik:
+    python bench_cards.py
+    python bench_cards.py -n 1000 100000 --bloom
+Exitcode 1 bij een foute lookup of als een lookup tijdens herladen > 50 ms duurt.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from card_store import BLOCKED, CardIndex, CardStore, iter_card_entries
+
+MAX_STALL_MS = 50.0
+
+
+def write_cards(path, n, rng):
+    uids = [f"{rng.getrandbits(56):014X}" for _ in range(n)]
+    lines = ["# benchmark"]
+    for i, uid in enumerate(uids):
+        if i % 50 == 0:
+            lines.append(f"{uid} block")
+        elif i % 3 == 0:
+            lines.append(f"{uid} {300 + i % 900}")
+        else:
+            lines.append(uid)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return uids
+
+
+def per_lookup_us(fn, keys):
+    t0 = time.perf_counter()
+    for k in keys:
+        fn(k)
+    return (time.perf_counter() - t0) / len(keys) * 1e6
+
+
+def reload_stall(path, rounds=3):
+    """Langste lookup (ms) terwijl de index ``rounds`` keer herladen wordt."""
+    store = CardStore(path)
+    store.load()
+    probe = next(iter_card_entries(path.read_text(encoding="utf-8")))[0]
+    stop = threading.Event()
+    worst = [0.0]
+
+    def reader():
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            store.check(probe)
+            worst[0] = max(worst[0], time.perf_counter() - t0)
+
+    t = threading.Thread(target=reader)
+    t.start()
+    for _ in range(rounds):
+        loads = store.loads
+        store.reload_async()
+        while store.loads == loads:
+            time.sleep(0.01)
+    stop.set()
+    t.join()
+    return worst[0] * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, nargs="+", default=[1000, 100_000, 500_000])
+    ap.add_argument("--bloom", action="store_true", help="ook met Bloom-filter meten")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cards.txt"
+        for n in args.n:
+            uids = write_cards(path, n, rng)
+            text = path.read_text(encoding="utf-8")
+            entries = list(iter_card_entries(text))
+            expect = dict(entries)
+            unknown = [f"{rng.getrandbits(56):014X}" for _ in range(min(n, 50_000))]
+            sample = rng.sample(uids, min(n, 50_000))
+            print(f"{n:>8} kaarten")
+
+            tracemalloc.start()
+            ref = {(u + " ")[:-1]: v for u, v in entries}      # eigen kopie van de strings
+            dict_mb = tracemalloc.get_traced_memory()[0] / 1e6
+            tracemalloc.stop()
+            del ref
+
+            for bloom in ([False, True] if args.bloom else [False]):
+                t0 = time.perf_counter()
+                idx = CardIndex.build(iter_card_entries(text), bloom=bloom)
+                build_s = time.perf_counter() - t0
+                bad = sum(1 for u in sample if idx.lookup(u) != expect[u])
+                false_pos = sum(1 for u in unknown if idx.lookup(u) is not None)
+                hit = per_lookup_us(idx.lookup, sample)
+                miss = per_lookup_us(idx.lookup, unknown)
+                label = "index+bloom" if bloom else "index"
+                print(f"  {label:12} bouw {build_s:6.2f} s  hit {hit:5.2f} us  miss {miss:5.2f} us  "
+                      f"{idx.nbytes / 1e6:6.1f} MB (dict {dict_mb:.1f} MB)  fouten {bad + false_pos}")
+                ok &= bad == 0 and false_pos == 0
+            blocked = sum(1 for v in expect.values() if v == BLOCKED)
+            stall = reload_stall(path)
+            print(f"  geblokkeerd {blocked}, langste lookup tijdens herladen {stall:.2f} ms")
+            ok &= stall <= MAX_STALL_MS
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
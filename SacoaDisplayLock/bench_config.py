@@ -0,0 +1,264 @@
+"""
+bench_config.py
+
+Test en meting voor lock_config.py zoals de Sacoa-app het gebruikt: een echt
+bestand, de FileWatcher en een 'Tk-thread' (hier de hoofdthread met een
+wachtrij, net als root.after).
+
+1. Herlaadtijd: van het wegschrijven van lock_config.json tot de callback
+   van het subsysteem (p50/max over ``-n`` wijzigingen).
+2. Alleen het betrokken subsysteem krijgt een callback; ``live=False``
+   sleutels komen in ``restart_needed`` en niet bij de subsystemen.
+3. Ongeldig bestand (kapotte JSON, buiten bereik, onbekende sleutel, fout
+   type): vorige configuratie blijft staan, fout in ``status()``.
+4. Fleet-laag gaat boven het bestand; weggevallen fleet-sleutel valt terug
+   op het bestand. ``com_port`` werkt nog als oude naam.
+5. Relock: een lopende timer op de standaardtijd schuift mee met
+   ``auto_relock_seconds``, een kaartsessie niet.
+6. Geen gemiste triggers: twee ESP32-simulators op pty's blijven sturen
+   terwijl ``serial_ports`` steeds herladen wordt (``set_patterns``).
+7. Andere blur/dim: MultiFrameCache rendert alle schermen opnieuw met de
+   nieuwe engines; frames van de oude engine worden niet meer getoond.
+
+Gebruik:
+    python bench_config.py
+    python bench_config.py -n 50
+Exitcode 1 als een van de controles faalt.
+"""
+
+import argparse
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "LockCommon"))
+from file_watcher import DEBOUNCE, POLL_INTERVAL, FileWatcher
+from lock_config import LockConfig
+from lock_core import LockCore, RELOCK_PENDING
+from tk_scheduler import HeadlessLoop, TkScheduler
+from esp32_sim import Esp32Sim, open_pty
+from serial_hub import SerialHub
+
+GROUPS = {
+    "core": {"service_pin", "max_code_len"},
+    "relock": {"auto_relock_seconds"},
+    "ports": {"serial_ports"},
+    "render": {"blur_radius", "dim_alpha", "render_backend", "blur_downscale"},
+    "screens": {"screen_index", "all_monitors"},
+}
+
+
+class TkThread:
+    """Wachtrij + pomp in de hoofdthread, zoals root.after(0, fn) en mainloop."""
+
+    def __init__(self):
+        self.q = queue.Queue()
+
+    def post(self, fn):
+        self.q.put(fn)
+
+    def pump(self, until, timeout=3.0):
+        end = time.monotonic() + timeout
+        while not until() and time.monotonic() < end:
+            try:
+                self.q.get(timeout=0.005)()
+            except queue.Empty:
+                pass
+        return until()
+
+
+def write_atomic(path, doc):
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(doc if isinstance(doc, str) else json.dumps(doc), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-n", type=int, default=20, help="aantal herlaadrondes")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp())
+    path = tmp / "lock_config.json"
+    tk = TkThread()
+    cfg = LockConfig("sacoa", path, post=tk.post)
+    ok = True
+
+    def check(label, good):
+        nonlocal ok
+        ok &= bool(good)
+        print(f"  {label:60} {'ok' if good else 'FOUT'}")
+
+    calls = {name: [] for name in GROUPS}
+    arrived = {}
+    for name, keys in GROUPS.items():
+        def on_change(changed, name=name):
+            calls[name].append(changed)
+            arrived[name] = time.monotonic()
+        cfg.subscribe(keys, on_change)
+
+    write_atomic(path, {"common": {"max_code_len": 16}, "sacoa": {"blur_radius": 8}})
+    check("laden bij de start", cfg.load() and cfg.max_code_len == 16 and cfg.blur_radius == 8)
+    watcher = FileWatcher().start()
+    watcher.watch(path, lambda p: cfg.reload())
+
+    # 1. herlaadtijd
+    lat = []
+    for i in range(args.n):
+        arrived.pop("render", None)
+        t0 = time.monotonic()
+        write_atomic(path, {"common": {"max_code_len": 16}, "sacoa": {"blur_radius": 9 + i % 2}})
+        if tk.pump(lambda: "render" in arrived):
+            lat.append((arrived["render"] - t0) * 1000.0)
+        time.sleep(DEBOUNCE * 1.5)          # niet samenvoegen met de volgende schrijfactie
+    lat.sort()
+    if lat:
+        print(f"1. herladen: p50 {lat[len(lat) // 2]:.0f} ms  max {lat[-1]:.0f} ms "
+              f"(debounce {DEBOUNCE * 1000:.0f} ms, {len(lat)}/{args.n})")
+    limit = (DEBOUNCE + POLL_INTERVAL) * 1000 + 250
+    check(f"elke wijziging binnen {limit:.0f} ms toegepast", len(lat) == args.n and lat[-1] <= limit)
+
+    # 2. alleen het betrokken subsysteem
+    print("2. callbacks")
+    for c in calls.values():
+        c.clear()
+    reloads = cfg.reloads
+    write_atomic(path, {"common": {"max_code_len": 16}, "sacoa": {"blur_radius": 12, "dim_alpha": 0.5}})
+    tk.pump(lambda: cfg.reloads > reloads)
+    check("blur_radius + dim_alpha -> alleen render, één callback",
+          calls["render"] == [{"blur_radius": 12, "dim_alpha": 0.5}]
+          and not any(calls[n] for n in GROUPS if n != "render"))
+    reloads = cfg.reloads
+    write_atomic(path, {"common": {"max_code_len": 16},
+                        "sacoa": {"blur_radius": 12, "dim_alpha": 0.5, "baudrate": 115200}})
+    tk.pump(lambda: cfg.reloads > reloads)
+    check("baudrate (live=False) -> restart_needed, geen callback",
+          cfg.restart_needed == {"baudrate"} and len(calls["render"]) == 1
+          and cfg.status()["config_restart_needed"] == "baudrate")
+
+    # 3. ongeldig bestand
+    print("3. ongeldig")
+    good = dict(cfg.values)
+    for label, doc in (("kapotte JSON", '{"sacoa": {"blur_radius": '),
+                       ("buiten bereik", {"sacoa": {"dim_alpha": 3}}),
+                       ("onbekende sleutel", {"sacoa": {"blur_radiuss": 5}}),
+                       ("fout type", {"common": {"all_monitors": "ja"}}),
+                       ("service_pin met letters", {"sacoa": {"service_pin": "12a4"}})):
+        cfg.errors = []
+        write_atomic(path, doc)
+        tk.pump(lambda: cfg.errors)
+        check(f"{label}: vorige configuratie blijft, fout gemeld",
+              cfg.values == good and cfg.status()["config_errors"])
+
+    # 4. fleet-laag
+    print("4. fleet")
+    write_atomic(path, {"sacoa": {"auto_relock_seconds": 300}})
+    tk.pump(lambda: cfg.auto_relock_seconds == 300)
+    cfg.set_layer("fleet", {"auto_relock_seconds": 120, "com_port": "COM7", "keep_alive_ms": 500})
+    check("fleet boven het bestand, com_port -> serial_ports",
+          cfg.auto_relock_seconds == 120 and cfg.serial_ports == ["COM7"])
+    cfg.set_layer("fleet", {})
+    check("fleet-sleutel weg -> terug naar het bestand", cfg.auto_relock_seconds == 300)
+    watcher.stop()
+
+    # 5. relock schuift mee
+    print("5. relock")
+    loop = HeadlessLoop()
+    sched = TkScheduler(loop, clock=loop.clock)
+    core = LockCore(sched, lambda code: None, relock_seconds=240.0, state=RELOCK_PENDING)
+    core.unlock("code")
+    loop.advance(100.0)
+    core.set_relock_seconds(300.0)
+    check("standaard-timer: 140 s over -> 200 s", abs(core.relock_remaining - 200.0) < 1e-6)
+    core.trigger(60.0)                  # kaartsessie van 60 s
+    loop.advance(10.0)
+    core.set_relock_seconds(30.0)
+    check("kaartsessie blijft 50 s", abs(core.relock_remaining - 50.0) < 1e-6)
+    core.unlock("code")
+    loop.advance(20.0)
+    core.set_relock_seconds(10.0)
+    loop.advance(0.01)
+    check("korter dan al verstreken -> direct relock", core.relocks == 1)
+
+    # 6. triggers tijdens herladen van serial_ports
+    print("6. serieel")
+    ptys = [open_pty() for _ in range(2)]
+    sims = [Esp32Sim(m) for m, _, _ in ptys]
+    names = [name for _, _, name in ptys]
+    got = {name: 0 for name in names}
+    got_lock = threading.Lock()
+
+    def on_frame(frame, source):
+        if frame.line == "TRIGGER":
+            with got_lock:
+                got[source] += 1
+    hub = SerialHub(names, on_frame=on_frame).start()
+    cfg2 = LockConfig("sacoa", tmp / "ports.json", post=tk.post)
+    cfg2.subscribe({"serial_ports"}, lambda changed: hub.set_patterns(changed["serial_ports"]))
+    time.sleep(0.3)
+    stop = threading.Event()
+
+    def sender():
+        while not stop.is_set():
+            for sim in sims:
+                sim.send_trigger()
+            time.sleep(0.002)
+    t = threading.Thread(target=sender, daemon=True)
+    t.start()
+    extra = str(tmp / "geen_lezer*")
+    flips = 0
+    for i in range(args.n * 5):
+        cfg2.set_layer("file", {"serial_ports": names + ([extra] if i % 2 == 0 else [])})
+        flips += 1
+        tk.pump(lambda: False, timeout=0.01)
+    stop.set()
+    t.join()
+    time.sleep(0.3)
+    hub.stop()
+    sent = sum(s.sent for s in sims)
+    with got_lock:
+        received = sum(got.values())
+    print(f"   {flips} keer serial_ports herladen, {sent} triggers verstuurd, {received} ontvangen")
+    check("geen gemiste of dubbele triggers", received == sent)
+    for m, s, _ in ptys:
+        os.close(m)
+        os.close(s)
+
+    # 7. render-engines wisselen
+    print("7. render")
+    try:
+        from PIL import Image
+        from frame_cache import MultiFrameCache
+    except ImportError:
+        print("   Pillow ontbreekt: overgeslagen")
+    else:
+        shown = []
+        desktop = Image.new("RGB", (64, 36), "gray")
+        cache = MultiFrameCache([lambda: desktop] * 2, [lambda img: ("oud", img)] * 2,
+                                lambda i, frame: shown.append((i, frame[0])), interval=60.0)
+        cache.start()
+        deadline = time.monotonic() + 3.0
+        while len(shown) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        shown.clear()
+        cache.set_renders([lambda img: ("nieuw", img)] * 2)
+        deadline = time.monotonic() + 3.0
+        while len(shown) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        cache.stop()
+        check("na set_renders: beide schermen opnieuw, met de nieuwe engine",
+              sorted(shown) == [(0, "nieuw"), (1, "nieuw")])
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+bench_link_health.py
+
+Test en meting voor link_health.py met twee gesimuleerde lezers op pty's
+(Linux/macOS), beide via één SerialHub:
+
+- oude firmware: alleen TRIGGER; moet 'onbekend' blijven, geen PING-bytes
+  krijgen en nooit opnieuw verbonden worden
+- nieuwe firmware: HB + PONG; round-trip p50/p99 over de PINGs
+- het nieuwe bordje 'hangt': hoe snel volgt "offline", wordt er opnieuw
+  verbonden, blijven triggers van de andere lezer doorkomen, en hoe snel is
+  de lezer na herstel weer online
+
+Gebruik:
+    python bench_link_health.py
+    python bench_link_health.py --heartbeat 0.2 --misses 3 --ping 0.05
+Exitcode 1 als een van de controles faalt.
+"""
+
+import argparse
+import os
+import select
+import sys
+import threading
+import time
+
+from esp32_sim import Esp32Sim, open_pty
+from link_health import LinkMonitor, OFFLINE, ONLINE, UNKNOWN
+from serial_hub import SerialHub
+
+
+class Events:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.triggers = {}          # bron -> aantal
+        self.changes = []           # (tijd, bron, online)
+
+    def on_frame(self, frame, source):
+        if frame.line == "TRIGGER":
+            with self.lock:
+                self.triggers[source] = self.triggers.get(source, 0) + 1
+
+    def on_change(self, source, online):
+        self.changes.append((time.monotonic(), source, online))
+
+    def count(self, source):
+        with self.lock:
+            return self.triggers.get(source, 0)
+
+
+def wait_for(cond, timeout, tick):
+    """Wachten en ondertussen ``tick`` draaien (zoals de scheduler op de Tk-thread)."""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        tick()
+        if cond():
+            return True
+        time.sleep(0.01)
+    return cond()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--heartbeat", type=float, default=0.2)
+    ap.add_argument("--misses", type=int, default=3)
+    ap.add_argument("--ping", type=float, default=0.05, help="PING-interval in s")
+    ap.add_argument("--seconds", type=float, default=2.0, help="duur van de RTT-meting")
+    args = ap.parse_args()
+
+    old_m, old_s, old_name = open_pty()
+    new_m, new_s, new_name = open_pty()
+    old, new = Esp32Sim(old_m), Esp32Sim(new_m)
+    new.start_link(args.heartbeat)
+
+    ev = Events()
+    hub = SerialHub([old_name, new_name], on_frame=None, rescan=0.5)
+    mon = LinkMonitor(hub.send, hub.reconnect, args.heartbeat, args.misses, args.ping,
+                      on_change=ev.on_change)
+    hub.on_frame = lambda f, src: mon.on_frame(f, src) or ev.on_frame(f, src)
+    hub.start()
+    ok = True
+
+    def check(label, good):
+        nonlocal ok
+        ok &= bool(good)
+        print(f"  {label:52} {'ok' if good else 'FOUT'}")
+
+    # triggers van de oude lezer lopen de hele test door
+    stop = threading.Event()
+
+    def old_firmware():
+        while not stop.wait(0.1):
+            old.send_trigger()
+    threading.Thread(target=old_firmware, daemon=True).start()
+
+    tick = mon.tick
+    print(f"heartbeat {args.heartbeat}s x {args.misses}, ping {args.ping}s")
+    check("nieuwe lezer online na eerste heartbeat",
+          wait_for(lambda: mon.state(new_name) == ONLINE, 3 * args.heartbeat + 1, tick))
+    wait_for(lambda: False, args.seconds, tick)
+
+    d = mon.details()[new_name]
+    print(f"  round-trip p50 {d['rtt_p50_ms']} ms, p99 {d['rtt_p99_ms']} ms, "
+          f"{new.pings} pings, {d['pings_lost']} verloren")
+    check("round-trips gemeten, geen verloren pings",
+          d["rtt_p50_ms"] is not None and d["pings_lost"] == 0 and new.pings >= 5)
+    check("oude lezer blijft 'onbekend'", mon.state(old_name) == UNKNOWN)
+    r, _, _ = select.select([old_m], [], [], 0)
+    check("oude lezer krijgt geen PING-bytes", not r)
+
+    # bordje hangt
+    connects0 = hub.status()[new_name]["connects"]
+    old0 = ev.count(old_name)
+    t_hang = time.monotonic()
+    new.hang()
+    went = wait_for(lambda: mon.state(new_name) == OFFLINE, args.heartbeat * args.misses + 2, tick)
+    detect = time.monotonic() - t_hang
+    limit = args.heartbeat * (args.misses + 1) + 0.2
+    print(f"  offline gemeld na {detect * 1000:.0f} ms (grens {limit * 1000:.0f} ms)")
+    check("hangende lezer offline gemeld", went and detect <= limit)
+    check("status API: reader=offline, readers_offline=1",
+          mon.summary()["reader"] == OFFLINE and mon.summary()["readers_offline"] == 1)
+    check("direct opnieuw verbonden",
+          wait_for(lambda: hub.status()[new_name]["connects"] > connects0, 1.0, tick))
+    check("triggers van de oude lezer komen door",
+          wait_for(lambda: ev.count(old_name) > old0 + 3, 2.0, tick))
+    check("oude lezer niet opnieuw verbonden", hub.status()[old_name]["connects"] == 1)
+
+    # herstel
+    t_back = time.monotonic()
+    new.hang(False)
+    back = wait_for(lambda: mon.state(new_name) == ONLINE, 3 * args.heartbeat + 1, tick)
+    print(f"  weer online na {(time.monotonic() - t_back) * 1000:.0f} ms")
+    check("lezer weer online na herstel", back)
+    before = ev.count(new_name)
+    new.send_trigger()
+    check("trigger van de herstelde lezer komt door",
+          wait_for(lambda: ev.count(new_name) == before + 1, 1.0, tick))
+    check("precies één offline- en één online-melding",
+          [(s, o) for _, s, o in ev.changes] == [(new_name, False), (new_name, True)])
+
+    stop.set()
+    new.stop_link()
+    hub.stop()
+    for fd in (old_m, old_s, new_m, new_s):
+        os.close(fd)
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
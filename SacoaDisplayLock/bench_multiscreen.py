@@ -0,0 +1,87 @@
+"""
+bench_multiscreen.py
+
+Benchmark voor all_monitors: hoe lang duurt één render-ronde van de
+MultiFrameCache voor N nagebootste monitors, serieel versus in de threadpool?
+
+De monitors komen uit ``monitors.FakeMonitors`` (standaard drie 1080p-schermen
+naast elkaar); 'grab' geeft een uitsnede van één synthetisch bureaublad, de
+render is de echte engine. Elke monitor krijgt een eigen engine, net als in de app.
+
+Gebruik:
+    python bench_multiscreen.py
+    python bench_multiscreen.py -m 2560x1440+0+0 1920x1080+2560+0 -b numpy -n 10
+Exitcode 1 als de pool trager is dan serieel renderen (plus 20% marge).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "LockCommon"))
+from monitors import FakeMonitors
+from render_engine import available_backends, make_engine
+from frame_cache import MultiFrameCache
+from bench_render import synthetic_frame, BLUR_RADIUS, DIM_ALPHA
+
+DEFAULT_MONITORS = ["1920x1080+0+0", "1920x1080+1920+0", "1920x1080+3840+0"]
+
+
+def make_grabs(monitors, desktop):
+    ox = min(m.left for m in monitors)
+    oy = min(m.top for m in monitors)
+    return [lambda m=m: desktop.crop((m.left - ox, m.top - oy, m.right - ox, m.bottom - oy))
+            for m in monitors]
+
+
+def rounds(cache, n):
+    """n volledige rondes; de signatuur wordt gewist zodat er echt gerenderd wordt."""
+    times = []
+    cache._running.set()
+    for _ in range(n):
+        cache._signatures = [None] * len(cache._signatures)
+        t0 = time.perf_counter()
+        cache._tick()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-m", "--monitors", nargs="+", default=DEFAULT_MONITORS)
+    ap.add_argument("-b", "--backend", choices=available_backends(), default="fast")
+    ap.add_argument("-n", "--rounds", type=int, default=10)
+    args = ap.parse_args()
+
+    monitors = FakeMonitors(args.monitors)()
+    w = max(m.right for m in monitors) - min(m.left for m in monitors)
+    h = max(m.bottom for m in monitors) - min(m.top for m in monitors)
+    desktop = synthetic_frame(w, h)
+    grabs = make_grabs(monitors, desktop)
+    engines = lambda: [make_engine(args.backend, BLUR_RADIUS, DIM_ALPHA).render for _ in monitors]
+    sink = lambda i, img: None
+
+    single = MultiFrameCache(grabs[:1], engines()[:1], sink, workers=1)
+    serial = MultiFrameCache(grabs, engines(), sink, workers=1)
+    pooled = MultiFrameCache(grabs, engines(), sink)
+    t_single = rounds(single, args.rounds)
+    t_serial = rounds(serial, args.rounds)
+    t_pool = rounds(pooled, args.rounds)
+    for c in (single, serial, pooled):
+        c.stop()
+
+    print(f"{len(monitors)} monitors, backend {args.backend}, {os.cpu_count()} CPU's")
+    print(f"  één scherm      {t_single:8.1f} ms")
+    print(f"  serieel         {t_serial:8.1f} ms  ({t_serial / t_single:.2f}x één scherm)")
+    print(f"  threadpool      {t_pool:8.1f} ms  ({t_pool / t_single:.2f}x één scherm, "
+          f"{t_serial / t_pool:.2f}x sneller dan serieel)")
+    failed = pooled.errors or t_pool > t_serial * 1.2
+    print("FOUT" if failed else "OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
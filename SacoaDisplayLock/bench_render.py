@@ -0,0 +1,121 @@
+"""
+bench_render.py
+
+Benchmark voor de render-engines uit render_engine.py op synthetische
+1080p/1440p/4K frames. Per backend en resolutie: ms per frame (mediaan en
+min) en het piekgeheugen van het proces.
+
+Iedere combinatie draait in een eigen subproces, zodat het piekgeheugen
+niet besmet raakt door een eerdere meting.
+
+Gebruik:
+    python bench_render.py                  # alle backends, alle resoluties
+    python bench_render.py -b fast numpy -r 4k -n 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from PIL import Image, ImageFilter
+
+from render_engine import available_backends, make_engine, DEFAULT_DOWNSCALE
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k":    (3840, 2160),
+}
+BLUR_RADIUS = 12
+DIM_ALPHA = 0.35
+
+
+def synthetic_frame(w, h):
+    """Reproduceerbaar 'bureaublad': verloop per kanaal plus ruis en vlakken."""
+    grad = Image.linear_gradient("L").resize((w, h))
+    noise = Image.effect_noise((w, h), 64)
+    tiles = Image.radial_gradient("L").resize((w // 8, h // 8)).resize((w, h), Image.NEAREST)
+    img = Image.merge("RGB", (grad, noise, tiles))
+    return img.filter(ImageFilter.EDGE_ENHANCE)
+
+
+def peak_rss_bytes():
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PMC(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t)]
+        pmc = PMC()
+        pmc.cb = ctypes.sizeof(PMC)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+        return pmc.PeakWorkingSetSize
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_case(backend, res, frames, downscale):
+    w, h = RESOLUTIONS[res]
+    src = synthetic_frame(w, h)
+    engine = make_engine(backend, BLUR_RADIUS, DIM_ALPHA, downscale)
+    engine.render(src)                         # opwarmen
+    base = peak_rss_bytes()
+    times = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        engine.render(src)
+        times.append((time.perf_counter() - t0) * 1000.0)
+    times.sort()
+    return {
+        "backend": engine.name, "res": res,
+        "ms_median": times[len(times) // 2], "ms_min": times[0],
+        "peak_mb": peak_rss_bytes() / 2**20,
+        "peak_delta_mb": (peak_rss_bytes() - base) / 2**20,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-b", "--backend", nargs="+", default=available_backends())
+    ap.add_argument("-r", "--res", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    ap.add_argument("-n", "--frames", type=int, default=10)
+    ap.add_argument("-d", "--downscale", type=int, default=DEFAULT_DOWNSCALE)
+    ap.add_argument("--case", nargs=2, metavar=("BACKEND", "RES"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case[0], args.case[1], args.frames, args.downscale)))
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    print(f"{'backend':8} {'res':6} {'ms/frame':>9} {'min':>8} {'piek MB':>8} {'+MB':>7}")
+    for res in args.res:
+        for backend in args.backend:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--case", backend, res,
+                 "-n", str(args.frames), "-d", str(args.downscale)],
+                cwd=here, capture_output=True, text=True,
+            )
+            if out.returncode != 0:
+                print(f"{backend:8} {res:6} FOUT: {out.stderr.strip().splitlines()[-1]}")
+                continue
+            r = json.loads(out.stdout)
+            print(f"{r['backend']:8} {r['res']:6} {r['ms_median']:9.1f} {r['ms_min']:8.1f} "
+                  f"{r['peak_mb']:8.0f} {r['peak_delta_mb']:7.0f}")
+
+
+if __name__ == "__main__":
+    main()
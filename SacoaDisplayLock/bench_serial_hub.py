@@ -0,0 +1,175 @@
+"""
+bench_serial_hub.py
+
+Benchmark en hotplug-test voor serial_hub.py met ESP32-simulators op pty's
+(Linux/macOS).
+
+Per aantal poorten (standaard 1, 2, 4, 8, 16):
+- CPU-tijd van de hub-thread in rust (geen verkeer) en onder last
+  (elke poort ``--rate`` triggers/s), in ms CPU per seconde
+- latentie van versturen tot ``on_frame`` (p50/p99)
+- verloren of dubbele triggers
+
+Daarna een hotplug-ronde via symlinks in een tijdelijke map met een glob:
+een nieuw apparaat wordt gevonden, een weggevallen apparaat krijgt backoff en
+wordt na herstel weer geopend, met de juiste ``source`` per trigger.
+
+Gebruik:
+    python bench_serial_hub.py
+    python bench_serial_hub.py --ports 1 4 32 --rate 200 --seconds 3
+Exitcode 1 bij verloren/dubbele triggers of een mislukte hotplug-ronde.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from esp32_sim import Esp32Sim, open_pty
+from serial_hub import SerialHub, RESCAN_INTERVAL
+
+
+class Collector:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = []         # (ontvangsttijd, source)
+
+    def __call__(self, frame, source):
+        t = time.monotonic()
+        with self.lock:
+            self.items.append((t, source))
+
+    def count(self, source=None):
+        with self.lock:
+            return sum(1 for _, s in self.items if source is None or s == source)
+
+
+def run_ports(n, rate, seconds):
+    ptys = [open_pty() for _ in range(n)]
+    sims = [Esp32Sim(m) for m, _, _ in ptys]
+    names = [name for _, _, name in ptys]
+    col = Collector()
+    hub = SerialHub(names, on_frame=col).start()
+    time.sleep(0.3)                         # poorten openen
+
+    # rust: over meer dan één rescan meten (de teller loopt per lusronde bij)
+    cpu0 = hub.cpu_seconds
+    idle_s = RESCAN_INTERVAL * 2 + 0.1
+    time.sleep(idle_s)
+    idle_ms = (hub.cpu_seconds - cpu0) * 1000.0 / idle_s
+
+    sent = []                               # (tijd, bron)
+    period = 1.0 / rate
+    cpu0, t_start = hub.cpu_seconds, time.monotonic()
+    nxt = t_start
+    i = 0
+    while time.monotonic() - t_start < seconds:
+        k = i % n
+        sent.append((sims[k].send_trigger(), names[k]))
+        i += 1
+        if k == n - 1:
+            nxt += period
+            delay = nxt - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    time.sleep(0.3)
+    busy_s = time.monotonic() - t_start
+    load_ms = (hub.cpu_seconds - cpu0) * 1000.0 / busy_s
+    hub.stop()
+
+    # latentie: per bron de i-de ontvangst bij de i-de verzending
+    lat = []
+    for name in names:
+        tx = [t for t, s in sent if s == name]
+        rx = [t for t, s in col.items if s == name]
+        lat += [(r - t) * 1000.0 for t, r in zip(tx, rx)]
+        if len(rx) != len(tx):
+            lat.append(float("inf"))
+    lat.sort()
+    for m, s, _ in ptys:
+        os.close(m)
+        os.close(s)
+    lost = len(sent) - col.count()
+    return idle_ms, load_ms, lat, len(sent), lost
+
+
+def hotplug_round():
+    tmp = tempfile.mkdtemp()
+    pattern = os.path.join(tmp, "ttyFAKE*")
+    col = Collector()
+    hub = SerialHub([pattern], on_frame=col, rescan=0.2, backoff_min=0.1, backoff_max=0.4).start()
+    ok = True
+
+    def link(i):
+        m, s, name = open_pty()
+        path = os.path.join(tmp, f"ttyFAKE{i}")
+        os.symlink(name, path)
+        return Esp32Sim(m), m, s, path
+
+    def wait_for(cond, timeout=3.0):
+        end = time.monotonic() + timeout
+        while not cond() and time.monotonic() < end:
+            time.sleep(0.02)
+        return cond()
+
+    def deliver(sim, path, n=5):
+        before = col.count(path)
+        for _ in range(n):
+            sim.send_trigger()
+        return wait_for(lambda: col.count(path) == before + n)
+
+    a = link(0)
+    good = wait_for(lambda: hub.status().get(a[3], {}).get("open")) and deliver(a[0], a[3])
+    print(f"  eerste apparaat gevonden en gelezen        {'ok' if good else 'FOUT'}"); ok &= good
+
+    b = link(1)
+    good = wait_for(lambda: hub.status().get(b[3], {}).get("open")) and deliver(b[0], b[3])
+    print(f"  tweede apparaat ingeplugd (glob)           {'ok' if good else 'FOUT'}"); ok &= good
+
+    # a 'uitplugen': master dicht + link weg -> hub sluit, ruimt op; b blijft werken
+    os.close(a[1])
+    os.close(a[2])
+    os.unlink(a[3])
+    good = wait_for(lambda: a[3] not in hub.status()) and deliver(b[0], b[3])
+    print(f"  uitgeplugd apparaat opgeruimd, ander leest {'ok' if good else 'FOUT'}"); ok &= good
+
+    # opnieuw inpluggen onder dezelfde naam
+    c = link(0)
+    good = wait_for(lambda: hub.status().get(c[3], {}).get("open")) and deliver(c[0], c[3])
+    print(f"  opnieuw ingeplugd onder dezelfde naam      {'ok' if good else 'FOUT'}"); ok &= good
+
+    hub.stop()
+    for dev in (b, c):
+        os.close(dev[1])
+        os.close(dev[2])
+    shutil.rmtree(tmp, ignore_errors=True)
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--ports", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    ap.add_argument("--rate", type=int, default=100, help="triggers/s per poort")
+    ap.add_argument("--seconds", type=float, default=2.0)
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'poorten':>7} {'rust':>10} {'last':>12} {'p50':>9} {'p99':>9} {'triggers':>9} {'verloren':>8}")
+    for n in args.ports:
+        idle_ms, load_ms, lat, sent, lost = run_ports(n, args.rate, args.seconds)
+        p50 = lat[len(lat) // 2]
+        p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))]
+        print(f"{n:7} {idle_ms:7.2f} ms/s {load_ms:9.2f} ms/s {p50:7.3f}ms {p99:7.3f}ms "
+              f"{sent:9} {lost:8}")
+        ok &= lost == 0 and p99 != float("inf")
+    print("hotplug:")
+    ok &= hotplug_round()
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
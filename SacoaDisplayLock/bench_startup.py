@@ -0,0 +1,160 @@
+"""
+bench_startup.py
+
+Koude start van sacoa_overlay_lock.py, met en zonder FAST_START.
+
+1. Importtijd (zoals ``python -X importtime``): totaal van ``import
+   sacoa_overlay_lock`` in een nieuw proces, plus de duurste modules.
+   Met FAST_START komen Pillow en pyserial pas op een achtergrondthread.
+2. Met een display: tijd van processtart tot de eerste zichtbare overlay
+   (start_lock_delay_seconds = 0), tot de achtergrond-imports klaar zijn,
+   en hoe lang de eerste druk op Service duurt tot het keypad zichtbaar is.
+
+Gebruik:
+    python bench_startup.py
+    python bench_startup.py --runs 10 --top 15
+    xvfb-run -s "-screen 0 1920x1080x24" python bench_startup.py
+Exitcode 1 als FAST_START niet sneller importeert, of (met display) als de
+eerste keypad-druk met FAST_START niet sneller is.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+APP = "sacoa_overlay_lock"
+MODES = (("klassiek", "0"), ("fast start", "1"))
+PRESS_AFTER = 3.0       # s na de start: de gebruiker drukt op Service (na het voorbouwen)
+
+
+def import_times(fast, runs):
+    """Mediaan van de totale importtijd (ms) en de -X importtime-regels van de laatste run."""
+    env = dict(os.environ, LOCK_FAST_START=fast)
+    totals, rows = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {APP}"],
+            cwd=HERE, env=env, capture_output=True, text=True, check=True,
+        ).stderr
+        rows = []
+        for line in out.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            parts = line[len("import time:"):].split("|")
+            try:
+                rows.append((int(parts[0]), int(parts[1]), parts[2].rstrip()))
+            except ValueError:
+                continue                      # kopregel
+        totals.append(next(cum for _, cum, name in rows if name.strip() == APP) / 1000.0)
+    return statistics.median(totals), rows
+
+
+def print_top(rows, top):
+    """Duurste modules op cumulatieve tijd, alleen het bovenste niveau onder de app."""
+    app_depth = next(len(n) - len(n.lstrip()) for _, _, n in rows if n.strip() == APP)
+    direct = [(cum, n.strip()) for _, cum, n in rows if len(n) - len(n.lstrip()) == app_depth + 2]
+    for cum, name in sorted(direct, reverse=True)[:top]:
+        print(f"      {cum / 1000.0:7.1f} ms  {name}")
+
+
+# ----- met display: in een kindproces -----
+def child(launched):
+    sys.path.insert(0, str(HERE))
+    t_import = time.time()
+    import tkinter as tk
+    import sacoa_overlay_lock as mod
+    marks = {"import": time.time() - t_import}
+    # overlay meteen, geen lezers; los van een eventuele lokale lock_config.json
+    config = Path(tempfile.mkdtemp()) / "lock_config.json"
+    config.write_text(json.dumps({"sacoa": {"start_lock_delay_seconds": 0, "serial_ports": []}}),
+                      encoding="utf-8")
+    os.environ["LOCK_CONFIG"] = str(config)
+    mod.CONTROL_ENABLED = False
+
+    root = tk.Tk()
+    cls = mod.SacoaOverlayApp
+    show, start_devices = cls.show_overlay, cls._start_devices
+
+    def stamped_show(self):
+        show(self)
+        if "overlay" not in marks:
+            self.overlay.update()
+            marks["overlay"] = time.time() - launched
+
+    def stamped_devices(self):
+        start_devices(self)
+        marks["deps"] = time.time() - launched
+
+    cls.show_overlay, cls._start_devices = stamped_show, stamped_devices
+    app = cls(root)
+
+    def press():
+        t0 = time.perf_counter()
+        app._on_service_pressed()
+        app.keypad_win.update()
+        marks["keypad_press"] = time.perf_counter() - t0
+        root.after(100, root.quit)
+
+    root.after(int(PRESS_AFTER * 1000), press)
+    root.mainloop()
+    if app.frame_cache:
+        app.frame_cache.stop()
+    print(json.dumps({k: round(v * 1000.0, 1) for k, v in marks.items()}))
+
+
+def run_app(fast):
+    env = dict(os.environ, LOCK_FAST_START=fast)
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", repr(time.time())],
+        cwd=HERE, env=env, capture_output=True, text=True, timeout=60,
+    )
+    if proc.returncode != 0:
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=8)
+    ap.add_argument("--child", type=float, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child is not None:
+        child(args.child)
+        return
+
+    ok = True
+    imports = {}
+    print("importtijd (mediaan van", args.runs, "runs):")
+    for label, fast in MODES:
+        imports[fast], rows = import_times(fast, args.runs)
+        print(f"  {label:11} {imports[fast]:7.1f} ms")
+        print_top(rows, args.top)
+    ok &= imports["1"] < imports["0"]
+
+    print("met display (ms sinds processtart; keypad = eerste druk op Service):")
+    results = {}
+    for label, fast in MODES:
+        runs = [r for r in (run_app(fast) for _ in range(args.runs)) if r]
+        if not runs:
+            print("  geen display of de app start niet; alleen importtijden gemeten")
+            break
+        med = {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+        results[fast] = med
+        print(f"  {label:11} import {med['import']:6.1f}  eerste overlay {med['overlay']:7.1f}  "
+              f"imports klaar {med.get('deps', float('nan')):7.1f}  keypad {med['keypad_press']:6.1f}")
+    if len(results) == 2:
+        ok &= results["1"]["keypad_press"] < results["0"]["keypad_press"]
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+bench_surface.py
+
+Meetmodus voor de PIL -> Tk overdracht van het overlay-frame.
+
+Vergelijkt over N opeenvolgende renders (standaard 1000):
+- "new":   elke keer een nieuw ImageTk.PhotoImage + canvas leeg + create_image
+           (oude gedrag van _render_blur)
+- "paste": ImageSurface, ImageTk.PhotoImage.paste in een blijvend beeld
+- "ppm":   ImageSurface, ruwe P6-bytes naar een blijvend tk.PhotoImage
+
+Rapporteert ms per conversie en de RSS-groei over de hele reeks.
+Heeft een display nodig (op Linux bijv. onder Xvfb).
+
+Gebruik:
+    python bench_surface.py                       # 1920x1080, 1000 renders
+    python bench_surface.py -W 3840 -H 2160 -n 200
+"""
+
+import argparse
+import time
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+from bench_render import synthetic_frame
+from image_surface import ImageSurface
+
+
+def current_rss_bytes():
+    """Huidige RSS (niet de piek), zodat groei zichtbaar wordt."""
+    try:
+        with open("/proc/self/statm") as f:
+            import os
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        pass
+    import ctypes
+    from ctypes import wintypes
+
+    class PMC(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (n, ctypes.c_size_t) for n in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+    pmc = PMC()
+    pmc.cb = ctypes.sizeof(PMC)
+    ctypes.windll.psapi.GetProcessMemoryInfo(
+        ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+    return pmc.WorkingSetSize
+
+
+class NewPhotoEachTime:
+    """Referentie: het oude pad met een nieuw PhotoImage per render."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.ref = None
+
+    def update(self, img):
+        self.ref = ImageTk.PhotoImage(img)
+        self.canvas.delete("all")
+        self.canvas.create_image(0, 0, anchor="nw", image=self.ref)
+
+
+def run(root, canvas, mode, frames, n):
+    if mode == "new":
+        target = NewPhotoEachTime(canvas)
+    else:
+        canvas.delete("all")
+        target = ImageSurface(canvas, frames[0].width, frames[0].height, mode)
+    target.update(frames[0])
+    root.update()
+    rss0 = current_rss_bytes()
+    times = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        target.update(frames[i % len(frames)])
+        root.update_idletasks()
+        times.append((time.perf_counter() - t0) * 1000.0)
+        if i % 50 == 0:
+            root.update()
+    root.update()
+    rss1 = current_rss_bytes()
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.95)], (rss1 - rss0) / 2**20
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("-W", "--width", type=int, default=1920)
+    ap.add_argument("-H", "--height", type=int, default=1080)
+    ap.add_argument("-n", "--renders", type=int, default=1000)
+    ap.add_argument("-m", "--mode", nargs="+", default=["new", "paste", "ppm"])
+    args = ap.parse_args()
+
+    root = tk.Tk()
+    root.geometry(f"{args.width}x{args.height}+0+0")
+    canvas = tk.Canvas(root, highlightthickness=0, bd=0, bg="black")
+    canvas.pack(fill="both", expand=True)
+
+    # twee verschillende frames afwisselen, zodat niets gecachet kan worden
+    a = synthetic_frame(args.width, args.height)
+    b = a.transpose(Image.FLIP_LEFT_RIGHT)
+
+    print(f"{args.width}x{args.height}, {args.renders} renders")
+    print(f"{'modus':6} {'ms p50':>8} {'ms p95':>8} {'RSS +MB':>8}")
+    for mode in args.mode:
+        p50, p95, grow = run(root, canvas, mode, [a, b], args.renders)
+        print(f"{mode:6} {p50:8.2f} {p95:8.2f} {grow:8.1f}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
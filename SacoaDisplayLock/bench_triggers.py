@@ -0,0 +1,126 @@
+"""
+bench_triggers.py
+
+Overspoelingstest voor de trigger-keten: ESP32-simulator (pty) -> SerialFrameReader
+-> TriggerGate -> 'Tk'-thread.
+
+De UI-thread is een eenvoudige event-lus met een wachtrij (zoals Tk) die
+elke 10 ms een tik verwacht; gemeten wordt hoe laat die tikken zijn terwijl
+er ~10.000 triggers per seconde binnenkomen. Daarnaast: de diepte van de
+UI-wachtrij (moet <= 1 trigger-callback blijven) en de tellers van de gate.
+
+Gebruik:
+    python bench_triggers.py                    # 10k/s gedurende 3 s, debounce 1.0 s
+    python bench_triggers.py --rate 20000 --interval 0
+Exitcode 1 als de UI-lag of de wachtrij de grens overschrijdt.
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from esp32_sim import Esp32Sim, open_pty, open_port, TRIGGER_LINE
+from serial_frames import SerialFrameReader
+from trigger_queue import TriggerGate
+
+UI_TICK = 0.010
+MAX_UI_LAG_MS = 50.0
+
+
+def blast(sim, rate, seconds, stop):
+    """Stuur ``rate`` triggers/s in batches van 1 ms."""
+    per_ms = max(1, rate // 1000)
+    chunk = TRIGGER_LINE * per_ms
+    end = time.monotonic() + seconds
+    nxt = time.monotonic()
+    while time.monotonic() < end and not stop.is_set():
+        sim.send_raw(chunk)
+        sim.sent += per_ms
+        nxt += 0.001
+        delay = nxt - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rate", type=int, default=10000, help="triggers per seconde")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--interval", type=float, default=1.0, help="TRIGGER_MIN_INTERVAL")
+    args = ap.parse_args()
+
+    ui_q = queue.SimpleQueue()
+    depth = {"max": 0, "cur": 0}
+    depth_lock = threading.Lock()
+
+    def post(fn):
+        with depth_lock:
+            depth["cur"] += 1
+            depth["max"] = max(depth["max"], depth["cur"])
+        ui_q.put(fn)
+
+    handled = []
+    gate = TriggerGate(post, lambda rx, src, payload: handled.append(time.monotonic() - rx),
+                       args.interval)
+
+    master, slave, name = open_pty()
+    sim = Esp32Sim(master)
+    port = open_port(name, timeout=0.2)
+    reader = SerialFrameReader(port)
+    stop = threading.Event()
+
+    def read_loop():
+        while not stop.is_set():
+            for f in reader.read_frames():
+                if f.line == "TRIGGER":
+                    gate.offer(f.time)
+
+    threading.Thread(target=read_loop, daemon=True).start()
+    sender = threading.Thread(target=blast, args=(sim, args.rate, args.seconds, stop))
+    sender.start()
+
+    # UI-lus: tikken om de UI_TICK, tussendoor callbacks afhandelen
+    lags = []
+    next_tick = time.monotonic() + UI_TICK
+    end = time.monotonic() + args.seconds + 0.5
+    while time.monotonic() < end:
+        timeout = next_tick - time.monotonic()
+        try:
+            fn = ui_q.get(timeout=max(0.0, timeout))
+            with depth_lock:
+                depth["cur"] -= 1
+            fn()
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        if now >= next_tick:
+            lags.append((now - next_tick) * 1000.0)
+            next_tick += UI_TICK
+            if next_tick < now:
+                next_tick = now + UI_TICK
+    stop.set()
+    sender.join()
+    time.sleep(0.3)
+    port.close()
+    os.close(master)
+    os.close(slave)
+
+    lags.sort()
+    st = gate.stats()
+    p99 = lags[int(len(lags) * 0.99)]
+    print(f"verstuurd {sim.sent} ({sim.sent/args.seconds:,.0f}/s), gate: {st}")
+    print(f"UI-lag p50 {lags[len(lags)//2]:.2f} ms, p99 {p99:.2f} ms, max {lags[-1]:.2f} ms; "
+          f"max wachtrijdiepte {depth['max']}")
+    if handled:
+        h = sorted(handled)
+        print(f"trigger -> handler p50 {h[len(h)//2]*1000:.2f} ms")
+    ok = p99 < MAX_UI_LAG_MS and depth["max"] <= 1
+    print("OK" if ok else "FOUT")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+card_store.py
+
+Kaart-allowlist/blocklist voor sacoa_overlay_lock.py.
+
+Lezers sturen ``CARD <UID>`` (hex, scheidingstekens mogen) in plaats van of
+naast het kale ``TRIGGER``. De UID wordt opgezocht in een kaartenbestand:
+
+    # UID           sessieduur (s) of 'block'
+    04A1B2C3D4      600
+    04:FF:EE:00:11  block
+    0499887766                       # geen duur = AUTO_RELOCK_SECONDS
+
+Index: een open-adressering hashtabel in twee ``array``s (64-bit gezouten
+hash per slot + sessieduur), vullingsgraad <= 50%. Opzoeken is O(1): één
+hash en gemiddeld ~1,5 slot. 100k kaarten kosten zo ~3 MB in plaats van de
+~10 MB van een dict met strings. Optioneel een Bloom-filter ervoor, zodat
+onbekende kaarten zonder probe geweigerd worden; in pure Python is dat pas
+winst als de index zelf duur is (zie bench_cards.py --bloom), dus standaard uit.
+
+Herladen gebeurt op de achtergrond; de nieuwe index wordt in één toewijzing
+ingewisseld (zoals pin_store.py in DisplayLock).
+"""
+
+import hashlib
+import math
+import secrets
+import threading
+from array import array
+
+BLOCKED = -1            # sessieduur-waarde voor geblokkeerde kaarten
+DEFAULT_SESSION = 0     # 'geen duur opgegeven' -> de app gebruikt AUTO_RELOCK_SECONDS
+MAX_SESSION = 2**31 - 1  # past nog in de array('i') van de index
+MODE_ALLOW = "allow"    # alleen kaarten uit het bestand (en niet geblokkeerd)
+MODE_BLOCK = "block"    # alle kaarten behalve geblokkeerde
+_SEPARATORS = str.maketrans("", "", ":- \t")
+
+
+def normalize_uid(uid):
+    """'04:a1-b2 c3' -> '04A1B2C3'."""
+    return uid.translate(_SEPARATORS).upper()
+
+
+def _hasher(salt):
+    """Gezouten BLAKE2b-sjabloon; ``copy()`` is twee keer sneller dan steeds opnieuw sleutelen."""
+    return hashlib.blake2b(key=salt, digest_size=8)
+
+
+def _hash(template, uid):
+    h = template.copy()
+    h.update(uid.encode("ascii", "ignore"))
+    return int.from_bytes(h.digest(), "little") or 1       # 0 = leeg slot
+
+
+def iter_card_entries(text):
+    """Regels -> (uid, sessieduur). Ongeldige duur -> ValueError met regelnummer."""
+    for no, raw in enumerate(text.splitlines(), 1):
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        uid = normalize_uid(parts[0])
+        if len(parts) == 1:
+            yield uid, DEFAULT_SESSION
+            continue
+        val = "".join(parts[1:]).lower()
+        if val == "block":
+            yield uid, BLOCKED
+        else:
+            try:
+                secs = int(val)
+            except ValueError:
+                raise ValueError(f"regel {no}: ongeldige sessieduur {val!r}") from None
+            if secs < 0:
+                raise ValueError(f"regel {no}: negatieve sessieduur")
+            if secs > MAX_SESSION:
+                raise ValueError(f"regel {no}: sessieduur {secs} te groot (max {MAX_SESSION})")
+            yield uid, secs
+
+
+class BloomFilter:
+    """Bitarray met k posities afgeleid van één 64-bit hash (dubbel hashen)."""
+
+    def __init__(self, n, fp_rate=0.01):
+        n = max(1, n)
+        self.m = max(64, int(-n * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.k = max(1, round(self.m / n * math.log(2)))
+        self.bits = bytearray((self.m + 7) // 8)
+
+    def _positions(self, h):
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        m = self.m
+        return [(h1 + i * h2) % m for i in range(self.k)]
+
+    def add(self, h):
+        for p in self._positions(h):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, h):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(h))
+
+
+class CardIndex:
+    """Onveranderlijke index; wordt als geheel vervangen bij een herlaad."""
+
+    def __init__(self, salt, keys, sessions, count, bloom=None):
+        self.salt = salt
+        self._hasher = _hasher(salt)
+        self.keys = keys            # array('Q'), lengte = macht van 2; 0 = leeg
+        self.sessions = sessions    # array('i'), zelfde slot
+        self.mask = len(keys) - 1
+        self.count = count
+        self.bloom = bloom
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def empty(cls):
+        return cls(b"\0" * 16, array("Q", [0]), array("i", [0]), 0)
+
+    @classmethod
+    def build(cls, entries, bloom=False, salt=None):
+        salt = salt or secrets.token_bytes(16)
+        entries = list(entries)
+        size = 1 << max(4, (2 * len(entries) - 1).bit_length())     # vullingsgraad <= 50%
+        keys = array("Q", bytes(8 * size))
+        sessions = array("i", bytes(4 * size))
+        mask = size - 1
+        count = 0
+        bf = BloomFilter(len(entries)) if bloom else None
+        template = _hasher(salt)
+        for uid, secs in entries:
+            h = _hash(template, uid)
+            i = h & mask
+            while keys[i] and keys[i] != h:
+                i = (i + 1) & mask
+            if not keys[i]:
+                count += 1
+                keys[i] = h
+                if bf is not None:
+                    bf.add(h)
+            sessions[i] = secs          # laatste regel wint bij dubbele UID's
+        return cls(salt, keys, sessions, count, bf)
+
+    def lookup(self, uid):
+        """Sessieduur (>= 0), BLOCKED, of None als de kaart niet in de lijst staat."""
+        h = _hash(self._hasher, normalize_uid(uid))
+        if self.bloom is not None and h not in self.bloom:
+            return None
+        keys, mask = self.keys, self.mask
+        i = h & mask
+        while True:
+            k = keys[i]
+            if k == h:
+                return self.sessions[i]
+            if not k:
+                return None
+            i = (i + 1) & mask
+
+    @property
+    def nbytes(self):
+        n = self.keys.itemsize * len(self.keys) + self.sessions.itemsize * len(self.sessions)
+        return n + (len(self.bloom.bits) if self.bloom else 0)
+
+
+def load_index(path, bloom=False):
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return CardIndex.empty()
+    return CardIndex.build(iter_card_entries(text), bloom=bloom)
+
+
+class CardStore:
+    """
+    Actuele ``CardIndex`` plus de beslisregel. ``check`` is thread-safe
+    (leest één referentie) en mag dus in de seriële thread draaien.
+    """
+
+    def __init__(self, path, mode=MODE_ALLOW, bloom=False, on_swap=None):
+        self.path = path
+        self.mode = mode
+        self.bloom = bloom
+        self.on_swap = on_swap
+        self.index = CardIndex.empty()
+        self._loading = threading.Lock()
+        self._again = False
+        self.loads = 0
+        self.last_error = ""
+
+    def load(self):
+        try:
+            self._swap(load_index(self.path, self.bloom))
+        except (OSError, UnicodeDecodeError, ValueError, OverflowError) as e:
+            self.last_error = str(e)
+
+    def reload_async(self):
+        """Herladen op de achtergrond; tijdens een lopende herlaad wordt er één ingepland."""
+        # eerst de vlag, dan pas proberen: een worker die net vrijgeeft ziet hem dan altijd
+        self._again = True
+        if not self._loading.acquire(blocking=False):
+            return
+        threading.Thread(target=self._worker, name="CardStore", daemon=True).start()
+
+    def _worker(self):
+        while True:
+            self._again = False
+            try:
+                self.load()         # bij een fout blijft de oude index gelden
+            finally:
+                self._loading.release()
+            if not self._again or not self._loading.acquire(blocking=False):
+                return
+
+    def _swap(self, index):
+        self.index = index
+        self.loads += 1
+        self.last_error = ""
+        if self.on_swap:
+            self.on_swap(index)
+
+    def check(self, uid):
+        """
+        None = weigeren; anders de sessieduur in seconden (0 = standaardduur).
+        """
+        secs = self.index.lookup(uid)
+        if secs == BLOCKED:
+            return None
+        if secs is None:
+            return DEFAULT_SESSION if self.mode == MODE_BLOCK else None
+        return secs
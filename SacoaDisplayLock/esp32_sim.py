@@ -0,0 +1,221 @@
+"""
+esp32_sim.py
+
+Stand-in voor de ESP32 uit sacoa_serial_trigger_esp32.cpp, via een pty (Linux/macOS).
+
+De simulator opent een pseudo-terminal en schrijft ``TRIGGER\\r\\n`` naar de
+master-kant; de slave-kant (bijv. /dev/pts/5) gedraagt zich als een
+seriële poort en kan als COM_PORT gebruikt worden.
+
+Met ``start_link`` gedraagt hij zich als firmware met link-bewaking: elke
+``heartbeat`` s een ``HB <n>`` en een ``PONG <n>`` op elke ``PING <n>`` van de
+PC. ``hang()`` bootst een vastgelopen bord na (niets meer sturen).
+
+Gebruik:
+    python esp32_sim.py                 # print pty-pad, TRIGGER bij elke Enter
+    python esp32_sim.py --every 2       # elke 2 s een TRIGGER
+    python esp32_sim.py --heartbeat 1   # ook HB + PONG (nieuwe firmware)
+    python esp32_sim.py --selftest      # SerialFrameReader tegen de pty testen
+"""
+
+import argparse
+import os
+import random
+import select
+import sys
+import threading
+import time
+
+TRIGGER_LINE = b"TRIGGER\r\n"
+
+
+def open_pty():
+    """Retourneert (master_fd, slave_pad) met de slave in raw-modus."""
+    import pty
+    import tty
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+    name = os.ttyname(slave)
+    return master, slave, name
+
+
+class Esp32Sim:
+    def __init__(self, master_fd):
+        self.fd = master_fd
+        self.sent = 0
+        self._lock = threading.Lock()
+        self.hung = False
+        self.pings = 0
+        self._link_stop = threading.Event()
+
+    def send_raw(self, data):
+        with self._lock:
+            view = memoryview(data)
+            while view:
+                n = os.write(self.fd, view)
+                view = view[n:]
+
+    def send_trigger(self):
+        self.send_raw(TRIGGER_LINE)
+        self.sent += 1
+        return time.monotonic()
+
+    def send_card(self, uid):
+        """Kaartlezer: ``CARD <UID>`` zoals sendCard() in de firmware."""
+        self.send_raw(f"CARD {uid}\r\n".encode("ascii"))
+        self.sent += 1
+        return time.monotonic()
+
+    def start_link(self, heartbeat=1.0):
+        """Heartbeats sturen en PINGs beantwoorden, elk in een eigen thread."""
+        self._link_stop.clear()
+        threading.Thread(target=self._heartbeats, args=(heartbeat,), daemon=True).start()
+        threading.Thread(target=self._responder, daemon=True).start()
+
+    def stop_link(self):
+        self._link_stop.set()
+
+    def hang(self, hung=True):
+        """Bord hangt: geen HB en geen PONG meer (tot hang(False))."""
+        self.hung = hung
+
+    def _heartbeats(self, interval):
+        n = 0
+        while not self._link_stop.wait(interval):
+            if not self.hung:
+                n += 1
+                self.send_raw(f"HB {n}\r\n".encode("ascii"))
+
+    def _responder(self):
+        buf = b""
+        while not self._link_stop.is_set():
+            r, _, _ = select.select([self.fd], [], [], 0.1)
+            if not r:
+                continue
+            try:
+                buf += os.read(self.fd, 4096)
+            except OSError:
+                return
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                word, _, arg = line.strip().decode("ascii", "ignore").partition(" ")
+                if word == "PING":
+                    self.pings += 1
+                    if not self.hung:
+                        self.send_raw(f"PONG {arg}\r\n".encode("ascii"))
+
+    def send_burst(self, count, rng=None, noise=False):
+        """``count`` triggers als één bytestroom, in willekeurige stukken geschreven."""
+        rng = rng or random.Random(0)
+        stream = bytearray()
+        for _ in range(count):
+            if noise and rng.random() < 0.2:
+                stream += b"\x00garbage\r\n"
+            stream += TRIGGER_LINE
+        i = 0
+        while i < len(stream):
+            n = rng.randint(1, 23)
+            self.send_raw(bytes(stream[i:i + n]))
+            i += n
+            if rng.random() < 0.05:
+                time.sleep(0.001)
+        self.sent += count
+
+
+def open_port(path, timeout):
+    """pyserial als die er is, anders een minimale os-read stand-in."""
+    try:
+        import serial
+        return serial.Serial(path, 9600, timeout=timeout)
+    except ImportError:
+        pass
+    import select
+
+    class _FdPort:
+        def __init__(self):
+            self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+
+        @property
+        def in_waiting(self):
+            r, _, _ = select.select([self.fd], [], [], 0)
+            return 4096 if r else 0
+
+        def read(self, n):
+            r, _, _ = select.select([self.fd], [], [], timeout)
+            return os.read(self.fd, n) if r else b""
+
+        def close(self):
+            os.close(self.fd)
+
+    return _FdPort()
+
+
+def selftest(count):
+    from serial_frames import SerialFrameReader
+
+    master, slave, name = open_pty()
+    sim = Esp32Sim(master)
+    port = open_port(name, timeout=0.2)
+    reader = SerialFrameReader(port)
+
+    # 1) burst met willekeurige chunkgrenzen en ruisregels
+    sender = threading.Thread(target=sim.send_burst, args=(count,), kwargs={"noise": True})
+    sender.start()
+    got = 0
+    deadline = time.monotonic() + 10
+    while got < count and time.monotonic() < deadline:
+        got += sum(1 for f in reader.read_frames() if f.line == "TRIGGER")
+    sender.join()
+    extra = sum(1 for f in reader.read_frames() if f.line == "TRIGGER")
+    ok_burst = got == count and extra == 0
+    print(f"burst:   {count} verstuurd, {got + extra} ontvangen -> {'OK' if ok_burst else 'FOUT'}")
+
+    # 2) latentie van losse triggers
+    lat = []
+    for _ in range(200):
+        t_sent = sim.send_trigger()
+        frames = []
+        while not frames:
+            frames = reader.read_frames()
+        lat.append((frames[-1].time - t_sent) * 1000.0)
+    lat.sort()
+    print(f"latentie: p50 {lat[len(lat)//2]:.3f} ms, p99 {lat[int(len(lat)*0.99)]:.3f} ms")
+
+    port.close()
+    os.close(master)
+    os.close(slave)
+    return ok_burst
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--every", type=float, default=0, help="automatisch elke X seconden een TRIGGER")
+    ap.add_argument("--heartbeat", type=float, default=0, help="HB elke X seconden en PONG op PING")
+    ap.add_argument("--selftest", action="store_true")
+    ap.add_argument("-n", "--count", type=int, default=10000)
+    args = ap.parse_args()
+
+    if args.selftest:
+        sys.exit(0 if selftest(args.count) else 1)
+
+    master, slave, name = open_pty()
+    sim = Esp32Sim(master)
+    if args.heartbeat > 0:
+        sim.start_link(args.heartbeat)
+    print(f"ESP32-simulator op {name}  (Ctrl+C om te stoppen)")
+    try:
+        if args.every > 0:
+            while True:
+                time.sleep(args.every)
+                sim.send_trigger()
+                print("TRIGGER")
+        else:
+            for _ in sys.stdin:
+                sim.send_trigger()
+                print("TRIGGER")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
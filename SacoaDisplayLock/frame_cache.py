@@ -0,0 +1,201 @@
+"""
+frame_cache.py
+
+Achtergrond-renderer die steeds een kant-en-klaar overlay-frame klaarhoudt.
+
+Een werkthread maakt periodiek een screenshot van de monitor. Van dat
+screenshot wordt eerst een goedkope hash over een sterk verkleinde versie
+berekend; alleen als die afwijkt van het vorige frame wordt er opnieuw
+geblurd en gedimd. Het resultaat gaat via ``on_frame`` naar de app.
+
+Zolang de overlay zichtbaar is staat de cache op pauze, anders zou hij de
+overlay zelf fotograferen.
+
+``MultiFrameCache`` doet hetzelfde voor meerdere monitors tegelijk: per
+monitor screenshot + blur + dim in een threadpool (PIL en numpy laten de GIL
+los tijdens het zware werk), zodat N schermen ongeveer even lang duren als één.
+"""
+
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SIGNATURE_SIZE = (64, 36)   # grootte waarop de inhoud vergeleken wordt
+
+
+def content_signature(img):
+    """Goedkope vingerafdruk van de beeldinhoud (NEAREST, geen filtering)."""
+    small = img.resize(SIGNATURE_SIZE, 0)   # 0 = Image.NEAREST
+    return hashlib.blake2b(small.tobytes(), digest_size=16).digest()
+
+
+class FrameCache:
+    """
+    ``grab()``        -> ruwe screenshot (PIL Image)
+    ``render(img)``   -> geblurd/gedimd frame
+    ``on_frame(img)`` wordt vanuit de werkthread aangeroepen met elk nieuw frame.
+    """
+
+    def __init__(self, grab, render, on_frame, interval=5.0):
+        self._grab = grab
+        self._render = render
+        self._on_frame = on_frame
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = threading.Event()   # gezet = mag renderen
+        self._stop = False
+        self._thread = None
+
+        self._signature = None
+        self.frame = None
+        self.frame_time = 0.0
+        self.renders = 0
+        self.skips = 0
+        self.errors = 0
+        self.last_render_ms = 0.0
+
+    # ----- besturing -----
+    def start(self):
+        if self._thread is None:
+            self._running.set()
+            self._thread = threading.Thread(target=self._loop, name="FrameCache", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop = True
+        self._running.set()
+        self._wake.set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self, refresh=True):
+        """Weer renderen; ``refresh=False`` wacht op ``refresh_now()`` of het interval."""
+        self._running.set()
+        if refresh:
+            self._wake.set()
+
+    def refresh_now(self):
+        self._wake.set()
+
+    def latest(self):
+        with self._lock:
+            return self.frame
+
+    # ----- werkthread -----
+    def _loop(self):
+        while not self._stop:
+            if not self._running.is_set():
+                self._running.wait()
+                # resume(refresh=False): pas bij refresh_now() of na het interval een frame
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                continue
+            self._tick()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _tick(self):
+        try:
+            raw = self._grab()
+            # overlay kan tijdens de screenshot verschenen zijn: frame weggooien
+            if not self._running.is_set():
+                return
+            sig = content_signature(raw)
+            if sig == self._signature and self.frame is not None:
+                self.skips += 1
+                return
+            t0 = time.perf_counter()
+            frame = self._render(raw)
+            self.last_render_ms = (time.perf_counter() - t0) * 1000.0
+            if not self._running.is_set():
+                return
+            with self._lock:
+                self._signature = sig
+                self.frame = frame
+                self.frame_time = time.monotonic()
+            self.renders += 1
+            self._on_frame(frame)
+        except Exception:
+            self.errors += 1
+
+
+class MultiFrameCache(FrameCache):
+    """
+    ``grabs`` / ``renders``: één grab- en render-functie per monitor (eigen
+    engine per monitor: NumpyEngine hergebruikt buffers en is niet thread-safe).
+    ``on_frame(index, img)`` wordt vanuit een poolthread aangeroepen.
+    ``last_render_ms`` is de wandkloktijd van de hele ronde (alle monitors).
+    """
+
+    def __init__(self, grabs, renders, on_frame, interval=5.0, workers=None):
+        super().__init__(None, None, None, interval)
+        self._grabs = list(grabs)
+        self._renders = list(renders)
+        self._on_frame_i = on_frame
+        self._pool = ThreadPoolExecutor(max_workers=workers or len(self._grabs),
+                                        thread_name_prefix="FrameRender")
+        n = len(self._grabs)
+        self._signatures = [None] * n
+        self.frames = [None] * n
+        self.screen_render_ms = [0.0] * n
+
+    def stop(self):
+        super().stop()
+        self._pool.shutdown(wait=False)
+
+    def latest(self, index=0):
+        with self._lock:
+            return self.frames[index]
+
+    def set_renders(self, renders):
+        """Andere blur/dim (instellingen herladen): nieuwe engines, alle schermen opnieuw renderen."""
+        with self._lock:
+            self._renders = list(renders)
+            self._signatures = [None] * len(self._grabs)
+        self.refresh_now()
+
+    def _tick(self):
+        t0 = time.perf_counter()
+        try:
+            futures = [self._pool.submit(self._tick_screen, i) for i in range(len(self._grabs))]
+        except RuntimeError:        # stop() heeft de pool al afgesloten (bijv. schermwissel)
+            return
+        rendered = sum(1 for f in futures if f.result())
+        if rendered:
+            self.last_render_ms = (time.perf_counter() - t0) * 1000.0
+
+    def _tick_screen(self, i):
+        try:
+            raw = self._grabs[i]()
+            if not self._running.is_set():
+                return False
+            sig = content_signature(raw)
+            if sig == self._signatures[i] and self.frames[i] is not None:
+                with self._lock:
+                    self.skips += 1
+                return False
+            render = self._renders[i]
+            t0 = time.perf_counter()
+            frame = render(raw)
+            self.screen_render_ms[i] = (time.perf_counter() - t0) * 1000.0
+            if not self._running.is_set():
+                return False
+            with self._lock:
+                if render is not self._renders[i]:
+                    return False        # engine intussen vervangen: dit frame is verouderd
+                self._signatures[i] = sig
+                self.frames[i] = frame
+                if i == 0:
+                    self.frame = frame
+                self.frame_time = time.monotonic()
+                self.renders += 1
+            self._on_frame_i(i, frame)
+            return True
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            return False
@@ -0,0 +1,64 @@
+"""
+image_surface.py
+
+Eén blijvend PhotoImage + één canvas-item voor het overlay-frame.
+
+In plaats van bij elk frame een nieuw ``ImageTk.PhotoImage`` te maken en het
+canvas leeg te gooien, wordt hetzelfde Tk-beeld steeds overschreven:
+- "paste": ``ImageTk.PhotoImage.paste`` in het bestaande beeld
+- "ppm":   ruwe P6-bytes rechtstreeks aan Tk geven (geen tussenstap via PIL-ImageTk)
+
+De canvas-teksten horen hier niet bij; die worden één keer aangemaakt en
+blijven staan. Het beeld-item ligt altijd onderop.
+"""
+
+import tkinter as tk
+
+SURFACE_MODES = ("paste", "ppm")
+
+
+def ppm_bytes(img):
+    """RGB PIL-beeld als binaire PPM (P6)."""
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    w, h = img.size
+    return b"P6 %d %d 255\n" % (w, h) + img.tobytes()
+
+
+class ImageSurface:
+    def __init__(self, canvas, width, height, mode="paste"):
+        if mode not in SURFACE_MODES:
+            raise ValueError(f"onbekende surface-modus: {mode!r}")
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.photo = None
+        self.has_frame = False
+        self.updates = 0
+
+        if mode == "paste":
+            from PIL import ImageTk
+            self.photo = ImageTk.PhotoImage("RGB", (width, height))
+        else:
+            self.photo = tk.PhotoImage(master=canvas, width=width, height=height)
+        self.item = canvas.create_image(0, 0, anchor="nw", image=self.photo)
+        canvas.tag_lower(self.item)
+
+    def update(self, img):
+        """Overschrijf het bestaande beeld met ``img`` (zelfde afmetingen als het scherm)."""
+        if img.size != (self.width, self.height):
+            img = img.resize((self.width, self.height))
+        if self.mode == "paste":
+            self.photo.paste(img)
+        else:
+            self.photo.configure(data=ppm_bytes(img), format="PPM")
+        self.has_frame = True
+        self.updates += 1
+
+    def clear(self, color="black"):
+        """Geen frame beschikbaar: transparant beeld op een effen achtergrond."""
+        # str(photo) is de Tk-naam van het beeld, voor ImageTk.PhotoImage én tk.PhotoImage
+        self.canvas.tk.call(str(self.photo), "blank")
+        self.canvas.configure(bg=color)
+        self.has_frame = False
@@ -0,0 +1,191 @@
+"""
+link_health.py
+
+Bewaking van de seriële lezers: heartbeats van het bordje en een
+ping/pong-round-trip vanaf de PC.
+
+Protocol (naast TRIGGER / CARD, zie sacoa_serial_trigger_esp32.cpp):
+    bord -> PC   HB <n>      elke HEARTBEAT_SECONDS
+    PC -> bord   PING <n>
+    bord -> PC   PONG <n>
+
+Een poort wordt pas bewaakt nadat er een ``HB`` van binnenkwam. Oude firmware
+die alleen ``TRIGGER`` stuurt blijft dus 'onbekend', wordt nooit offline
+gemeld en krijgt ook geen PING-bytes te zien.
+
+Is een bewaakte poort ``misses`` heartbeats lang stil (elke regel telt als
+teken van leven), dan gaat de status naar offline en vraagt de monitor de
+hub om direct opnieuw te verbinden (zonder backoff-wachttijd). De eerste
+regel daarna maakt de poort weer online.
+
+``on_frame`` draait in de SerialHub-thread, ``tick`` op de Tk-thread (via
+de scheduler); de gedeelde toestand staat achter één lock.
+"""
+
+import threading
+import time
+from collections import deque
+
+HEARTBEAT_WORD = "HB"
+PING_WORD = "PING"
+PONG_WORD = "PONG"
+RTT_WINDOW = 100            # laatste N round-trips voor p50/p99
+ONLINE, OFFLINE, UNKNOWN = "online", "offline", "onbekend"
+
+
+class _Link:
+    __slots__ = ("source", "supervised", "last_rx", "offline", "offline_at", "heartbeats",
+                 "offlines", "reconnects", "ping_seq", "last_ping", "pending", "rtts", "lost")
+
+    def __init__(self, source, now):
+        self.source = source
+        self.supervised = False
+        self.last_rx = now
+        self.offline = False
+        self.offline_at = 0.0
+        self.heartbeats = 0
+        self.offlines = 0
+        self.reconnects = 0
+        self.ping_seq = 0
+        self.last_ping = now
+        self.pending = {}           # seq -> verzendtijd
+        self.rtts = deque(maxlen=RTT_WINDOW)
+        self.lost = 0               # PINGs zonder PONG
+
+    def percentile(self, q):
+        if not self.rtts:
+            return None
+        vals = sorted(self.rtts)
+        return vals[min(len(vals) - 1, int(len(vals) * q))] * 1000.0
+
+
+class LinkMonitor:
+    """
+    ``send(source, data)`` en ``reconnect(source)``: normaal ``SerialHub.send``
+    en ``SerialHub.reconnect``. ``on_change(source, online)`` komt uit ``tick``.
+    """
+
+    def __init__(self, send, reconnect, heartbeat=1.0, misses=3, ping_interval=5.0,
+                 on_change=None, clock=time.monotonic):
+        self.send = send
+        self.reconnect = reconnect
+        self.heartbeat = heartbeat
+        self.misses = misses
+        self.ping_interval = ping_interval
+        self.on_change = on_change
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._links = {}
+
+    @property
+    def timeout(self):
+        return self.heartbeat * self.misses
+
+    # ----- hub-thread -----
+    def on_frame(self, frame, source):
+        """Elke regel van een lezer. True = heartbeat/pong, verder niet verwerken."""
+        word, _, arg = frame.line.partition(" ")
+        with self._lock:
+            link = self._links.get(source)
+            if link is None:
+                link = self._links[source] = _Link(source, frame.time)
+            link.last_rx = frame.time
+            if word == HEARTBEAT_WORD:
+                link.heartbeats += 1
+                link.supervised = True
+                return True
+            if word == PONG_WORD:
+                sent = link.pending.pop(arg, None)
+                if sent is not None:
+                    link.rtts.append(frame.time - sent)
+                return True
+        return False
+
+    # ----- Tk-thread -----
+    def tick(self):
+        """Periodiek (bijv. elke heartbeat/2): offline/online bepalen en pingen."""
+        now = self.clock()
+        changes, pings, reconnects = [], [], []
+        with self._lock:
+            for link in self._links.values():
+                if not link.supervised:
+                    continue
+                if link.offline:
+                    if link.last_rx > link.offline_at:
+                        link.offline = False
+                        changes.append((link.source, True))
+                    elif now - link.offline_at > self.timeout:
+                        # nog steeds stil: opnieuw proberen, één keer per time-out
+                        link.offline_at = now
+                        link.reconnects += 1
+                        reconnects.append(link.source)
+                elif now - link.last_rx > self.timeout:
+                    link.offline = True
+                    link.offline_at = now
+                    link.offlines += 1
+                    link.reconnects += 1
+                    link.pending.clear()
+                    changes.append((link.source, False))
+                    reconnects.append(link.source)
+                if not link.offline and now - link.last_ping >= self.ping_interval:
+                    for seq, sent in list(link.pending.items()):
+                        if now - sent > 2 * self.ping_interval:
+                            del link.pending[seq]
+                            link.lost += 1
+                    link.ping_seq += 1
+                    link.last_ping = now
+                    link.pending[str(link.ping_seq)] = now
+                    pings.append((link.source, f"{PING_WORD} {link.ping_seq}\n".encode("ascii")))
+        for source, data in pings:
+            self.send(source, data)
+        for source in reconnects:
+            self.reconnect(source)
+        if self.on_change:
+            for source, online in changes:
+                self.on_change(source, online)
+
+    # ----- status -----
+    def state(self, source):
+        with self._lock:
+            link = self._links.get(source)
+            if link is None or not link.supervised:
+                return UNKNOWN
+            return OFFLINE if link.offline else ONLINE
+
+    def offline_sources(self):
+        with self._lock:
+            return [s for s, link in self._links.items() if link.supervised and link.offline]
+
+    def summary(self):
+        """Totaal over alle lezers: offline zodra er één offline is."""
+        with self._lock:
+            watched = [link for link in self._links.values() if link.supervised]
+            offline = sum(1 for link in watched if link.offline)
+            rtts = sorted(r for link in watched for r in link.rtts)
+        if not watched:
+            overall = UNKNOWN
+        else:
+            overall = OFFLINE if offline else ONLINE
+        return {
+            "reader": overall,
+            "readers_offline": offline,
+            "reader_rtt_ms": round(rtts[len(rtts) // 2] * 1000.0, 2) if rtts else None,
+        }
+
+    def details(self):
+        """Per poort: toestand, heartbeats, rtt p50/p99, offline-meldingen."""
+        with self._lock:
+            links = list(self._links.values())
+            out = {}
+            for link in links:
+                p50, p99 = link.percentile(0.5), link.percentile(0.99)
+                out[link.source] = {
+                    "state": UNKNOWN if not link.supervised else OFFLINE if link.offline else ONLINE,
+                    "heartbeats": link.heartbeats,
+                    "rtt_p50_ms": None if p50 is None else round(p50, 2),
+                    "rtt_p99_ms": None if p99 is None else round(p99, 2),
+                    "pings_lost": link.lost,
+                    "offlines": link.offlines,
+                    "reconnects": link.reconnects,
+                }
+        return out
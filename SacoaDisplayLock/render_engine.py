@@ -0,0 +1,203 @@
+"""
+render_engine.py
+
+Blur/dim render-engines voor de Sacoa-overlay.
+
+Alle engines krijgen een RGB screenshot binnen en geven een geblurd en
+gedimd beeld van dezelfde grootte terug. Kies een backend per machine met
+``make_engine(naam, ...)``; ``bench_render.py`` meet welke het snelst is.
+
+Backends:
+- "pil":   referentie, volle resolutie GaussianBlur + blend met zwart (oud gedrag)
+- "fast":  verkleinen -> blur -> dimmen via LUT -> vergroten (alleen Pillow)
+- "numpy": als "fast", maar blur en dim gevectoriseerd in NumPy (optioneel)
+"""
+
+from PIL import Image, ImageFilter
+
+np = None               # numpy pas laden als de "numpy"-backend gekozen wordt (~130 ms importtijd)
+_NUMPY_MISSING = False
+
+
+def _load_numpy():
+    global np, _NUMPY_MISSING
+    if np is None and not _NUMPY_MISSING:
+        try:
+            import numpy
+            np = numpy
+        except Exception:
+            _NUMPY_MISSING = True
+    return np is not None
+
+DEFAULT_DOWNSCALE = 4   # factor waarmee het beeld voor de blur verkleind wordt
+
+
+class RenderEngine:
+    """Basisklasse: ``render(img)`` -> geblurd en gedimd ``Image`` (RGB)."""
+
+    name = "base"
+
+    def __init__(self, blur_radius, dim_alpha):
+        self.blur_radius = blur_radius
+        self.dim_alpha = dim_alpha
+
+    def render(self, img):
+        raise NotImplementedError
+
+
+class PilReferenceEngine(RenderEngine):
+    """Volle resolutie, precies zoals ``_render_blur`` het altijd deed."""
+
+    name = "pil"
+
+    def render(self, img):
+        img = img.filter(ImageFilter.GaussianBlur(self.blur_radius))
+        if self.dim_alpha > 0:
+            black = Image.new("RGB", img.size, (0, 0, 0))
+            img = Image.blend(img, black, self.dim_alpha)
+        return img
+
+
+class FastPilEngine(RenderEngine):
+    """
+    Verkleinen -> blur -> dim -> vergroten.
+
+    Een blur met straal r op volle resolutie lijkt visueel vrijwel gelijk aan
+    een blur met straal r/f op een f-maal verkleind beeld dat weer wordt
+    opgeschaald. Dimmen is lineair en gebeurt daarom ook op het kleine beeld,
+    via één opzoektabel (geen zwart hulpbeeld, geen blend).
+
+    Pillow heeft geen in-place filters: elke stap geeft een nieuw beeld, maar
+    wel op 1/downscale² van de pixels. Filter en opzoektabel worden één keer
+    gemaakt.
+    """
+
+    name = "fast"
+
+    def __init__(self, blur_radius, dim_alpha, downscale=DEFAULT_DOWNSCALE):
+        super().__init__(blur_radius, dim_alpha)
+        self.downscale = max(1, int(downscale))
+        keep = 1.0 - dim_alpha
+        self._lut = [int(v * keep + 0.5) for v in range(256)] * 3
+        radius = blur_radius / self.downscale
+        self._blur = ImageFilter.GaussianBlur(radius) if radius > 0 else None
+
+    def _shrink(self, img):
+        f = self.downscale
+        if f == 1:
+            return img
+        # reduce() middelt blokken f×f en is veel sneller dan resize()
+        return img.reduce(f)
+
+    def render(self, img):
+        size = img.size
+        small = self._shrink(img.convert("RGB"))
+        if self._blur is not None:
+            small = small.filter(self._blur)
+        if self.dim_alpha > 0:
+            small = small.point(self._lut)
+        return small.resize(size, Image.BILINEAR)
+
+
+def _box_sizes(sigma, n=3):
+    """Breedtes van n box-filters die samen een Gauss met deze sigma benaderen."""
+    w_ideal = (12.0 * sigma * sigma / n + 1) ** 0.5
+    wl = int(w_ideal)
+    if wl % 2 == 0:
+        wl -= 1
+    wu = wl + 2
+    m_ideal = (12 * sigma * sigma - n * wl * wl - 4 * n * wl - 3 * n) / (-4 * wl - 4)
+    m = round(m_ideal)
+    return [wl if i < m else wu for i in range(n)]
+
+
+class NumpyEngine(FastPilEngine):
+    """
+    Zelfde pijplijn als "fast", maar de blur is een drievoudige box-blur via
+    cumulatieve sommen in NumPy en het dimmen is één vermenigvuldiging.
+    Alle hulpbuffers (beeld, tussenstap, randen + cumsum, uint8-uitvoer)
+    worden per beeldgrootte één keer aangemaakt en daarna in-place gevuld;
+    alleen de omzetting van en naar een PIL-beeld alloceert nog per frame.
+    """
+
+    name = "numpy"
+
+    def __init__(self, blur_radius, dim_alpha, downscale=DEFAULT_DOWNSCALE):
+        if not _load_numpy():
+            raise RuntimeError("numpy is niet geïnstalleerd")
+        super().__init__(blur_radius, dim_alpha, downscale)
+        self._widths = _box_sizes(self.blur_radius / self.downscale) if blur_radius > 0 else []
+        self._shape = None
+        self._buf = self._tmp = self._work = self._out = None
+
+    def _buffers(self, shape):
+        if shape != self._shape:
+            h, w, ch = shape
+            edge = max(self._widths, default=1)     # 2r+1 randpixels per box-breedte
+            self._shape = shape
+            self._buf = np.empty(shape, dtype=np.float32)
+            self._tmp = np.empty(shape, dtype=np.float32)
+            self._work = np.empty((h + edge, w + edge, ch), dtype=np.float32)
+            self._out = np.empty(shape, dtype=np.uint8)
+        return self._buf, self._tmp
+
+    def _box(self, src, dst, r, axis):
+        # box-blur met straal r langs één as, randen herhaald; cumsum in-place in _work
+        n = src.shape[axis]
+
+        def along(a, b):
+            idx = [slice(None)] * src.ndim
+            idx[axis] = slice(a, b)
+            return tuple(idx)
+        shape = list(src.shape)
+        shape[axis] = n + 2 * r + 1
+        c = self._work[tuple(slice(0, k) for k in shape)]
+        c[along(0, r + 1)] = src[along(0, 1)]
+        c[along(r + 1, r + 1 + n)] = src
+        c[along(r + 1 + n, n + 2 * r + 1)] = src[along(n - 1, n)]
+        np.add.accumulate(c, axis=axis, out=c)
+        np.subtract(c[along(2 * r + 1, 2 * r + 1 + n)], c[along(0, n)], out=dst)
+        dst *= 1.0 / (2 * r + 1)
+
+    def render(self, img):
+        size = img.size
+        small = self._shrink(img.convert("RGB"))
+        buf, tmp = self._buffers((small.height, small.width, 3))
+        buf[...] = np.asarray(small)
+        for w in self._widths:
+            r = (w - 1) // 2
+            if r <= 0:
+                continue
+            self._box(buf, tmp, r, axis=1)
+            self._box(tmp, buf, r, axis=0)
+        if self.dim_alpha > 0:
+            buf *= 1.0 - self.dim_alpha
+        buf += 0.5
+        np.clip(buf, 0, 255, out=buf)
+        np.copyto(self._out, buf, casting="unsafe")
+        return Image.fromarray(self._out, "RGB").resize(size, Image.BILINEAR)
+
+
+BACKENDS = {
+    PilReferenceEngine.name: PilReferenceEngine,
+    FastPilEngine.name: FastPilEngine,
+    NumpyEngine.name: NumpyEngine,
+}
+
+
+def available_backends():
+    return [n for n in BACKENDS if n != NumpyEngine.name or _load_numpy()]
+
+
+def make_engine(name, blur_radius, dim_alpha, downscale=DEFAULT_DOWNSCALE):
+    """
+    Maak een engine op naam. Valt terug op "fast" als de gevraagde backend
+    onbekend is of niet beschikbaar (bijv. "numpy" zonder numpy).
+    """
+    if name == PilReferenceEngine.name:
+        return PilReferenceEngine(blur_radius, dim_alpha)
+    cls = BACKENDS.get(name, FastPilEngine)
+    try:
+        return cls(blur_radius, dim_alpha, downscale)
+    except RuntimeError:
+        return FastPilEngine(blur_radius, dim_alpha, downscale)
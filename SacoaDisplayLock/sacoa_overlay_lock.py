@@ -6,6 +6,7 @@ Benodigd op een nieuwe PC:
    winget install Python.Python.3.12
 2) Open CMD en voer uit:
    pip install pillow pyserial
+3) Kopieer de map LockCommon mee; die moet naast deze map staan.
 
 Starttips:
 - Start met:  pythonw sacoa_overlay_lock.py   (geen consolevenster)
@@ -14,101 +15,298 @@ Starttips:
 
 import tkinter as tk
 from tkinter import messagebox
-import ctypes, sys
-from ctypes import wintypes
-import threading, time
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# gedeelde modules staan in ../LockCommon (naast deze map meekopiëren)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "LockCommon"))
+from tk_scheduler import TkScheduler
+from latency_metrics import make_metrics, ms_since
+from tk_profiler import maybe_install as maybe_install_profiler
+from lock_core import LockCore, LOCKED, UNLOCKED, single_pin_verifier
+from trigger_queue import TriggerGate
+from control_socket import core_handlers, start_control
+from monitors import get_monitors, select_monitors
+from file_watcher import FileWatcher
+from card_store import CardStore, normalize_uid
+from event_trace import maybe_record
+from link_health import LinkMonitor
+from audit_log import make_audit
+from fleet_sync import make_fleet
+from lock_config import LockConfig
 
 # ========= INSTELLINGEN =========
-SCREEN_INDEX = 0                  # 0 = primair, 1 = tweede, etc.
-START_LOCK_DELAY_SECONDS = 60     # overlay pas na X seconden tonen
-AUTO_RELOCK_SECONDS = 240         # na ontgrendelen automatisch weer locken
-COM_PORT = "COM10"                # seriële poort van ESP32/adapter (in device manager als vaste poort instellen)
-BAUDRATE = 9600
-TRIGGER_MIN_INTERVAL = 1.0        # debounce tegen meerdere pulsen
-SERVICE_PIN = "1423"              # code via Service-venster
+# Scherm, timers, seriële poorten, service-code en blur/dim staan in
+# ../lock_config.json (zie LockCommon/lock_config.py) en worden live herladen;
+# python ../LockCommon/lock_config.py toont de effectieve waarden.
+TRIGGER_WORD = "TRIGGER"          # regel die de ESP32 stuurt (Serial.println)
+CARD_PREFIX = "CARD "             # lezer met kaart-ID stuurt "CARD <UID>"; kale TRIGGER blijft werken
+CARDS_FILENAME = "sacoa_cards.txt"  # naast dit script: "<UID> [sessieduur s | block]", zie card_store.py
+CARD_MODE = "allow"               # "allow": alleen kaarten uit de lijst; "block": alle behalve 'block'
+CARD_BLOOM = False                # Bloom-filter vóór de index (pas zinvol bij zeer grote lijsten)
+
+# Latentiemetingen (uit = geen meetkosten)
+METRICS_ENABLED = False
+METRICS_FILE = "sacoa_metrics.prom"   # naast dit script, Prometheus-tekstformaat ("" = niet schrijven)
+METRICS_PORT = 0                      # > 0: http://127.0.0.1:<poort>/metrics
+
+# Besturing door kassa/kaartsysteem (zie LockCommon/control_socket.py)
+CONTROL_ENABLED = False
+CONTROL_SOCKET = "/tmp/sacoa_lock.sock"   # Unix-socket; op Windows wordt CONTROL_PORT gebruikt
+CONTROL_PORT = 47811                      # TCP op 127.0.0.1
+CONTROL_TOKEN = ""                        # niet leeg: client moet eerst 'auth <token>' sturen
+
+# Auditlog (zie LockCommon/audit_log.py; opvragen met audit_query.py)
+AUDIT_ENABLED = True
+AUDIT_FILE = "sacoa_audit.log"            # naast dit script; kaarten alleen met de laatste 4 tekens
+AUDIT_MAX_MB = 10                         # roteren vanaf deze grootte ...
+AUDIT_MAX_DAYS = 7                        # ... of deze leeftijd
+AUDIT_KEEP = 20                           # zoveel geroteerde bestanden bewaren
+
+# Fleet-sync: pins/kaarten en instellingen centraal (zie LockCommon/fleet_sync.py; uit zolang FLEET_URL leeg is)
+FLEET_URL = ""                            # bijv. "http://beheer:8765/bundle"
+FLEET_KEY_FILE = "fleet.key"              # naast dit script; gedeelde sleutel voor de handtekening
+FLEET_INTERVAL = 60                       # seconden tussen twee polls (met spreiding)
 
 # UI
-BLUR_RADIUS = 12
-DIM_ALPHA = 0.35
+SURFACE_MODE = "paste"            # "paste" of "ppm" — zie bench_surface.py
 TITLE_FONT = ("Segoe UI", 40, "bold")
 SUB_FONT   = ("Segoe UI", 30)
 SERVICE_W, SERVICE_H = 150, 45
 SERVICE_MARGIN = 40
 
+# Opstarten (zie bench_startup.py)
+FAST_START = os.environ.get("LOCK_FAST_START", "1") != "0"   # Pillow/pyserial op de achtergrond laden
+KEYPAD_PREWARM_SECONDS = 2.0      # zo lang na de start het Service-keypad verborgen klaarzetten
+HIDE_SETTLE_SECONDS = 0.15        # pas zo lang na het verbergen een nieuwe screenshot (WM moet eerst unmappen)
+
 # ========= DEPENDENCIES =========
-try:
-    from PIL import ImageGrab, ImageFilter, Image, ImageTk
-    HAS_PIL = True
-except Exception:
-    HAS_PIL = False
-
-try:
-    import serial
-    HAS_SERIAL = True
-except Exception:
-    HAS_SERIAL = False
-
-# ========= MONITOR HELPERS =========
-user32 = ctypes.windll.user32
-user32.SetProcessDPIAware()
-MONITORENUMPROC = ctypes.WINFUNCTYPE(
-    ctypes.c_int, ctypes.c_ulong, ctypes.c_ulong, ctypes.POINTER(wintypes.RECT), ctypes.c_double
-)
-_monitors = []
-def _monitor_enum(hMonitor, hdcMonitor, lprcMonitor, dwData):
-    r = lprcMonitor.contents
-    _monitors.append((r.left, r.top, r.right, r.bottom))
-    return 1
-def get_monitors():
-    _monitors.clear()
-    user32.EnumDisplayMonitors(0, 0, MONITORENUMPROC(_monitor_enum), 0)
-    return _monitors[:]
+HAS_PIL = None                    # None = nog niet geladen (FAST_START: gebeurt op een achtergrondthread)
+HAS_SERIAL = None
+
+
+def load_dependencies():
+    """Pillow en pyserial importeren (samen ~100 ms); mag vanuit een andere thread."""
+    global HAS_PIL, HAS_SERIAL, ImageGrab
+    global make_engine, MultiFrameCache, ImageSurface, SerialHub
+    if HAS_PIL is None:
+        try:
+            from PIL import ImageGrab
+            from render_engine import make_engine
+            from frame_cache import MultiFrameCache
+            from image_surface import ImageSurface
+            HAS_PIL = True
+        except Exception:
+            HAS_PIL = False
+    if HAS_SERIAL is None:
+        try:
+            from serial_hub import SerialHub, pyserial_available
+            HAS_SERIAL = pyserial_available()
+        except Exception:
+            HAS_SERIAL = False
+
+
+if not FAST_START:
+    load_dependencies()
 
 # ========= APP =========
 class SacoaOverlayApp:
     def __init__(self, root):
         self.root = root
         self.root.withdraw()
+        # gedeelde instellingen; fout in het bestand -> standaardwaarden (zie status)
+        self.cfg = LockConfig("sacoa", post=lambda fn: self.root.after(0, fn))
+        self.cfg.load()
 
         screens = get_monitors()
         if not screens:
             messagebox.showerror("Overlay", "Geen schermen gevonden.")
             raise SystemExit(1)
-        idx = min(max(0, SCREEN_INDEX), len(screens)-1)
-        self.sx, self.sy, self.sr, self.sb = screens[idx]
-        self.swidth  = self.sr - self.sx
-        self.sheight = self.sb - self.sy
+        self._select_screens(screens)
 
-        self.overlay = None
+        self.overlays = []
+        self.canvases = []
+        self.surfaces = []
+        self.overlay = None                # hoofdscherm; ook in self.overlays[0]
         self.canvas  = None
-        self.img_ref = None
-        self.last_trigger = 0.0
-        self.relock_timer = None
+        self.scheduler = TkScheduler(self.root)
+        # LOCK_PROFILE=1 of --profile: callbacks meten en haperingen loggen
+        self.profiler = maybe_install_profiler(
+            self.root, str(Path(__file__).resolve().parent / "sacoa_profile.log"),
+            scheduler=self.scheduler,
+        )
+        self.metrics = make_metrics(
+            METRICS_ENABLED,
+            str(Path(__file__).resolve().parent / METRICS_FILE) if METRICS_FILE else None,
+            METRICS_PORT, self.scheduler,
+        )
+        self.audit = make_audit(
+            AUDIT_ENABLED, Path(__file__).resolve().parent / AUDIT_FILE, "sacoa",
+            max_bytes=AUDIT_MAX_MB * 1024 * 1024, max_age=AUDIT_MAX_DAYS * 86400, keep=AUDIT_KEEP,
+        )
+        self.audit.log("start")
+        # debounce + samenvoegen in de seriële thread; hoogstens één trigger onderweg naar Tk
+        self.trigger_gate = TriggerGate(
+            lambda fn: self.root.after(0, fn), self.on_serial_trigger, self.cfg.trigger_min_interval
+        )
+        self.last_trigger_rx = None       # time.monotonic() van de laatst ontvangen TRIGGER-regel
+        self.last_trigger_source = None   # poort waar die vandaan kwam
+        # kaartenlijst: O(1)-index, wordt bij wijzigingen op de achtergrond herladen
+        self.card_store = CardStore(
+            Path(__file__).resolve().parent / CARDS_FILENAME, mode=CARD_MODE, bloom=CARD_BLOOM
+        )
+        # centrale kaartlijst/instellingen: eerst de laatst geldige bundel uit de cache, dan pollen
+        self.fleet = make_fleet(
+            FLEET_URL, Path(__file__).resolve().parent / FLEET_KEY_FILE,
+            Path(__file__).resolve().parent / "sacoa_fleet.cache",
+            {"cards": self.card_store.path}, self._on_fleet_settings, lambda fn: self.root.after(0, fn),
+            interval=FLEET_INTERVAL,
+        )
+        self.card_store.load()
+        self.watcher = FileWatcher().start()
+        self.watcher.watch(self.card_store.path, lambda path: self.card_store.reload_async())
+        self.watcher.watch(self.cfg.path, lambda path: self.cfg.reload())
+        # headless kern: toestand, invoerbuffer, service-code en relock-timer
+        self.core = LockCore(
+            self.scheduler, single_pin_verifier(self.cfg.service_pin), max_len=self.cfg.max_code_len,
+            allowed=str.isdigit, relock_seconds=self.cfg.auto_relock_seconds, state=UNLOCKED,
+        )
+        self.core.on_state = self._on_lock_state
+        self.core.on_input = self._update_mask
+        self.core.on_reject = self._on_reject
+        # LOCK_TRACE=1 of --trace: serieel, invoer en timers opnemen voor replay.py
+        self.trace = maybe_record(
+            Path(__file__).resolve().parent / "sacoa_trace.lktrace",
+            {"app": "sacoa", "relock_seconds": self.cfg.auto_relock_seconds,
+             "max_len": self.cfg.max_code_len, "allowed": "digit", "trigger_word": TRIGGER_WORD,
+             "card_prefix": CARD_PREFIX, "trigger_min_interval": self.cfg.trigger_min_interval},
+            self.core, self.scheduler, cards=self.card_store,
+        )
+        self.render_engines = []
 
         self.keypad_win = None
-        self.entered = ""
         self.mask_var = None
 
+        self.frame_cache = None
+        self.serial_hub = None
+        self.link = None                   # LinkMonitor zodra de SerialHub draait
+        self.link_timer = None
+        self.last_show_ms = 0.0
+
         self._build_overlay()
+        if self.profiler:
+            self.profiler.wrap_commands(self.root)
+
+        # Overlay pas na start_lock_delay_seconds tonen (zelfde pad als een relock)
+        self.core.unlock("start", relock_after=self.cfg.start_lock_delay_seconds)
+
+        # alleen het subsysteem waarvan iets veranderde wordt bijgewerkt
+        self.cfg.subscribe({"service_pin", "max_code_len"}, self._on_cfg_core)
+        self.cfg.subscribe({"auto_relock_seconds"}, self._on_cfg_relock)
+        self.cfg.subscribe({"trigger_min_interval"}, self._on_cfg_trigger)
+        self.cfg.subscribe({"serial_ports"}, self._on_cfg_ports)
+        self.cfg.subscribe({"heartbeat_seconds", "heartbeat_misses", "ping_seconds"}, self._on_cfg_link)
+        self.cfg.subscribe({"blur_radius", "dim_alpha", "render_backend", "blur_downscale"},
+                           self._on_cfg_render)
+        self.cfg.subscribe({"frame_refresh_seconds"}, self._on_cfg_refresh)
+        self.cfg.subscribe({"screen_index", "all_monitors"}, self._on_cfg_screens)
+
+        # lock / unlock [sec] / extend [sec] / status; uitgevoerd op de Tk-thread
+        # (zonder seconden: de actuele auto_relock_seconds van de kern)
+        handlers = core_handlers(
+            self.core, extra_status=lambda: {**self._reader_status(), **self.cfg.status()},
+        )
+        handlers["readers"] = lambda req: self.link.details() if self.link else {}
+        handlers["fleet"] = lambda req: self.fleet.status()
+        self.control = start_control(
+            CONTROL_ENABLED, handlers, lambda fn: self.root.after(0, fn),
+            path=CONTROL_SOCKET, port=CONTROL_PORT, token=CONTROL_TOKEN or None,
+        )
 
-        # Overlay pas na START_LOCK_DELAY_SECONDS tonen
-        threading.Timer(
-            START_LOCK_DELAY_SECONDS, lambda: self.root.after(0, self.show_overlay)
-        ).start()
+        if HAS_PIL is None:
+            # FAST_START: overlay en kern staan al; Pillow/pyserial komen er op de achtergrond bij
+            threading.Thread(target=self._load_dependencies, name="imports", daemon=True).start()
+            self.scheduler.call_later(KEYPAD_PREWARM_SECONDS, self.root.after_idle, self._build_keypad)
+        else:
+            self._start_devices()
+
+    def _load_dependencies(self):
+        load_dependencies()
+        self.root.after(0, self._start_devices)
 
+    def _start_devices(self):
+        """Render-engines, frame-cache en seriële lezers; pas als Pillow/pyserial geladen zijn."""
+        if HAS_PIL:
+            self._start_rendering()
+
+        # één I/O-lus voor alle lezers; eigen backoff per poort, nieuwe apparaten vanzelf erbij
         if HAS_SERIAL:
-            threading.Thread(target=self._serial_loop, daemon=True).start()
+            cfg = self.cfg
+            self.serial_hub = SerialHub(cfg.serial_ports, cfg.baudrate, self._on_serial_frame)
+            # heartbeats/ping: een hangende lezer wordt gemeld en opnieuw verbonden
+            self.link = LinkMonitor(
+                self.serial_hub.send, self.serial_hub.reconnect, cfg.heartbeat_seconds,
+                cfg.heartbeat_misses, cfg.ping_seconds, on_change=self._on_link_change,
+            )
+            if self.trace:
+                self.serial_hub.on_bytes = self.trace.serial_bytes
+            self.serial_hub.start()
+            self.link_timer = self.scheduler.call_every(cfg.heartbeat_seconds / 2, self.link.tick)
+
+    def _start_rendering(self):
+        """Surfaces en frame-cache voor de huidige self.screens (ook na een schermwissel)."""
+        # één engine per monitor: de renders lopen parallel en engines hergebruiken buffers
+        self.render_engines = self._make_engines()
+        self.surfaces = [
+            ImageSurface(canvas, mon.width, mon.height, SURFACE_MODE)
+            for canvas, mon in zip(self.canvases, self.screens)
+        ]
+        self.surface = self.surfaces[0]
+        cache = MultiFrameCache(
+            [lambda m=m: self._grab_screen(m) for m in self.screens],
+            [e.render for e in self.render_engines],
+            lambda index, img: self._on_frame_rendered(index, img, cache),
+            interval=self.cfg.frame_refresh_seconds, workers=self.cfg.render_workers or None,
+        )
+        self.frame_cache = cache
+        cache.start()
+        if self.core.state == LOCKED:       # overlay stond al (vroege relock): geen frames bouwen
+            self.frame_cache.pause()
+
+    def _make_engines(self):
+        cfg = self.cfg
+        return [make_engine(cfg.render_backend, cfg.blur_radius, cfg.dim_alpha, cfg.blur_downscale)
+                for _ in self.screens]
+
+    def _select_screens(self, screens):
+        idx = min(max(0, self.cfg.screen_index), len(screens)-1)
+        # screens[0] = hoofdscherm (Service-knop, keypad); de rest alleen afschermen
+        self.screens = select_monitors(screens, idx, self.cfg.all_monitors)
+        self.sx, self.sy, self.sr, self.sb = self.screens[0]
+        self.swidth  = self.sr - self.sx
+        self.sheight = self.sb - self.sy
 
     # ----- Overlay -----
     def _build_overlay(self):
-        self.overlay = tk.Toplevel(self.root)
-        self.overlay.withdraw()
-        self.overlay.overrideredirect(True)
-        self.overlay.attributes("-topmost", True)
-        self.overlay.geometry(f"{self.swidth}x{self.sheight}+{self.sx}+{self.sy}")
-
-        self.canvas = tk.Canvas(self.overlay, highlightthickness=0, bd=0)
-        self.canvas.pack(fill="both", expand=True)
+        """Eén overlay per scherm in self.screens; alleen het hoofdscherm krijgt de Service-knop."""
+        for i, mon in enumerate(self.screens):
+            ov = tk.Toplevel(self.root)
+            ov.withdraw()
+            ov.overrideredirect(True)
+            ov.attributes("-topmost", True)
+            ov.geometry(mon.geometry)
+
+            canvas = tk.Canvas(ov, highlightthickness=0, bd=0, bg="black")
+            canvas.pack(fill="both", expand=True)
+            self.overlays.append(ov)
+            self.canvases.append(canvas)
+            self.surfaces.append(None)      # ImageSurface volgt in _start_devices
+            self._draw_texts(canvas, mon.width, mon.height)
+        self.overlay, self.canvas = self.overlays[0], self.canvases[0]
+        self.surface = self.surfaces[0]
 
         # Service-knop (rechts onder)
         self.service_btn = tk.Button(
@@ -121,72 +319,103 @@ class SacoaOverlayApp:
             anchor="se", width=SERVICE_W, height=SERVICE_H
         )
 
-    def _render_blur(self):
-        """Maak screenshot van het scherm, blur en dim ‘m, en teken de teksten erop."""
-        if not HAS_PIL:
-            self.canvas.configure(bg="black"); self.canvas.delete("all")
-            return
+    def _grab_screen(self, mon):
+        # all_screens: op Windows anders alleen het primaire scherm te fotograferen
+        return ImageGrab.grab(bbox=(mon.left, mon.top, mon.right, mon.bottom), all_screens=True)
+
+    def _on_frame_rendered(self, index, img, cache):
+        """Vanuit een render-thread: PhotoImage maken mag alleen op de Tk-thread."""
+        self.root.after(0, lambda: self._install_frame(index, img, cache))
+
+    def _install_frame(self, index, img, cache):
+        if cache is not self.frame_cache:
+            return                          # frame van vóór een schermwissel
+        if self.metrics.enabled:
+            self.metrics.observe("sacoa_render_ms", self.frame_cache.last_render_ms)
+        surface = self.surfaces[index]
         try:
-            img = ImageGrab.grab(bbox=(self.sx, self.sy, self.sr, self.sb))
-            img = img.filter(ImageFilter.GaussianBlur(BLUR_RADIUS))
-            if DIM_ALPHA > 0:
-                black = Image.new("RGB", img.size, (0,0,0))
-                img = Image.blend(img, black, DIM_ALPHA)
-            self.img_ref = ImageTk.PhotoImage(img)
-            self.canvas.delete("all")
-            self.canvas.create_image(0, 0, anchor="nw", image=self.img_ref)
-            cx, cy = self.swidth//2, self.sheight//2
-            self.canvas.create_text(cx, cy-40,
-                                    text="Scan uw pasje om te activeren",
-                                    fill="white", font=TITLE_FONT, anchor="s")
-            self.canvas.create_text(cx, cy-25,
-                                    text="Scan your card to activate",
-                                    fill="#DDDDFF", font=SUB_FONT, anchor="n")
-            self.canvas.create_text(cx, cy+25,
-                                    text="Bitte Karte scannen zum Aktivieren",
-                                    fill="#DDDDFF", font=SUB_FONT, anchor="n")
+            surface.update(img)
         except Exception:
-            self.canvas.configure(bg="black"); self.canvas.delete("all")
+            surface.clear("black")
+
+    def _draw_texts(self, canvas, width, height):
+        """Teksten één keer aanmaken; ze blijven boven het beeld-item staan."""
+        cx, cy = width//2, height//2
+        canvas.create_text(cx, cy-40,
+                           text="Scan uw pasje om te activeren",
+                           fill="white", font=TITLE_FONT, anchor="s")
+        canvas.create_text(cx, cy-25,
+                           text="Scan your card to activate",
+                           fill="#DDDDFF", font=SUB_FONT, anchor="n")
+        canvas.create_text(cx, cy+25,
+                           text="Bitte Karte scannen zum Aktivieren",
+                           fill="#DDDDFF", font=SUB_FONT, anchor="n")
+        # alleen zichtbaar als een bewaakte lezer geen heartbeats meer stuurt
+        canvas.create_text(cx, cy+120,
+                           text="Kaartlezer offline — meld dit bij de balie",
+                           fill="#FF6B6B", font=SUB_FONT, anchor="n",
+                           state="hidden", tags=("reader_offline",))
 
     def show_overlay(self):
-        self._render_blur()
-        self.overlay.deiconify()
-        self.overlay.lift()
-        self.overlay.attributes("-topmost", True)
+        """Toon het vooraf gerenderde frame; er wordt hier niet meer geblurd."""
+        t0 = time.perf_counter()
+        if self.frame_cache:
+            self.frame_cache.pause()
+        for ov in self.overlays:           # alle schermen tegelijk
+            ov.deiconify()
+            ov.lift()
+            ov.attributes("-topmost", True)
         try: self.canvas.focus_set()
         except Exception: pass
+        self.last_show_ms = (time.perf_counter() - t0) * 1000.0
+        if self.metrics.enabled:
+            self.metrics.observe("sacoa_show_overlay_ms", self.last_show_ms)
 
     def hide_overlay(self):
-        self.overlay.withdraw()
+        for ov in self.overlays:
+            ov.withdraw()
+        if self.frame_cache:
+            # niet meteen verversen: dan kan de overlay zelf nog op de screenshot staan
+            self.frame_cache.resume(refresh=False)
+            self.root.after_idle(self.scheduler.call_later, HIDE_SETTLE_SECONDS,
+                                 self._refresh_after_hide)
+
+    def _refresh_after_hide(self):
+        if self.frame_cache and self.core.state != LOCKED:   # intussen weer gelockt: cache staat stil
+            self.frame_cache.refresh_now()
 
     # ----- Relock -----
     def _start_relock_timer(self):
-        """Start/Herstart de timer die na AUTO_RELOCK_SECONDS de overlay terugplaatst."""
-        if self.relock_timer:
-            try: self.relock_timer.cancel()
-            except Exception: pass
-        self.relock_timer = threading.Timer(
-            AUTO_RELOCK_SECONDS, lambda: self.root.after(0, self.show_overlay)
-        )
-        self.relock_timer.daemon = True
-        self.relock_timer.start()
+        """Start/Herstart de timer die na auto_relock_seconds de overlay terugplaatst."""
+        self.core.unlock("relock-timer")
+
+    def _on_lock_state(self, state, reason):
+        """Meldingen van LockCore: overlay tonen of verbergen."""
+        self.audit.log_state(state, reason, "service" if reason == "code" else "")
+        if state == LOCKED:
+            self.show_overlay()
+        else:
+            self.hide_overlay()
+            if reason == "code":
+                self._on_keypad_close()
 
     # ----- Service / keypad -----
     def _on_service_pressed(self):
         self._show_keypad()
 
     def _show_keypad(self):
+        self._build_keypad()
+        self.keypad_win.deiconify(); self.keypad_win.lift(); self.keypad_win.focus_set()
+
+    def _build_keypad(self):
+        """Keypad verborgen opbouwen; bij FAST_START al in idle-tijd na de start."""
         if self.keypad_win and self.keypad_win.winfo_exists():
-            self.keypad_win.deiconify(); self.keypad_win.lift(); self.keypad_win.focus_set()
             return
-
         self.keypad_win = tk.Toplevel(self.root)
+        self.keypad_win.withdraw()
         self.keypad_win.attributes("-topmost", True)
         self.keypad_win.title("Service")
-        kw, kh = 420, 520
-        kx = self.sx + (self.swidth - kw) // 2
-        ky = self.sy + (self.sheight - kh) // 2
-        self.keypad_win.geometry(f"{kw}x{kh}+{kx}+{ky}")
+        self._place_keypad()
         self.keypad_win.configure(bg="#111122")
         self.keypad_win.resizable(False, False)
         self.keypad_win.protocol("WM_DELETE_WINDOW", self._on_keypad_close)
@@ -215,101 +444,175 @@ class SacoaOverlayApp:
         self.keypad_win.bind("<BackSpace>", self._kb_backspace)
         self.keypad_win.bind("<Escape>", self._kb_clear)
         self.keypad_win.bind("<Return>", lambda e: self._keypad_try_unlock())
-        self.keypad_win.focus_set()
+        self.keypad_win.update_idletasks()     # layout nu berekenen, niet bij de eerste druk
+
+    def _place_keypad(self):
+        """Midden op het hoofdscherm (ook opnieuw na een schermwissel)."""
+        kw, kh = 420, 520
+        kx = self.sx + (self.swidth - kw) // 2
+        ky = self.sy + (self.sheight - kh) // 2
+        self.keypad_win.geometry(f"{kw}x{kh}+{kx}+{ky}")
 
     def _on_keypad_close(self):
-        self.entered = ""
-        if self.mask_var is not None:
-            self.mask_var.set("")
+        self.core.clear()
         if self.keypad_win and self.keypad_win.winfo_exists():
             self.keypad_win.withdraw()
         try: self.canvas.focus_set()
         except Exception: pass
 
-    # keypad invoer
+    # keypad invoer (view op LockCore)
     def _kb_type(self, event):
-        ch = event.char
-        if ch and ch.isdigit():
-            if len(self.entered) < 32:
-                self.entered += ch
-                self.mask_var.set("•"*len(self.entered))
+        self.core.type_char(event.char)
     def _kb_backspace(self, event):
-        if self.entered:
-            self.entered = self.entered[:-1]
-            self.mask_var.set("•"*len(self.entered) if self.entered else "")
+        self.core.backspace()
     def _kb_clear(self, event):
-        self.entered = ""
-        self.mask_var.set("")
+        self.core.clear()
     def _keypad_press(self, lab):
-        if lab == "Wissen":
-            self.entered = ""
-        elif lab == "⌫":
-            self.entered = self.entered[:-1]
-        else:
-            if len(self.entered) < 32:
-                self.entered += lab
-        self.mask_var.set("•"*len(self.entered) if self.entered else "")
+        self.core.press(lab)
+    def _update_mask(self, length):
+        if self.mask_var is not None:
+            self.mask_var.set("•"*length if length else "")
 
     def _keypad_try_unlock(self):
-        if self.entered == SERVICE_PIN:
-            self.entered = ""
-            self.mask_var.set("")
-            self.hide_overlay()
-            self._on_keypad_close()
-            self._start_relock_timer()   # altijd relock starten
-        else:
-            self.mask_var.set("Foutieve code")
-            self.keypad_win.after(900, lambda: self.mask_var.set(""))
-            self.entered = ""
+        self.core.submit()           # bij succes: relock start, keypad sluit via _on_lock_state
 
-    # ----- Serieel (ESP32 / adapter) -----
-    def on_serial_trigger(self):
-        now = time.time()
-        if now - self.last_trigger < TRIGGER_MIN_INTERVAL:
-            return
-        self.last_trigger = now
-        self.hide_overlay()
-        self._start_relock_timer()         # altijd relock starten
+    def _on_reject(self):
+        self.audit.log("reject")
+        self.mask_var.set("Foutieve code")
+        self.keypad_win.after(900, lambda: self.mask_var.set(""))
 
-    def _serial_loop(self):
-        if not HAS_SERIAL:
+    # ----- Serieel (ESP32 / adapter) -----
+    def on_serial_trigger(self, rx_time=None, source=None, session=None):
+        """
+        Via TriggerGate: al gedebounced, hoogstens één tegelijk in de Tk-wachtrij.
+        ``session``: sessieduur van de kaart in seconden (None/0 = auto_relock_seconds).
+        """
+        self.last_trigger_rx = rx_time
+        self.last_trigger_source = source
+        self.audit.log("trigger", "", f"{source} {session}s" if session else source)
+        if self.metrics.enabled and rx_time is not None:
+            self.metrics.observe("sacoa_trigger_dispatch_ms", ms_since(rx_time))
+        self.core.trigger(session)         # verbergt de overlay en (her)start altijd de relock
+        if self.metrics.enabled and rx_time is not None:
+            self.metrics.observe("sacoa_unlock_ms", ms_since(rx_time))
+
+    def _on_link_change(self, source, online):
+        """Vanuit LinkMonitor.tick (Tk-thread): offline-melding op alle overlays bijwerken."""
+        self.audit.log("reader_online" if online else "reader_offline", "", source)
+        if not online:
+            self.metrics.inc("sacoa_reader_offline")
+        self._show_offline_text()
+
+    def _show_offline_text(self):
+        state = "normal" if self.link and self.link.offline_sources() else "hidden"
+        for canvas in self.canvases:
+            canvas.itemconfigure("reader_offline", state=state)
+
+    def _on_fleet_settings(self, settings, changed):
+        """
+        Via FleetSync op de Tk-thread; de kaartlijst loopt via de FileWatcher.
+        De instellingen zijn een laag boven lock_config.json; vervallen
+        sleutels vallen terug op het bestand.
+        """
+        self.cfg.set_layer("fleet", settings)
+
+    # ----- Instellingen (lock_config.json / fleet) -----
+    def _on_cfg_core(self, changed):
+        if "service_pin" in changed:
+            self.core.verify = single_pin_verifier(changed["service_pin"])
+        if "max_code_len" in changed:
+            self.core.max_len = changed["max_code_len"]
+
+    def _on_cfg_relock(self, changed):
+        # een lopende relock op de oude standaard schuift mee; kaartsessies blijven staan
+        self.core.set_relock_seconds(changed["auto_relock_seconds"])
+
+    def _on_cfg_trigger(self, changed):
+        self.trigger_gate.min_interval = changed["trigger_min_interval"]
+
+    def _on_cfg_ports(self, changed):
+        # de SerialHub houdt bestaande poorten open; alleen weggevallen poorten sluiten
+        if self.serial_hub:
+            self.serial_hub.set_patterns(changed["serial_ports"])
+
+    def _on_cfg_link(self, changed):
+        if self.link is None:
             return
-        ser = None
-        while True:
-            try:
-                if ser is None or not ser.is_open:
-                    try:
-                        ser = serial.Serial(COM_PORT, BAUDRATE, timeout=0.2)
-                    except Exception:
-                        time.sleep(1.0); continue
-                # lees regels en bytes en reageer alleen op het commando 'TRIGGER'
-                raw = ser.readline()
-                try:
-                    data = raw.decode(errors="ignore").strip()
-                except AttributeError:
-                    # als pyserial al str teruggeeft
-                    data = (raw or "").strip()
-                if data == "TRIGGER":
-                    self.root.after(0, self.on_serial_trigger); time.sleep(0.1)
-                else:
-                    raw = ser.read(16)
-                    try:
-                        bdata = raw.decode(errors="ignore").strip()
-                    except AttributeError:
-                        bdata = (raw or "").strip()
-                    if bdata == "TRIGGER":
-                        self.root.after(0, self.on_serial_trigger); time.sleep(0.1)
-            except Exception:
-                try:
-                    if ser: ser.close()
-                except Exception: pass
-                ser = None
-                time.sleep(1.0)
+        cfg = self.cfg
+        self.link.heartbeat = cfg.heartbeat_seconds
+        self.link.misses = cfg.heartbeat_misses
+        self.link.ping_interval = cfg.ping_seconds
+        if "heartbeat_seconds" in changed:
+            self.link_timer.cancel()
+            self.link_timer = self.scheduler.call_every(cfg.heartbeat_seconds / 2, self.link.tick)
+
+    def _on_cfg_render(self, changed):
+        if self.frame_cache is None:
+            return                          # Pillow nog niet geladen: _start_devices leest de nieuwe waarden
+        self.render_engines = self._make_engines()
+        self.frame_cache.set_renders([e.render for e in self.render_engines])
+
+    def _on_cfg_refresh(self, changed):
+        if self.frame_cache is not None:
+            self.frame_cache.interval = changed["frame_refresh_seconds"]
+            self.frame_cache.refresh_now()
+
+    def _on_cfg_screens(self, changed):
+        """Ander scherm of alle schermen aan/uit: overlays opnieuw opbouwen; serieel loopt door."""
+        screens = get_monitors()
+        if not screens:
+            return                          # geen schermen te vinden: huidige overlays laten staan
+        rendering = self.frame_cache is not None
+        if rendering:
+            self.frame_cache.stop()
+            self.frame_cache = None
+        for ov in self.overlays:
+            ov.destroy()
+        self.overlays, self.canvases, self.surfaces = [], [], []
+
+        self._select_screens(screens)
+        self._build_overlay()
+        self._show_offline_text()
+        if rendering:                       # anders doet _start_devices dit straks
+            self._start_rendering()
+        if self.keypad_win and self.keypad_win.winfo_exists():
+            self._place_keypad()
+        if self.profiler:
+            self.profiler.wrap_commands(self.root)
+        if self.core.state == LOCKED:
+            self.show_overlay()
+
+    def _reader_status(self):
+        if self.link is None:
+            return {"reader": "geen"}
+        return self.link.summary()
+
+    def _on_serial_frame(self, frame, source):
+        """Vanuit de SerialHub-thread: elke complete 'TRIGGER'-regel telt precies één keer."""
+        if self.link and self.link.on_frame(frame, source):
+            return                          # heartbeat of pong
+        if frame.line == TRIGGER_WORD:
+            self.trigger_gate.offer(frame.time, source)
+        elif frame.line.startswith(CARD_PREFIX):
+            # hier al controleren: een geweigerde kaart verbruikt de debounce niet
+            uid = frame.line[len(CARD_PREFIX):]
+            session = self.card_store.check(uid)
+            if session is None:
+                self.metrics.inc("sacoa_cards_rejected")
+                self.audit.log("card_rejected", "…" + normalize_uid(uid)[-4:], source)
+                return
+            self.audit.log("card", "…" + normalize_uid(uid)[-4:], source)
+            self.trigger_gate.offer(frame.time, source, session)
 
 def main():
     root = tk.Tk()
-    SacoaOverlayApp(root)
-    root.mainloop()
+    app = SacoaOverlayApp(root)
+    try:
+        root.mainloop()
+    finally:
+        if app.trace:
+            app.trace.close()
+        app.audit.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,35 @@
 // === Seeed Studio XIAO ESP32C3 – Sacoa Spark trigger ===
 // Detecteert sluiting op D1 en stuurt het woord "TRIGGER" via USB-serieel
+//
+// Protocol (één regel per bericht, afgesloten met println):
+//   TRIGGER          kale puls, PC ontgrendelt voor AUTO_RELOCK_SECONDS
+//   CARD <UID-hex>   kaart gelezen, PC controleert de UID in sacoa_cards.txt
+//                    (sessieduur per kaart, of geweigerd)
+//   HB <n>           heartbeat elke HEARTBEAT_MS; blijft hij uit, dan meldt de PC
+//                    "lezer offline" en verbindt opnieuw (zie link_health.py)
+//   PONG <n>         antwoord op "PING <n>" van de PC (round-trip meting)
+// Oude firmware zonder HB blijft werken; de PC bewaakt die poort dan niet.
+// Een kaartlezer (RC522, Wiegand, ...) hoeft alleen sendCard() aan te roepen.
 
 const int PIN_PULSE = D1;
 const unsigned long DEBOUNCE_MS = 150;
+const unsigned long HEARTBEAT_MS = 1000;
 
 unsigned long lastMs = 0;
 int lastState = HIGH;
+unsigned long lastHbMs = 0;
+unsigned long hbSeq = 0;
+String rxLine;
+
+// UID als hex, bijv. {0x04, 0xA1, 0xB2, 0xC3} -> "CARD 04A1B2C3"
+void sendCard(const byte *uid, byte len) {
+  Serial.print("CARD ");
+  for (byte i = 0; i < len; i++) {
+    if (uid[i] < 0x10) Serial.print('0');
+    Serial.print(uid[i], HEX);
+  }
+  Serial.println();
+}
 
 void setup() {
   pinMode(PIN_PULSE, INPUT_PULLUP);   // gebruik interne pull-up naar 3.3V
@@ -22,4 +46,26 @@ void loop() {
     lastMs = now;
   }
   lastState = s;
+
+  // Heartbeat: teken van leven voor de PC
+  if (now - lastHbMs >= HEARTBEAT_MS) {
+    Serial.print("HB ");
+    Serial.println(++hbSeq);
+    lastHbMs = now;
+  }
+
+  // "PING <n>" van de PC direct beantwoorden met "PONG <n>"
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c == '\n') {
+      rxLine.trim();
+      if (rxLine.startsWith("PING")) {
+        Serial.print("PONG");
+        Serial.println(rxLine.substring(4));
+      }
+      rxLine = "";
+    } else if (rxLine.length() < 32) {
+      rxLine += c;
+    }
+  }
 }
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+serial_frames.py
+
+Gebufferde, incrementele regel-parser voor de seriële trigger-lijn.
+
+De ESP32 stuurt ``TRIGGER\\r\\n`` (Serial.println). Bytes kunnen in willekeurige
+stukken binnenkomen: een regel kan over meerdere reads verdeeld zijn, of één
+read kan meerdere regels bevatten. ``FrameParser`` houdt een buffer bij en
+geeft elke complete regel precies één keer terug, met het tijdstip
+(time.monotonic) waarop de laatste byte ervan binnenkwam.
+
+De app leest via ``serial_hub.SerialHub``, die ``FrameParser`` direct voedt.
+``SerialFrameReader`` (één blokkerende pyserial-poort) is er alleen nog voor
+bench_triggers.py en ``esp32_sim.py --selftest``.
+"""
+
+import time
+from collections import namedtuple
+
+Frame = namedtuple("Frame", "line time")
+
+MAX_LINE = 256          # langere 'regels' zijn ruis en worden weggegooid
+
+
+class FrameParser:
+    def __init__(self, max_line=MAX_LINE):
+        self.max_line = max_line
+        self._buf = bytearray()
+        self.frames = 0
+        self.overflows = 0
+
+    def feed(self, data, ts=None):
+        """Voeg ontvangen bytes toe; retourneert een lijst van complete ``Frame``s."""
+        if not data:
+            return []
+        if ts is None:
+            ts = time.monotonic()
+        self._buf += data
+        out = []
+        start = 0
+        while True:
+            nl = self._buf.find(b"\n", start)
+            if nl < 0:
+                break
+            line = bytes(self._buf[start:nl]).decode("ascii", errors="ignore").strip()
+            start = nl + 1
+            if line:
+                out.append(Frame(line, ts))
+        if start:
+            del self._buf[:start]
+        if len(self._buf) > self.max_line:
+            self._buf.clear()
+            self.overflows += 1
+        self.frames += len(out)
+        return out
+
+    def reset(self):
+        self._buf.clear()
+
+
+class SerialFrameReader:
+    """
+    Leest frames van een pyserial-achtig object (``read``, ``in_waiting``).
+    Alleen voor benches en de simulator; de app gebruikt SerialHub.
+
+    ``read(1)`` blokkeert tot er minstens één byte is (of tot de timeout van de
+    poort); daarna wordt in één keer opgehaald wat er al klaarstaat. Zo is er
+    geen poll-slaap en geen extra vertraging per trigger.
+    """
+
+    def __init__(self, ser, parser=None):
+        self.ser = ser
+        self.parser = parser or FrameParser()
+
+    def read_frames(self):
+        """Eén blokkerende leesronde; lege lijst bij timeout. Fouten gaan door naar de aanroeper."""
+        data = self.ser.read(1)
+        if not data:
+            return []
+        ts = time.monotonic()
+        waiting = self.ser.in_waiting
+        if waiting:
+            data += self.ser.read(waiting)
+        return self.parser.feed(data, ts)
+
+    def frames(self):
+        """Oneindige generator over alle binnenkomende frames."""
+        while True:
+            yield from self.read_frames()
@@ -0,0 +1,340 @@
+"""
+serial_hub.py
+
+Eén I/O-lus voor meerdere seriële lezers (kaartlezers, trigger-bordjes).
+
+- ``patterns``: vaste poorten ("COM10", "/dev/ttyUSB0") en/of globs
+  ("/dev/serial/by-id/*ESP32*", "/dev/ttyACM*", "COM*"). Globs worden elke
+  ``rescan`` seconden opnieuw bekeken: een ingeplugd apparaat wordt vanzelf
+  geopend, een verdwenen apparaat opgeruimd.
+- Elke poort heeft een eigen reconnect-backoff (0.5 s, verdubbelend tot 30 s);
+  een kapotte lezer houdt de andere dus niet op.
+- Elke complete regel gaat als ``on_frame(frame, source)`` naar de app, met
+  ``source`` = het pad van de poort. Let op: dat gebeurt in de hub-thread.
+- ``send(source, data)`` schrijft naar een lezer en ``reconnect(source)``
+  sluit en heropent een poort direct (zie link_health.py); beide mogen vanuit
+  elke thread, het echte werk gebeurt in de hub-thread.
+- ``on_bytes(data, source)`` (optioneel) ziet de ruwe bytes vóór de parser,
+  bijv. voor een opname met event_trace.py.
+- Een exceptie in ``on_frame``/``on_bytes`` telt als fout van die poort
+  (``status()``) maar stopt de hub-thread niet.
+
+Op Linux/macOS wacht de lus met ``selectors`` op alle poorten tegelijk (geen
+polling, geen slaap). Windows heeft geen select op COM-handles; daar kijkt de
+lus elke ``POLL_INTERVAL`` naar ``in_waiting`` van alle open poorten.
+"""
+
+import fnmatch
+import glob
+import selectors
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+from serial_frames import FrameParser
+
+BACKOFF_MIN = 0.5
+BACKOFF_MAX = 30.0
+RESCAN_INTERVAL = 2.0
+POLL_INTERVAL = 0.005           # alleen zonder select (Windows)
+_GLOB_CHARS = set("*?[")
+
+
+def pyserial_available():
+    """
+    pyserial laden (kost tientallen ms; mag vanuit een achtergrondthread).
+    False als het ontbreekt, of als het verkeerde pakket 'serial' geïnstalleerd is.
+    """
+    try:
+        import serial
+    except ImportError:
+        return False
+    return hasattr(serial, "Serial")
+
+
+def default_opener(baudrate):
+    import serial
+
+    def _open(path):
+        # timeout=0: read() geeft direct terug wat er is, de lus doet het wachten
+        return serial.Serial(path, baudrate, timeout=0)
+    return _open
+
+
+def _list_system_ports():
+    try:
+        from serial.tools import list_ports
+        return [p.device for p in list_ports.comports()]
+    except Exception:
+        return []
+
+
+class _Port:
+    __slots__ = ("path", "fixed", "ser", "parser", "failures", "next_attempt",
+                 "frames", "connects", "errors", "last_error")
+
+    def __init__(self, path, fixed):
+        self.path = path
+        self.fixed = fixed          # expliciet geconfigureerd: nooit opruimen
+        self.ser = None
+        self.parser = FrameParser()
+        self.failures = 0
+        self.next_attempt = 0.0
+        self.frames = 0
+        self.connects = 0
+        self.errors = 0
+        self.last_error = ""
+
+
+class SerialHub:
+    def __init__(self, patterns, baudrate=9600, on_frame=None, opener=None,
+                 rescan=RESCAN_INTERVAL, backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX,
+                 use_select=None):
+        self.patterns = [patterns] if isinstance(patterns, str) else list(patterns)
+        self.on_frame = on_frame
+        self.on_bytes = None
+        self.opener = opener or default_opener(baudrate)
+        self.rescan = rescan
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.use_select = (sys.platform != "win32") if use_select is None else use_select
+
+        self._ports = {}                # pad -> _Port
+        self._lock = threading.Lock()   # alleen voor status() vanuit andere threads
+        self._sel = selectors.DefaultSelector() if self.use_select else None
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._stop = False
+        self._requests = deque()        # ("send", pad, data) / ("reconnect", pad, None) / ("patterns", None, lijst)
+        self._thread = None
+        self._next_scan = 0.0
+        self.cpu_seconds = 0.0          # CPU-tijd van de hub-thread (time.thread_time)
+        if self._sel:
+            self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+
+    # ----- levenscyclus -----
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="SerialHub", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop = True
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for port in list(self._ports.values()):
+            self._close(port)
+        self._wake_r.close()
+        self._wake_w.close()
+        if self._sel:
+            self._sel.close()
+
+    def rescan_now(self):
+        """Direct opnieuw zoeken (bijv. na een melding van het OS)."""
+        self._next_scan = 0.0
+        self._wake()
+
+    def send(self, source, data):
+        """Bytes naar een lezer (bijv. PING); weggegooid als de poort niet open is."""
+        self._requests.append(("send", source, data))
+        self._wake()
+
+    def reconnect(self, source):
+        """Poort sluiten en meteen opnieuw openen, zonder backoff (lezer hangt)."""
+        self._requests.append(("reconnect", source, None))
+        self._wake()
+
+    def set_patterns(self, patterns):
+        """Andere poorten/globs (bijv. via fleet-sync); poorten die niet meer passen gaan dicht."""
+        self._requests.append(("patterns", None, [patterns] if isinstance(patterns, str) else list(patterns)))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except OSError:
+            pass
+
+    def status(self):
+        with self._lock:
+            return {p.path: {"open": p.ser is not None, "frames": p.frames,
+                             "connects": p.connects, "errors": p.errors,
+                             "last_error": p.last_error}
+                    for p in self._ports.values()}
+
+    # ----- ontdekken -----
+    def discover(self):
+        """Alle paden die nu bij de patronen horen: (pad, vast)."""
+        found = {}
+        system = None
+        for pat in self.patterns:
+            if not _GLOB_CHARS & set(pat):
+                found[pat] = True
+                continue
+            for path in glob.glob(pat):
+                found.setdefault(path, False)
+            if system is None:
+                system = _list_system_ports()
+            for dev in fnmatch.filter(system, pat):
+                found.setdefault(dev, False)
+        return found
+
+    def _scan(self, now):
+        found = self.discover()
+        with self._lock:
+            for path, fixed in found.items():
+                if path not in self._ports:
+                    self._ports[path] = _Port(path, fixed)
+            for path, port in list(self._ports.items()):
+                if path not in found and not port.fixed and port.ser is None:
+                    del self._ports[path]
+        self._next_scan = now + self.rescan
+
+    # ----- openen / sluiten -----
+    def _try_open(self, port, now):
+        ser = None
+        try:
+            ser = self.opener(port.path)
+            if self._sel:
+                self._sel.register(ser.fileno(), selectors.EVENT_READ, port)
+        except Exception as e:
+            if ser is not None:
+                ser.close()
+            self._failed(port, e, now)
+            return
+        port.ser = ser
+        port.connects += 1
+        port.parser.reset()
+
+    def _failed(self, port, error, now):
+        """Backoff verdubbelt tot er weer data binnenkomt (ook bij open-en-direct-weg)."""
+        port.failures += 1
+        port.errors += 1
+        port.last_error = str(error)
+        port.next_attempt = now + min(self.backoff_max, self.backoff_min * 2 ** (port.failures - 1))
+
+    def _close(self, port, error=None):
+        if port.ser is None:
+            return
+        if self._sel:
+            try:
+                self._sel.unregister(port.ser.fileno())
+            except (KeyError, ValueError, OSError):
+                pass
+        try:
+            port.ser.close()
+        except Exception:
+            pass
+        port.ser = None
+        if error is not None:
+            self._failed(port, error, time.monotonic())
+
+    def _handle_requests(self, now):
+        while self._requests:
+            kind, path, data = self._requests.popleft()
+            if kind == "patterns":
+                self.patterns = data
+                found = self.discover()
+                with self._lock:
+                    for p, port in list(self._ports.items()):
+                        if p not in found:
+                            self._close(port)
+                            del self._ports[p]
+                self._next_scan = 0.0
+                continue
+            port = self._ports.get(path)
+            if port is None:
+                continue
+            if kind == "reconnect":
+                if port.ser is not None:
+                    self._close(port)
+                    port.errors += 1
+                    port.last_error = "geen heartbeat; opnieuw verbinden"
+                port.next_attempt = now
+            elif port.ser is not None:
+                try:
+                    port.ser.write(data)
+                except Exception as e:
+                    self._close(port, e)
+
+    # ----- lus -----
+    def _read(self, port):
+        try:
+            waiting = port.ser.in_waiting
+            data = port.ser.read(waiting or 1)
+            if not data and self._sel:
+                # select meldde 'leesbaar' maar er komt niets: apparaat weg
+                raise OSError("geen data na leesbaar-melding (losgekoppeld?)")
+        except Exception as e:
+            self._close(port, e)
+            return
+        if not data:
+            return
+        ts = time.monotonic()
+        port.failures = 0
+        if self.on_bytes:
+            try:
+                self.on_bytes(data, port.path)
+            except Exception as e:
+                self._callback_failed(port, e)
+        frames = port.parser.feed(data, ts)
+        if frames:
+            port.frames += len(frames)
+            if self.on_frame:
+                for f in frames:
+                    try:
+                        self.on_frame(f, port.path)
+                    except Exception as e:     # fout in de app: deze regel kwijt, de lezers blijven lopen
+                        self._callback_failed(port, e)
+
+    @staticmethod
+    def _callback_failed(port, error):
+        port.errors += 1
+        port.last_error = f"callback: {error!r}"
+
+    def _loop(self):
+        cpu0 = time.thread_time()
+        while not self._stop:
+            now = time.monotonic()
+            if now >= self._next_scan:
+                self._scan(now)
+            if self._requests:
+                self._handle_requests(now)
+            waits = [self._next_scan]
+            for port in list(self._ports.values()):
+                if port.ser is None:
+                    if now >= port.next_attempt:
+                        self._try_open(port, now)
+                    if port.ser is None:
+                        waits.append(port.next_attempt)
+            timeout = max(0.0, min(waits) - time.monotonic())
+
+            if self._sel:
+                for key, _ in self._sel.select(timeout):
+                    if key.data is None:
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    elif key.data.ser is not None:
+                        self._read(key.data)
+            else:
+                got = False
+                for port in list(self._ports.values()):
+                    if port.ser is not None:
+                        try:
+                            ready = port.ser.in_waiting
+                        except Exception as e:
+                            self._close(port, e)
+                            continue
+                        if ready:
+                            got = True
+                            self._read(port)
+                if not got:
+                    time.sleep(min(timeout, POLL_INTERVAL))
+            self.cpu_seconds = time.thread_time() - cpu0
@@ -0,0 +1,74 @@
+"""
+trigger_queue.py
+
+Begrensde, samenvoegende overdracht van triggers van de seriële thread naar Tk.
+
+De debounce gebeurt al in de lezer-thread, op een monotone klok. Er staat
+hoogstens één trigger klaar voor de Tk-thread: komt er een nieuwe binnen
+terwijl de vorige nog niet is afgeleverd, dan wordt die samengevoegd
+(de nieuwste ontvangsttijd wint). Een ruizig contact of een overspoelde poort
+kan de Tk-wachtrij dus nooit laten vollopen.
+"""
+
+import threading
+import time
+
+
+class TriggerGate:
+    """
+    ``post(fn)`` zet ``fn`` op de Tk-thread (normaal ``lambda fn: root.after(0, fn)``).
+    ``handler(rx_time, source, payload)`` wordt op de Tk-thread aangeroepen
+    (``payload``: bijv. de sessieduur van een kaart; None bij een kale TRIGGER).
+    """
+
+    def __init__(self, post, handler, min_interval, clock=time.monotonic):
+        self._post = post
+        self._handler = handler
+        self.min_interval = min_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending = None          # (rx_time, source, payload) of None
+        self._last_accepted = float("-inf")
+
+        self.received = 0       # alle aangeboden triggers
+        self.debounced = 0      # weggegooid binnen min_interval
+        self.coalesced = 0      # samengevoegd met een nog niet afgeleverde trigger
+        self.delivered = 0      # daadwerkelijk aan Tk afgeleverd
+
+    def offer(self, rx_time=None, source=None, payload=None):
+        """Vanuit de lezer-thread. Retourneert True als de trigger (samengevoegd) doorgaat."""
+        now = self.clock()
+        if rx_time is None:
+            rx_time = now
+        with self._lock:
+            self.received += 1
+            if now - self._last_accepted < self.min_interval:
+                self.debounced += 1
+                return False
+            self._last_accepted = now
+            if self._pending is not None:
+                self._pending = (rx_time, source, payload)
+                self.coalesced += 1
+                return True
+            self._pending = (rx_time, source, payload)
+        self._post(self._deliver)
+        return True
+
+    def _deliver(self):
+        with self._lock:
+            item = self._pending
+            self._pending = None
+            if item is None:
+                return
+            self.delivered += 1
+        self._handler(*item)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "received": self.received,
+                "debounced": self.debounced,
+                "coalesced": self.coalesced,
+                "delivered": self.delivered,
+                "pending": int(self._pending is not None),
+            }
@@ -0,0 +1,24 @@
+"""Gedeelde modules en de Sacoa-modules importeerbaar maken, zoals de apps zelf doen."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for sub in ("LockCommon", "SacoaDisplayLock"):
+    sys.path.insert(0, str(ROOT / sub))
+
+
+@pytest.fixture
+def wait_until():
+    """``wait_until(cond, timeout)``: wachten tot ``cond()`` waar is (voor thread-tests)."""
+    def wait(cond, timeout=3.0):
+        end = time.monotonic() + timeout
+        while not cond():
+            if time.monotonic() > end:
+                return False
+            time.sleep(0.005)
+        return True
+    return wait
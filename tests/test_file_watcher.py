@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from file_watcher import FileWatcher
+
+
+@pytest.fixture
+def make_watcher():
+    watchers = []
+
+    def make(**kw):
+        w = FileWatcher(debounce=0.05, poll_interval=0.05, **kw)
+        reported = []
+        w.on_error = lambda path, error: reported.append((path, error))
+        watchers.append(w)
+        return w.start(), reported
+    yield make
+    for w in watchers:
+        w.stop()
+
+
+def write(path, text):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def test_poll_backend_sees_changes(tmp_path, make_watcher, wait_until):
+    path = tmp_path / "pins.txt"
+    path.write_text("1234 Lotte\n")
+    w, _ = make_watcher(force_polling=True)
+    got = []
+    w.watch(path, got.append)
+    assert w.backend == "poll"
+    write(path, "1234 Lotte\n5678 Ruben\n")
+    assert wait_until(lambda: got == [str(path.resolve())])
+
+
+def test_failed_inotify_watch_falls_back_to_polling(tmp_path, make_watcher, wait_until):
+    w, reported = make_watcher()
+    if w.backend != "inotify":
+        pytest.skip("geen inotify op dit platform")
+    path = tmp_path / "nog_niet" / "pins.txt"       # map bestaat nog niet: add_watch faalt
+    got = []
+    w.watch(path, got.append)
+    assert w.backend == "inotify+poll"
+    assert [p for p, _ in w.watch_errors] == [str(path.resolve())]
+    assert reported and reported[0][0] == str(path.resolve())
+    path.parent.mkdir()
+    write(path, "1234 Lotte\n")
+    assert wait_until(lambda: len(got) == 1)
+    write(path, "5678 Ruben\n")
+    assert wait_until(lambda: len(got) == 2)
+
+
+def test_raising_callback_is_counted_and_reported(tmp_path, make_watcher, wait_until):
+    path = tmp_path / "lock_config.json"
+    path.write_text("{}")
+    w, reported = make_watcher(force_polling=True)
+    w.watch(path, lambda p: 1 / 0)
+    write(path, '{"sacoa": {}}')
+    assert wait_until(lambda: w.errors == 1)
+    assert isinstance(reported[0][1], ZeroDivisionError)
+    write(path, '{"sacoa": {"blur_radius": 8}}')
+    assert wait_until(lambda: w.errors == 2)          # watcher loopt door
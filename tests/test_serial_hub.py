@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+pytest.importorskip("termios")          # pty's: alleen Linux/macOS
+pytest.importorskip("serial")
+
+from esp32_sim import Esp32Sim, open_pty
+from serial_hub import SerialHub
+
+
+@pytest.fixture
+def pty_port():
+    master, slave, name = open_pty()
+    yield Esp32Sim(master), name
+    os.close(master)
+    os.close(slave)
+
+
+def test_hub_keeps_reading_after_on_frame_raises(pty_port, wait_until):
+    sim, name = pty_port
+    got = []
+
+    def on_frame(frame, source):
+        got.append(frame.line)
+        if len(got) == 1:
+            raise RuntimeError("fout in de app")
+
+    hub = SerialHub([name], on_frame=on_frame).start()
+    try:
+        assert wait_until(lambda: hub.status().get(name, {}).get("open"))
+        sim.send_raw(b"TRIGGER\r\nCARD 04AB\r\n")       # één read, eerste frame faalt
+        assert wait_until(lambda: len(got) == 2)
+        sim.send_trigger()
+        assert wait_until(lambda: len(got) == 3)
+        assert got == ["TRIGGER", "CARD 04AB", "TRIGGER"]
+        st = hub.status()[name]
+        assert st["open"] and st["errors"] == 1
+        assert "fout in de app" in st["last_error"]
+        assert hub._thread.is_alive()
+    finally:
+        hub.stop()
+
+
+def test_hub_keeps_reading_after_on_bytes_raises(pty_port, wait_until):
+    sim, name = pty_port
+    got = []
+    hub = SerialHub([name], on_frame=lambda frame, source: got.append(frame.line))
+
+    def on_bytes(data, source):
+        raise ValueError("opname kapot")
+    hub.on_bytes = on_bytes
+    hub.start()
+    try:
+        assert wait_until(lambda: hub.status().get(name, {}).get("open"))
+        sim.send_trigger()
+        sim.send_trigger()
+        assert wait_until(lambda: len(got) == 2)
+        assert hub.status()[name]["errors"] >= 1
+    finally:
+        hub.stop()
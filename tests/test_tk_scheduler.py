@@ -0,0 +1,50 @@
+from tk_scheduler import HeadlessLoop, TkScheduler
+
+
+def make():
+    loop = HeadlessLoop()
+    return loop, TkScheduler(loop, clock=loop.clock)
+
+
+def test_raising_callback_is_counted_and_printed(capsys):
+    loop, sched = make()
+    ran = []
+    sched.call_later(1.0, lambda: 1 / 0)
+    sched.call_later(1.0, ran.append, "daarna")
+    loop.advance(1.0)
+    assert sched.errors == 1
+    assert ran == ["daarna"]
+    assert "ZeroDivisionError" in capsys.readouterr().err
+
+
+def test_raising_callback_goes_to_report_callback_exception():
+    class Root(HeadlessLoop):
+        def __init__(self):
+            super().__init__()
+            self.reported = []
+
+        def report_callback_exception(self, exc, value, tb):
+            self.reported.append(exc)
+
+    root = Root()
+    sched = TkScheduler(root, clock=root.clock)
+    sched.call_later(0.5, lambda: 1 / 0)
+    root.advance(1.0)
+    assert root.reported == [ZeroDivisionError]
+    assert sched.errors == 1
+
+
+def test_repeating_timer_keeps_running_after_an_error():
+    loop, sched = make()
+    calls = []
+
+    def tick():
+        calls.append(loop.clock())
+        if len(calls) == 2:
+            raise RuntimeError("eenmalig")
+
+    sched.call_every(1.0, tick)
+    loop.advance(4.0)
+    assert len(calls) == 5
+    assert sched.errors == 1
+    assert sched.pending() == 1
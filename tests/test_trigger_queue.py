@@ -0,0 +1,55 @@
+from trigger_queue import TriggerGate
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self):
+        return self.t
+
+
+def make(min_interval=0.0):
+    posted, handled = [], []
+    clock = Clock()
+    gate = TriggerGate(posted.append, lambda *item: handled.append(item), min_interval, clock=clock)
+    return gate, posted, handled, clock
+
+
+def run(posted):
+    while posted:
+        posted.pop(0)()
+
+
+def test_triggers_before_delivery_are_coalesced_newest_wins():
+    gate, posted, handled, _ = make()
+    assert gate.offer(1.0, "a") and gate.offer(2.0, "b") and gate.offer(3.0, "c", 60)
+    assert len(posted) == 1         # hoogstens één aflevering onderweg naar Tk
+    run(posted)
+    assert handled == [(3.0, "c", 60)]
+    assert gate.stats() == {"received": 3, "debounced": 0, "coalesced": 2,
+                            "delivered": 1, "pending": 0}
+
+
+def test_new_trigger_after_delivery_is_posted_again():
+    gate, posted, handled, _ = make()
+    gate.offer(1.0)
+    run(posted)
+    gate.offer(2.0)
+    assert len(posted) == 1
+    run(posted)
+    assert [h[0] for h in handled] == [1.0, 2.0]
+
+
+def test_triggers_within_min_interval_are_debounced():
+    gate, posted, handled, clock = make(min_interval=0.2)
+    assert gate.offer()
+    clock.t += 0.1
+    assert not gate.offer()
+    clock.t += 0.15
+    assert gate.offer()
+    run(posted)
+    stats = gate.stats()
+    assert stats["debounced"] == 1
+    assert stats["received"] == 3
+    assert len(handled) == 1        # tweede geaccepteerde trigger samengevoegd met de eerste